@@ -8,7 +8,7 @@ Addicoat, M. a, Coupry, D. E., & Heine, T. (2014).
 The Journal of Physical Chemistry. A, 118(40), 9607–14.
 """
 
-__all__ = ["autografs", "framework", "utils"]
+__all__ = ["autografs", "framework", "utils", "server", "cli", "aio"]
 __author__ = "Damien Coupry"
 __credits__ = ["Prof. Matthew Addicoat"]
 __license__ = "MIT"
@@ -16,12 +16,37 @@ __maintainer__ = "Damien Coupry"
 __version__ = '2.3.2'
 __status__ = "production"
 
-from autografs.autografs import Autografs
-from autografs.framework import Framework
-
+import sys
 import logging
+import importlib
 
 logging.getLogger(__name__).addHandler(logging.NullHandler())
-logging.basicConfig(format='%(asctime)s | %(message)s',
-                    level=logging.INFO,
-                    datefmt='%I:%M:%S')
+
+# public names and the modules defining them. They are only imported
+# when first accessed, keeping "import autografs" cheap.
+_lazy = {"Autografs": "autografs.autografs",
+         "Framework": "autografs.framework"}
+
+
+def __getattr__(name):
+    """Import the submodules and main classes on first access"""
+    if name in _lazy:
+        value = getattr(importlib.import_module(_lazy[name]), name)
+    elif name in __all__:
+        value = importlib.import_module("{0}.{1}".format(__name__, name))
+    else:
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(
+            __name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List the lazy attributes with the others"""
+    return sorted(set(globals()) | set(_lazy) | set(__all__))
+
+
+if sys.version_info < (3, 7):
+    # no module level __getattr__ before python 3.7
+    from autografs.autografs import Autografs
+    from autografs.framework import Framework
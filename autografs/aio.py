@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright : see accompanying license files for details
+
+"""
+Asyncio front-end of the framework generation.
+
+Generations run in an executor and never modify the generator they
+come from: in threads, they go through Autografs.generate, which only
+reads the databases; in processes, each worker holds its own
+generator, forked from the original one.
+"""
+
+__author__ = "Damien Coupry"
+__credits__ = ["Prof. Matthew Addicoat"]
+__license__ = "MIT"
+__maintainer__ = "Damien Coupry"
+__version__ = '2.3.2'
+__status__ = "production"
+
+
+import asyncio
+import threading
+import functools
+import collections
+import multiprocessing
+import concurrent.futures
+
+from autografs.utils import budget
+
+import logging
+logger = logging.getLogger(__name__)
+
+# generator of a worker process
+_generator = None
+
+
+def _init_process(generator,
+                  options):
+    """Prepare a worker process, loading a generator if not forked"""
+    global _generator
+    if generator is None:
+        from autografs.autografs import Autografs
+        generator = Autografs(**options)
+    _generator = generator
+    return None
+
+
+def _make_in_process(kwargs):
+    """Worker entry point of process executors"""
+    return _generator.make(**kwargs)
+
+
+def _make_in_thread(generator,
+                    event,
+                    kwargs):
+    """Worker entry point of thread executors"""
+    if kwargs.get("topology_name") is None:
+        kwargs = dict(kwargs, topology=generator.topology)
+    with budget.cancellable(event):
+        return generator.generate(**kwargs)
+
+
+class ProcessExecutor(concurrent.futures.ProcessPoolExecutor):
+    """Process pool whose workers inherit a generator.
+
+    The workers are forked, and use the already loaded databases
+    of the generator. Where fork is not available, they create their
+    own generator from the options, which are then required.
+    """
+
+    def __init__(self,
+                 generator,
+                 max_workers=None,
+                 **options):
+        """Constructor for the process pool.
+
+        Parameters
+        ----------
+        generator: autografs.Autografs
+            the generator to use in the workers
+        max_workers: int, optional
+            number of worker processes
+        options: optional
+            passed to the Autografs constructor when
+            the workers cannot be forked
+
+        Returns
+        -------
+        None
+        """
+        try:
+            # forked workers receive the generator without pickling
+            context = multiprocessing.get_context("fork")
+            initargs = (generator, options)
+        except ValueError:
+            if not options:
+                raise ValueError(("Processes cannot be forked here: pass the"
+                                  " options to load the databases with."))
+            logger.warning("Workers load their own databases.")
+            context = multiprocessing.get_context()
+            initargs = (None, options)
+        super(ProcessExecutor, self).__init__(max_workers=max_workers,
+                                              mp_context=context,
+                                              initializer=_init_process,
+                                              initargs=initargs)
+        self.generator = generator
+        return None
+
+
+async def make_async(generator,
+                     executor=None,
+                     **kwargs):
+    """Create a framework without blocking the event loop.
+
+    Parameters
+    ----------
+    generator: autografs.Autografs
+        the generator providing the databases
+    executor: concurrent.futures.Executor, optional
+        where the generation runs. Defaults to the default
+        executor of the loop, a thread pool. Process pools
+        have to be autografs.aio.ProcessExecutor, created
+        with the same generator.
+    kwargs: optional
+        the arguments of Autografs.make
+
+    Returns
+    -------
+    autografs.framework.Framework
+        the result of Autografs.make
+    """
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, ProcessExecutor):
+        if executor.generator is not generator:
+            # the workers only know the generator of the executor
+            raise ValueError("The executor works with another generator.")
+        # only jobs waiting in the queue can be cancelled
+        call = functools.partial(_make_in_process, kwargs)
+        return await loop.run_in_executor(executor, call)
+    if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+        raise ValueError("Process pools have to be ProcessExecutor.")
+    event = threading.Event()
+    call = functools.partial(_make_in_thread, generator, event, kwargs)
+    future = loop.run_in_executor(executor, call)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        # stop the running generation at its next check
+        event.set()
+        future.cancel()
+        raise
+
+
+async def iter_make(generator,
+                    jobs,
+                    executor=None,
+                    max_pending=4,
+                    ordered=True,
+                    return_exceptions=False):
+    """Yield frameworks as they are created.
+
+    At most max_pending generations are running or waiting at any
+    time: the next jobs are only read once results are consumed.
+    Closing the iterator, e.g. with aclose after leaving the loop
+    early, cancels the generations still running.
+
+    Parameters
+    ----------
+    generator: autografs.Autografs
+        the generator providing the databases
+    jobs: iterable of dict
+        the arguments of Autografs.make, for each framework
+    executor: concurrent.futures.Executor, optional
+        see make_async
+    max_pending: int, optional
+        maximum number of generations submitted at once
+    ordered: bool, optional
+        if True, frameworks are yielded in the order of
+        the jobs, else as soon as they are ready
+    return_exceptions: bool, optional
+        if True, the exceptions raised by the jobs are
+        yielded in place of their framework. Otherwise,
+        the first one is raised.
+
+    Yields
+    ------
+    autografs.framework.Framework
+        the result of Autografs.make for each job
+    """
+    jobs = iter(jobs)
+    pending = collections.deque()
+
+    def submit():
+        job = next(jobs, None)
+        if job is None:
+            return False
+        pending.append(asyncio.ensure_future(
+            make_async(generator, executor=executor, **job)))
+        return True
+
+    try:
+        while len(pending) < max(1, max_pending) and submit():
+            pass
+        while pending:
+            if ordered:
+                task = pending[0]
+                await asyncio.wait([task])
+            else:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                task = next(t for t in pending if t in done)
+            pending.remove(task)
+            submit()
+            if task.exception() is None:
+                yield task.result()
+            elif return_exceptions:
+                yield task.exception()
+            else:
+                raise task.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
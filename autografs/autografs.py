@@ -12,11 +12,10 @@ __status__ = "production"
 import os
 import sys
 import ase
+import ase.data
 import numpy
-import scipy
 import logging
 import itertools
-import scipy.optimize
 
 from collections import defaultdict
 
@@ -24,6 +23,9 @@ from autografs.utils.sbu import read_sbu_database
 from autografs.utils.sbu import SBU
 from autografs.utils.topology import read_topologies_database
 from autografs.utils.topology import Topology
+from autografs.utils import operations
+from autografs.utils import tracing
+from autografs.utils import budget
 from autografs.framework import Framework
 
 logger = logging.getLogger(__name__)
@@ -89,6 +91,117 @@ class Autografs(object):
         logger.info("")
         return None
 
+    def copy(self):
+        """Return a generator sharing the databases of this one.
+
+        The databases are never modified by the generation and
+        are shared. The current topology and SBU mapping are
+        copied, so that both generators can be used at the same
+        time, e.g. from different threads.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        new: autografs.autografs.Autografs
+            the new generator
+        """
+        new = self.__class__.__new__(self.__class__)
+        new.topologies = self.topologies
+        new.sbu = self.sbu
+        new.topology = None
+        if self.topology is not None:
+            new.topology = self.topology.copy()
+        new.sbu_dict = None
+        if self.sbu_dict is not None:
+            new.sbu_dict = dict(self.sbu_dict)
+        return new
+
+    def make_async(self,
+                   executor=None,
+                   **kwargs):
+        """Return a coroutine creating a framework in an executor.
+
+        The generation does not touch the state of this generator.
+        Cancelling the coroutine stops a generation running in a
+        thread at its next time budget check, see autografs.aio.
+
+        Parameters
+        ----------
+        executor: concurrent.futures.Executor, optional
+            where the generation runs. Defaults to the
+            default executor of the event loop. Process
+            pools have to be autografs.aio.ProcessExecutor.
+        kwargs: optional
+            the arguments of Autografs.make
+
+        Returns
+        -------
+        coroutine
+            to await for the autografs.framework.Framework
+        """
+        from autografs.aio import make_async
+        return make_async(self, executor=executor, **kwargs)
+
+    def iter_make(self,
+                  jobs,
+                  executor=None,
+                  max_pending=4,
+                  ordered=True,
+                  return_exceptions=False):
+        """Return an asynchronous iterator over generated frameworks.
+
+        Parameters
+        ----------
+        jobs: iterable of dict
+            the arguments of Autografs.make, for each framework
+        executor: concurrent.futures.Executor, optional
+            see Autografs.make_async
+        max_pending: int, optional
+            maximum number of generations submitted at once.
+            jobs are read lazily as results are consumed.
+        ordered: bool, optional
+            if True, frameworks come in the order of the jobs,
+            else as soon as they are ready
+        return_exceptions: bool, optional
+            if True, exceptions are yielded in place of
+            frameworks instead of being raised
+
+        Returns
+        -------
+        async iterator of autografs.framework.Framework
+            to use in an async for loop
+        """
+        from autografs.aio import iter_make
+        return iter_make(self,
+                         jobs=jobs,
+                         executor=executor,
+                         max_pending=max_pending,
+                         ordered=ordered,
+                         return_exceptions=return_exceptions)
+
+    def get_memory_usage(self):
+        """Return the bytes held by the generator, by component.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        usage: {str: int, ...}
+            bytes held by the topology and building unit
+            databases, the current topology and SBU mapping,
+            and their total
+        """
+        from autografs.utils.memory import get_breakdown
+        return get_breakdown([("topologies", self.topologies),
+                              ("sbu", self.sbu),
+                              ("topology", self.topology),
+                              ("sbu_dict", self.sbu_dict)])
+
     def set_topology(self,
                      topology_name,
                      supercell=(1, 1, 1)):
@@ -112,24 +225,9 @@ class Autografs(object):
         """
         logger.info(("Topology set to --> "
                      "{topo}").format(topo=topology_name.upper()))
-        # make the supercell prior to alignment
-        if isinstance(supercell, int):
-            # always ensur a 3-int long multiplicator
-            supercell = (supercell, supercell, supercell)
-        # get atoms from database
-        topology_atoms = self.topologies[topology_name]
-        # only do the work if mult is not 1
-        if supercell != (1, 1, 1):
-            logger.info(("{0}x{1}x{2} supercell of the topology"
-                         "is used.").format(*supercell))
-            # function of ASE Atoms objects
-            topology_atoms *= supercell
-        # make the Topology object
-        logger.info("Analysis of the topology.")
-        topology = Topology(name=topology_name,
-                            atoms=topology_atoms)
         # store it for use as attribute
-        self.topology = topology
+        self.topology = self.get_topology(topology_name=topology_name,
+                                          supercell=supercell)
         logger.info("")
         return None
 
@@ -138,7 +236,12 @@ class Autografs(object):
              sbu_names=None,
              sbu_dict=None,
              supercell=(1, 1, 1),
-             coercion=False):
+             coercion=False,
+             dry_run=False,
+             limits=None,
+             seed=None,
+             trace=False,
+             timeout=None):
         """Create a framework using given topology and sbu.
 
         Main funtion of Autografs. The sbu names and topology's
@@ -171,59 +274,267 @@ class Autografs(object):
             force the compatibility detection to only consider
             the multiplicity of SBU: any 4 connected SBU
             can fit any 4-connected slot.
+        dry_run: bool, optional
+            If True, nothing is built and the estimated
+            properties of the framework are returned instead.
+            See Autografs.estimate.
+        limits: {str: (float, float), ...}, optional
+            bounds on the estimated properties. Candidates
+            falling outside are rejected before any building
+            unit is placed. See Autografs.estimate.
+        seed: int, numpy.random.RandomState or Generator, optional
+            source of randomness for the probabilistic scheduling
+            of sbu_names. The same seed gives the same framework.
+        trace: bool, optional
+            If True, the time spent in each stage is recorded
+            in an autografs.utils.tracing.Trace, attached to
+            the framework as its trace attribute. It covers
+            the generation only: to add the writing of the
+            framework, reopen it with "with framework.trace:".
+        timeout: float, optional
+            time budget of the generation, in seconds. The
+            topology analysis, alignment and refinement stop
+            with autografs.utils.budget.TimeBudgetExceeded
+            once it is spent.
 
         Returns
         -------
         autografs.framework.Framework
             the scaled, aligned version of the framework
-            built using the defined options.
+            built using the defined options. None if rejected
+            by the limits, the estimate dictionary if dry_run.
         """
+        name = topology_name
+        if name is None and self.topology is not None:
+            name = self.topology.name
+        return self._run(self._make,
+                         name=name,
+                         trace=trace,
+                         timeout=timeout,
+                         dry_run=dry_run,
+                         topology_name=topology_name,
+                         sbu_names=sbu_names,
+                         sbu_dict=sbu_dict,
+                         supercell=supercell,
+                         coercion=coercion,
+                         limits=limits,
+                         seed=seed)
+
+    def generate(self,
+                 topology_name=None,
+                 topology=None,
+                 sbu_names=None,
+                 sbu_dict=None,
+                 supercell=(1, 1, 1),
+                 coercion=False,
+                 dry_run=False,
+                 limits=None,
+                 seed=None,
+                 trace=False,
+                 timeout=None):
+        """Create a framework without modifying the generator.
+
+        Same as Autografs.make, except that the topology and the
+        SBU schedule are never stored: the databases are only read,
+        and a topology object passed as argument is left untouched.
+        Several threads can call this method on the same generator.
+
+        Parameters
+        ----------
+        topology_name: str, optional
+            name of the topology to use. It is analysed
+            for this call only.
+        topology: autografs.utils.topology.Topology, optional
+            an already analysed topology, e.g. from
+            Autografs.get_topology. Ignored if topology_name
+            is given.
+        sbu_names: [str,...], optional
+            see Autografs.make
+        sbu_dict: {int:str,...}, optional
+            see Autografs.make. The dictionary is not modified.
+        supercell: int or (int, int, int), optional
+            multiplicator applied to the topology named
+            by topology_name.
+        coercion: bool, optional
+            see Autografs.make
+        dry_run: bool, optional
+            see Autografs.make
+        limits: {str: (float, float), ...}, optional
+            see Autografs.make
+        seed: int, numpy.random.RandomState or Generator, optional
+            see Autografs.make. Without a seed, the global
+            numpy random state is shared between threads.
+        trace: bool, optional
+            see Autografs.make
+        timeout: float, optional
+            see Autografs.make. Budgets are per thread.
+
+        Returns
+        -------
+        autografs.framework.Framework
+            the scaled, aligned version of the framework
+            built using the defined options. None if rejected
+            by the limits, the estimate dictionary if dry_run.
+        """
+        if topology_name is None and topology is None:
+            raise ValueError("Either supply topology_name or topology.")
+        name = topology_name
+        if name is None:
+            name = topology.name
+        return self._run(self._generate,
+                         name=name,
+                         trace=trace,
+                         timeout=timeout,
+                         dry_run=dry_run,
+                         topology_name=topology_name,
+                         topology=topology,
+                         sbu_names=sbu_names,
+                         sbu_dict=sbu_dict,
+                         supercell=supercell,
+                         coercion=coercion,
+                         limits=limits,
+                         seed=seed)
+
+    def _run(self,
+             body,
+             name=None,
+             trace=False,
+             timeout=None,
+             dry_run=False,
+             **kwargs):
+        """Run a generation body with its tracing and time budget"""
+        if trace:
+            with tracing.Trace() as report:
+                framework = self._run(body,
+                                      name=name,
+                                      timeout=timeout,
+                                      dry_run=dry_run,
+                                      **kwargs)
+            if isinstance(framework, Framework):
+                framework.trace = report
+            return framework
+        with tracing.span("make", topology=name) as span, \
+                budget.time_budget(timeout):
+            framework = body(dry_run=dry_run, **kwargs)
+            if dry_run:
+                span.set(result="estimate")
+            elif framework is None:
+                span.set(result="rejected")
+            else:
+                span.set(result="framework")
+        return framework
+
+    def _make(self,
+              topology_name=None,
+              sbu_names=None,
+              sbu_dict=None,
+              supercell=(1, 1, 1),
+              coercion=False,
+              dry_run=False,
+              limits=None,
+              seed=None):
+        """Body of make, see Autografs.make"""
         logger.info("{0:-^50}".format(" Starting Framework Generation "))
         logger.info("")
-        self.sbudict = None
         # only set the topology if not already done
         if topology_name is not None:
             self.set_topology(topology_name=topology_name,
                               supercell=supercell)
+        with tracing.span("schedule"):
+            self.sbu_dict = self._resolve_sbu_dict(sbu_names=sbu_names,
+                                                   sbu_dict=sbu_dict,
+                                                   coercion=coercion,
+                                                   seed=seed)
+        return self._build(topology=self.topology,
+                           sbu_dict=self.sbu_dict,
+                           dry_run=dry_run,
+                           limits=limits)
+
+    def _generate(self,
+                  topology_name=None,
+                  topology=None,
+                  sbu_names=None,
+                  sbu_dict=None,
+                  supercell=(1, 1, 1),
+                  coercion=False,
+                  dry_run=False,
+                  limits=None,
+                  seed=None):
+        """Body of generate, see Autografs.generate"""
+        logger.info("{0:-^50}".format(" Starting Framework Generation "))
+        logger.info("")
+        if topology_name is not None:
+            topology = self.get_topology(topology_name=topology_name,
+                                         supercell=supercell)
+        with tracing.span("schedule"):
+            sbu_dict = self._resolve_sbu_dict(sbu_names=sbu_names,
+                                              sbu_dict=sbu_dict,
+                                              coercion=coercion,
+                                              seed=seed,
+                                              topology=topology)
+        return self._build(topology=topology,
+                           sbu_dict=sbu_dict,
+                           dry_run=dry_run,
+                           limits=limits)
+
+    def _build(self,
+               topology,
+               sbu_dict,
+               dry_run=False,
+               limits=None):
+        """Estimate, align and refine a scheduled framework.
+
+        Neither the topology nor the SBU of the schedule
+        are modified: the framework works on copies.
+
+        Parameters
+        ----------
+        topology: autografs.utils.topology.Topology
+            the topology of the framework
+        sbu_dict: {int: autografs.utils.sbu.SBU, ...}
+            the building unit of each slot
+        dry_run: bool, optional
+            if True, only return the estimate
+        limits: {str: (float, float), ...}, optional
+            bounds on the estimated properties
+
+        Returns
+        -------
+        autografs.framework.Framework
+            the framework, None if rejected by the
+            limits, the estimate dictionary if dry_run.
+        """
+        if dry_run or limits is not None:
+            with tracing.span("estimate"):
+                estimate = self._estimate(topology=topology,
+                                          sbu_dict=sbu_dict,
+                                          limits=limits)
+            if dry_run:
+                return estimate
+            if estimate["rejected"]:
+                logger.info("Candidate rejected on {0}.".format(
+                    ", ".join(estimate["rejected"])))
+                return None
         # container for the aligned SBUs
         aligned = Framework()
-        aligned.set_topology(self.topology)
-        # identify the corresponding SBU
-        if sbu_dict is None and sbu_names is not None:
-            logger.info("Scheduling the SBU to slot alignment.")
-            self.sbu_dict = self.get_sbu_dict(sbu_names=sbu_names,
-                                              coercion=coercion)
-        elif sbu_dict is not None:
-            logger.info("SBU to slot alignment is user defined.")
-            # the sbu_dict has been passed. if not SBU object, create them
-            for k, v in sbu_dict.items():
-                if not isinstance(v, SBU):
-                    if not isinstance(v, ase.Atoms):
-                        name = str(v)
-                        v = self.sbu[name].copy()
-                    elif "name" in v.info.keys():
-                        name = v.info["name"]
-                    else:
-                        name = str(k)
-                    sbu_dict[k] = SBU(name=name,
-                                      atoms=v)
-            self.sbu_dict = sbu_dict
-        else:
-            raise ValueError("Either supply sbu_names or sbu_dict.")
+        aligned.set_topology(topology)
         # some logging for pretty information
         for idx, sbu in sbu_dict.items():
             logging.info("\tSlot {sl}".format(sl=idx))
             logging.info("\t   |--> SBU {sbn}".format(sbn=sbu.name))
         # carry on
         alpha = 0.0
-        # should be parrallelized one of these days
-        for idx, sbu in self.sbu_dict.items():
-            # now align and get the scaling factor
-            sbu, f = self.align(fragment=self.topology.fragments[idx],
-                                sbu=sbu)
+        # now align all slots at once and get the scaling factor
+        indices = list(sbu_dict.keys())
+        with tracing.span("align", slots=len(indices)):
+            sbus, alphas, rmsds = self.batch_align(
+                fragments=[topology.fragments[idx] for idx in indices],
+                sbus=[sbu_dict[idx] for idx in indices])
+        for idx, sbu, f, rmsd in zip(indices, sbus, alphas, rmsds):
             alpha += f
             aligned.append(index=idx,
                            sbu=sbu)
+            aligned.rmsd[idx] = rmsd
         logger.info("")
         # refine the cell of the aligned object
         aligned.refine(alpha0=alpha)
@@ -235,16 +546,238 @@ class Autografs(object):
         logger.info("")
         return aligned
 
+    def estimate(self,
+                 topology_name=None,
+                 sbu_names=None,
+                 sbu_dict=None,
+                 supercell=(1, 1, 1),
+                 coercion=False,
+                 limits=None,
+                 seed=None):
+        """Estimate the properties of a framework without building it.
+
+        The scaling factor of each slot is approximated without any
+        alignment, by pairing the dummies of the SBU and of the slot
+        in order of distance to their centers. The cell parameters
+        are then the starting point of the cell refinement, and the
+        void fraction ignores the overlap of the van der Waals spheres.
+        Arguments are the same as for Autografs.make.
+
+        Parameters
+        ----------
+        topology_name: str, optional
+            name of the topology to use.
+        sbu_names: [str,...], optional
+            list of names of the sbu to use.
+        sbu_dict: {int:str,...}, optional
+            slot index to sbu name mapping.
+        supercell: int or (int, int, int), optional
+            multiplicator for generation of a supercell.
+        coercion: bool, optional
+            force the compatibility detection to only consider
+            the multiplicity of SBU.
+        limits: {str: (float, float), ...}, optional
+            bounds on any of the estimated scalar properties,
+            None meaning unbounded: {"a": (10.0, 40.0),
+            "natoms": (None, 1000)}. Properties that are not
+            defined for the framework (density in 2D) are ignored.
+        seed: int, numpy.random.RandomState or Generator, optional
+            source of randomness for the probabilistic scheduling.
+
+        Returns
+        -------
+        estimate: dict
+            the cell parameters ("a", "b", "c", "alpha", "beta",
+            "gamma" and "cellpar"), "volume" in cubic Angstroms,
+            "natoms", "mass" in atomic mass units, "density" in g/cm3,
+            "void_fraction" and the list of "rejected" properties.
+        """
+        if topology_name is not None:
+            self.set_topology(topology_name=topology_name,
+                              supercell=supercell)
+        with tracing.span("schedule"):
+            sbu_dict = self._resolve_sbu_dict(sbu_names=sbu_names,
+                                              sbu_dict=sbu_dict,
+                                              coercion=coercion,
+                                              seed=seed)
+        return self._estimate(topology=self.topology,
+                              sbu_dict=sbu_dict,
+                              limits=limits)
+
+    def _estimate(self,
+                  topology,
+                  sbu_dict,
+                  limits=None):
+        """Body of estimate, for a scheduled framework"""
+        indices = list(sbu_dict.keys())
+        sbus = [sbu_dict[idx] for idx in indices]
+        alphas = self._estimate_scaling(
+            fragments=[topology.fragments[idx] for idx in indices],
+            sbus=sbus)
+        cellpar = topology.get_cellpar(alpha=alphas.sum(axis=0))
+        if len(cellpar) == 3:
+            # 2D case, same convention as Framework.scale
+            cellpar = numpy.array([cellpar[0], cellpar[1], 0.0,
+                                   90.0, 90.0, cellpar[2]])
+            volume = numpy.nan
+        else:
+            cell = ase.geometry.cellpar_to_cell(cellpar)
+            volume = abs(numpy.linalg.det(cell))
+        numbers = numpy.hstack([sbu.get_atomic_numbers() for sbu in sbus])
+        # the dummies disappear when connecting
+        numbers = numbers[numbers > 0]
+        mass = ase.data.atomic_masses[numbers].sum()
+        radii = ase.data.vdw_radii[numbers]
+        radii[numpy.isnan(radii)] = 2.0
+        occupied = (4.0 / 3.0 * numpy.pi * radii**3).sum()
+        estimate = dict(zip(["a", "b", "c", "alpha", "beta", "gamma"],
+                            cellpar.tolist()))
+        estimate["cellpar"] = cellpar
+        estimate["volume"] = volume
+        estimate["natoms"] = len(numbers)
+        estimate["mass"] = mass
+        # amu / A^3 to g / cm^3
+        estimate["density"] = mass / volume * 1.66053907
+        estimate["void_fraction"] = numpy.clip(1.0 - occupied / volume,
+                                               0.0, 1.0)
+        rejected = []
+        for key, (low, high) in (limits or {}).items():
+            value = estimate[key]
+            if numpy.isnan(value):
+                continue
+            if ((low is not None and value < low) or
+                    (high is not None and value > high)):
+                rejected.append(key)
+        estimate["rejected"] = rejected
+        logger.info(("Estimated {natoms} atoms, a = {a:.1f}, b = {b:.1f}, "
+                     "c = {c:.1f} Angstroms.").format(**estimate))
+        return estimate
+
+    def _estimate_scaling(self,
+                          fragments,
+                          sbus):
+        """Return approximate scaling vectors, without alignment.
+
+        Same scaling as in batch_align, where the dummies of the SBU
+        and of the slot are paired by distance to their centers
+        instead of after the rotation.
+
+        Parameters
+        ----------
+        fragments:  [ase.Atoms, ...]
+            the slots in the topology
+        sbus: [autografs.utils.sbu.SBU, ...]
+            the building units, left untouched
+
+        Returns
+        -------
+        Nx3 numpy.array(dtype=float)
+            the approximate scaling vector of each slot
+        """
+        alphas = numpy.zeros((len(sbus), 3))
+        groups = defaultdict(list)
+        for i, (fragment, sbu) in enumerate(zip(fragments, sbus)):
+            nx = (sbu.get_atomic_numbers() == 0).sum()
+            groups[(nx, len(fragment))].append(i)
+        for (nx, nf), group in groups.items():
+            if nx != nf:
+                continue
+            frag_pos = numpy.array([fragments[i].get_positions()
+                                    for i in group])
+            frag_pos -= frag_pos.mean(axis=1)[:, None, :]
+            sbu_pos = []
+            for i in group:
+                positions = sbus[i].get_positions()
+                xis = sbus[i].get_atomic_numbers() == 0
+                sbu_pos.append(positions[xis] - positions.mean(axis=0))
+            size_sbu = numpy.sort(numpy.linalg.norm(sbu_pos, axis=2), axis=1)
+            size_fragment = numpy.linalg.norm(frag_pos, axis=2)
+            order = numpy.argsort(size_fragment, axis=1)
+            rows = numpy.arange(len(group))[:, None]
+            ratio = size_sbu / size_fragment[rows, order]
+            alpha = numpy.abs(frag_pos[rows, order] * ratio[:, :, None])
+            alphas[group] = alpha.sum(axis=1)
+        return alphas
+
+    def _resolve_sbu_dict(self,
+                          sbu_names=None,
+                          sbu_dict=None,
+                          coercion=False,
+                          seed=None,
+                          topology=None):
+        """Return the slot to SBU mapping used for generation.
+
+        Parameters
+        ----------
+        sbu_names: [str,...], optional
+            list of names of the sbu to use.
+        sbu_dict: {int:str,...}, optional
+            slot index to sbu name, ASE Atoms or SBU
+            mapping. takes precedence over sbu_names.
+        coercion: bool, optional
+            force the compatibility detection to only consider
+            the multiplicity of SBU.
+        seed: int, numpy.random.RandomState or Generator, optional
+            source of randomness for the probabilistic scheduling.
+        topology: autografs.utils.topology.Topology, optional
+            the topology to schedule. Defaults to the stored one.
+
+        Returns
+        -------
+        dict
+            {slot index: autografs.utils.sbu.SBU, ...}
+        """
+        # identify the corresponding SBU
+        if sbu_dict is None and sbu_names is not None:
+            logger.info("Scheduling the SBU to slot alignment.")
+            sbu_dict = self.get_sbu_dict(sbu_names=sbu_names,
+                                         coercion=coercion,
+                                         seed=seed,
+                                         topology=topology)
+        elif sbu_dict is not None:
+            logger.info("SBU to slot alignment is user defined.")
+            # the sbu_dict has been passed. if not SBU object, create them
+            # each distinct building unit is analyzed once and
+            # shared as a template between the slots using it
+            templates = {}
+            # the mapping of the caller is left untouched
+            sbu_dict = dict(sbu_dict)
+            for k, v in sbu_dict.items():
+                if isinstance(v, SBU):
+                    # the alignment moves the units in place
+                    sbu_dict[k] = v.copy()
+                    continue
+                if not isinstance(v, ase.Atoms):
+                    key = name = str(v)
+                    v = self.sbu[name]
+                else:
+                    key = id(v)
+                    name = v.info.get("name", str(k))
+                if key not in templates:
+                    templates[key] = SBU(name=name,
+                                         atoms=v.copy())
+                sbu_dict[k] = templates[key].copy()
+        else:
+            raise ValueError("Either supply sbu_names or sbu_dict.")
+        return sbu_dict
+
     def get_topology(self,
-                     topology_name):
+                     topology_name,
+                     supercell=(1, 1, 1)):
         """Generates and return a Topology object
 
+        The database entry is left untouched, and the
+        topology is not stored: see Autografs.set_topology.
+
         Parameters
         ----------
         topology_name: str
             The name of the topology to generate
             The name is the key used to search
             the database.
+        supercell: int, or (int, int, int), optional
+            multiplicator for generation of a supercell
+            of the topology.
 
         Returns
         -------
@@ -253,18 +786,37 @@ class Autografs(object):
             ASE Atoms stored in the database under
             the topology_name key.
         """
-        topology_atoms = self.topologies[topology_name]
-        topology = Topology(name=topology_name,
-                            atoms=topology_atoms)
+        # make the supercell prior to alignment
+        if isinstance(supercell, int):
+            # always ensur a 3-int long multiplicator
+            supercell = (supercell, supercell, supercell)
+        # get atoms from database, leaving the entry untouched
+        topology_atoms = self.topologies[topology_name].copy()
+        # make the Topology object
+        logger.info("Analysis of the topology.")
+        with tracing.span("topology", topology=topology_name):
+            topology = Topology(name=topology_name,
+                                atoms=topology_atoms)
+        # only do the work if mult is not 1
+        if tuple(supercell) != (1, 1, 1):
+            logger.info(("{0}x{1}x{2} supercell of the topology"
+                         "is used.").format(*supercell))
+            # derived from the primitive analysis
+            with tracing.span("supercell", m=str(supercell)):
+                topology = topology.get_supercell(m=supercell)
         return topology
 
     def get_sbu_dict(self,
                      sbu_names,
-                     coercion=False):
+                     coercion=False,
+                     seed=None,
+                     topology=None):
         """Return a dictionary of SBU by corresponding fragment.
 
         This stage get a one to one correspondance between
         each topology slot and an available SBU from the list of names.
+        All slots of the same shape are drawn at once, and the same
+        seed always gives the same dictionary.
 
         Parameters
         ----------
@@ -276,6 +828,11 @@ class Autografs(object):
             SBU scheduling.
         coercion: bool, optional
             If True, force compatibility by coordination alone
+        seed: int, numpy.random.RandomState or Generator, optional
+            source of randomness for the probabilistic scheduling.
+            defaults to the global numpy random state.
+        topology: autografs.utils.topology.Topology, optional
+            the topology to schedule. Defaults to the stored one.
 
         Returns
         -------
@@ -284,7 +841,10 @@ class Autografs(object):
             the dictionary is the map that will generate
             the final Framework object
         """
-        assert self.topology is not None
+        if topology is None:
+            topology = self.topology
+        assert topology is not None
+        rng = operations.get_random_state(seed)
         weights = defaultdict(list)
         by_shape = defaultdict(list)
         for name in sbu_names:
@@ -297,102 +857,255 @@ class Autografs(object):
                 p = 1.0
             # create the SBU object
             sbu = SBU(name=name,
-                      atoms=self.sbu[name])
-            slots = self.topology.has_compatible_slots(sbu=sbu,
-                                                       coercion=coercion)
+                      atoms=self.sbu[name].copy())
+            slots = topology.has_compatible_slots(sbu=sbu,
+                                                  coercion=coercion)
             if not slots:
                 continue
             for slot in slots:
                 weights[slot].append(p)
                 by_shape[slot].append(sbu)
-        # now fill the choices
-        sbu_dict = {}
-        for index, shape in self.topology.shapes.items():
-            # here, should accept weights also
-            shape = tuple(shape)
+        # group the slots by shape, in a reproducible order
+        slots_by_shape = defaultdict(list)
+        for index in sorted(topology.shapes.keys()):
+            shape = tuple(topology.shapes[index])
             if shape not in by_shape.keys():
                 logger.info("Unfilled slot at index {idx}".format(idx=index))
-            p = weights[shape]
+            slots_by_shape[shape].append(index)
+        # now fill the choices, one draw per shape
+        chosen = {}
+        for shape, indices in slots_by_shape.items():
+            p = numpy.array(weights[shape])
             # no weights means same proba
             p /= numpy.sum(p)
-            sbu_chosen = numpy.random.choice(by_shape[shape],
-                                             p=p).copy()
-            sbu_dict[index] = sbu_chosen
+            choices = rng.choice(len(by_shape[shape]),
+                                 size=len(indices),
+                                 p=p)
+            for index, choice in zip(indices, choices):
+                # copies share the analysed template
+                chosen[index] = by_shape[shape][choice].copy()
+        sbu_dict = {index: chosen[index]
+                    for index in topology.shapes.keys()}
         return sbu_dict
 
     def align(self,
               fragment,
-              sbu):
+              sbu,
+              rmsd_threshold=0.1):
         """Return an aligned SBU.
 
         The SBU is rotated on top of the fragment
-        using the procrustes library within scipy.
+        by solving the orthogonal procrustes problem.
         a scaling factor is also calculated for all three
-        cell vectors.
+        cell vectors. See batch_align.
 
         Parameters
         ----------
         fragment:  ase.Atoms
             the slot in the topology on which
             alignment is templated
-        sbu: ase.Atoms
+        sbu: autografs.utils.sbu.SBU
             object to align on top of the fragment
+        rmsd_threshold: float
+            residual above which the other orientations
+            of the SBU are searched, in Angstroms
 
         Returns
         -------
-        ase.Atoms
+        autografs.utils.sbu.SBU
             the sbu from input, but scaled and aligned
         1x3 numpy.array(dtype=float)
             the cumulative scaling vector resulting from
             the size difference between the slot and the
             sbu.
+        float
+            the root mean square distance between the
+            dummies of the sbu and of the scaled fragment
         """
-        # first, we work with copies
-        fragment = fragment.copy()
-        # normalize and center
-        fragment_cop = fragment.positions.mean(axis=0)
-        fragment.positions -= fragment_cop
-        sbu.atoms.positions -= sbu.atoms.positions.mean(axis=0)
-        # identify dummies in sbu
-        sbu_Xis = [x.index for x in sbu.atoms if x.symbol == "X"]
-        # get the scaling factor
-        sbu_pos = sbu.atoms.get_positions()
-        frag_pos = fragment.get_positions()
-        size_sbu = numpy.linalg.norm(sbu_pos[sbu_Xis], axis=1)
-        size_fragment = numpy.linalg.norm(frag_pos, axis=1)
-        alpha_iso = size_sbu.mean()/size_fragment.mean()
-        # initial scaling: isotropic.
-        fragment.positions = frag_pos.dot(numpy.eye(3)*alpha_iso)
-        # getting the rotation matrix
-        X0 = sbu_pos[sbu_Xis]
-        X1 = fragment.get_positions()
-        # trick to get a well defined rotation even
-        # when the object is highly symmetric or planar
-        if X0.shape[0] > 5:
-            X0 = self.get_vector_space(X0)
-            X1 = self.get_vector_space(X1)
-        # use the scipy implementation
-        R, _ = scipy.linalg.orthogonal_procrustes(X0, X1)
-        sbu.atoms.positions = sbu.atoms.positions.dot(R)
-        # now that the alignment is made, it is pssible
-        # to refine a bit the scaling procedure
-        alpha = numpy.zeros(3)
-        for sbu_xi in sbu_Xis:
+        sbus, alphas, rmsds = self.batch_align(fragments=[fragment],
+                                               sbus=[sbu],
+                                               rmsd_threshold=rmsd_threshold)
+        return sbus[0], alphas[0], rmsds[0]
+
+    def batch_align(self,
+                    fragments,
+                    sbus,
+                    rmsd_threshold=0.1):
+        """Return SBUs aligned on their fragments.
+
+        The slots are grouped by number of dummies, and the centered
+        coordinates of each group are stacked in arrays of shape
+        (slots x dummies x 3) so that all rotations of a group are
+        solved by one batched procrustes. The correspondance between
+        dummies and the anisotropic scaling vectors are vectorized
+        in the same way.
+
+        Parameters
+        ----------
+        fragments:  [ase.Atoms, ...]
+            the slots in the topology on which
+            alignment is templated
+        sbus: [autografs.utils.sbu.SBU, ...]
+            objects to align on top of the fragments
+        rmsd_threshold: float
+            residual above which the other orientations
+            of the SBU are searched, in Angstroms
+
+        Returns
+        -------
+        [autografs.utils.sbu.SBU, ...]
+            the sbus from input, but scaled and aligned
+        Nx3 numpy.array(dtype=float)
+            the cumulative scaling vectors resulting from
+            the size difference between each slot and its
+            sbu.
+        numpy.array(dtype=float)
+            the root mean square distance between the
+            dummies of each sbu and of its scaled fragment
+        """
+        alphas = numpy.zeros((len(sbus), 3))
+        rmsds = numpy.zeros(len(sbus))
+        # group the slots by shape of the alignment problem
+        groups = defaultdict(list)
+        sbu_Xis = []
+        for i, (fragment, sbu) in enumerate(zip(fragments, sbus)):
+            xis = numpy.where(sbu.get_atomic_numbers() == 0)[0]
+            sbu_Xis.append(xis)
+            groups[(len(xis), len(fragment))].append(i)
+        for (nx, _), group in groups.items():
+            # normalize and center, working with copies of fragments
+            frag_pos = numpy.array([fragments[i].get_positions()
+                                    for i in group])
+            fragment_cop = frag_pos.mean(axis=1)
+            frag_pos -= fragment_cop[:, None, :]
+            sbu_pos = []
+            for i in group:
+                sbu = sbus[i]
+                sbu.transform(translation=-sbu.get_positions().mean(axis=0))
+                sbu_pos.append(sbu.get_positions()[sbu_Xis[i]])
+            sbu_pos = numpy.array(sbu_pos)
+            # initial scaling: isotropic.
+            size_sbu = numpy.linalg.norm(sbu_pos, axis=2)
+            size_fragment = numpy.linalg.norm(frag_pos, axis=2)
+            alpha_iso = size_sbu.mean(axis=1) / size_fragment.mean(axis=1)
+            scaled_pos = frag_pos * alpha_iso[:, None, None]
+            # getting the rotation matrices
+            X0 = sbu_pos
+            X1 = scaled_pos
+            # trick to get a well defined rotation even
+            # when the object is highly symmetric or planar
+            if nx > 5:
+                X0 = self.get_vector_space(X0)
+                X1 = self.get_vector_space(X1)
+            # R minimizes |X0.R - X1|
+            R, _ = operations.batch_procrustes(X1, X0, method="SVD")
+            # residual distances between corresponding dummies
+            aligned_pos = numpy.matmul(sbu_pos, R)
+            xixi = scaled_pos[:, None, :, :] - aligned_pos[:, :, None, :]
+            xixi = numpy.linalg.norm(xixi, axis=3)
+            rmsd = numpy.sqrt((xixi.min(axis=2)**2).mean(axis=1))
+            # the procrustes solution depends on the order of the
+            # dummies: search the other orderings when it is poor
+            for j in numpy.where(rmsd > rmsd_threshold)[0]:
+                budget.check("align")
+                i = group[j]
+                with tracing.span("orientation_sweep", slot=i):
+                    Rj, rmsdj = self._orientation_sweep(sbu=sbus[i],
+                                                        X0=sbu_pos[j],
+                                                        X1=scaled_pos[j])
+                if rmsdj < rmsd[j]:
+                    logger.debug(("Slot {0}: RMSD {1:.3f} -> {2:.3f} after"
+                                  " orientation search.").format(i,
+                                                                 rmsd[j],
+                                                                 rmsdj))
+                    R[j] = Rj
+                    rmsd[j] = rmsdj
+            rmsds[group] = rmsd
+            # now that the alignment is made, it is possible
+            # to refine a bit the scaling procedure:
             # find corresponding dummmies by distance
-            xixi = fragment.get_positions()-sbu.atoms.get_positions()[sbu_xi]
-            xixidist = numpy.linalg.norm(xixi, axis=1)
-            frag_xi = numpy.argmin(xixidist)
-            # calculate the scaling factor for this dummy pair
-            size_frag = numpy.linalg.norm(frag_pos[frag_xi])
-            size_sbu = numpy.linalg.norm(sbu_pos[sbu_xi])
-            # add it, well normalized.
-            alpha += numpy.abs(frag_pos[frag_xi]*size_sbu/size_frag)
-        # un-center the objects
-        sbu.atoms.positions += fragment_cop
-        fragment.positions += fragment_cop
-        # tag the atoms for connection purposes
-        sbu.transfer_tags(fragment)
-        return sbu, alpha
+            aligned_pos = numpy.matmul(sbu_pos, R)
+            xixi = scaled_pos[:, None, :, :] - aligned_pos[:, :, None, :]
+            frag_xi = numpy.linalg.norm(xixi, axis=3).argmin(axis=2)
+            rows = numpy.arange(len(group))[:, None]
+            # calculate the scaling factor for each dummy pair
+            ratio = size_sbu / size_fragment[rows, frag_xi]
+            alpha = numpy.abs(frag_pos[rows, frag_xi] * ratio[:, :, None])
+            alphas[group] = alpha.sum(axis=1)
+            for j, i in enumerate(group):
+                # un-center the objects
+                sbus[i].transform(rotation=R[j],
+                                  translation=fragment_cop[j])
+                fragment = fragments[i].copy()
+                fragment.positions = scaled_pos[j] + fragment_cop[j]
+                # tag the atoms for connection purposes
+                sbus[i].transfer_tags(fragment)
+        poor = (rmsds > rmsd_threshold)
+        if poor.any():
+            logger.warning(("{0} slots poorly aligned, maximum"
+                            " RMSD = {1:.3f}").format(poor.sum(),
+                                                      rmsds.max()))
+        return sbus, alphas, rmsds
+
+    def _orientation_sweep(self,
+                           sbu,
+                           X0,
+                           X1,
+                           max_dummies=8,
+                           chunk_size=5040):
+        """Return the best rotation over all orderings of the dummies.
+
+        Orderings of the SBU dummies that only differ by one of its
+        symmetry operations lead to the same alignment: one ordering
+        is kept per class, and their rotations are solved in batched
+        procrustes of at most chunk_size orderings, which bounds the
+        memory used with many dummies.
+
+        Parameters
+        ----------
+        sbu: autografs.utils.sbu.SBU
+            the building unit being aligned
+        X0: numpy.array
+            the centered dummies of the SBU
+        X1: numpy.array
+            the centered, scaled dummies of the fragment
+        max_dummies: int
+            above this number of dummies, the search
+            is too expensive and is skipped
+        chunk_size: int
+            number of orderings solved at once
+
+        Returns
+        -------
+        R: numpy.array
+            the best rotation found
+        rmsd: float
+            the corresponding residual
+        """
+        k = len(X0)
+        if k > max_dummies or k != len(X1):
+            logger.debug(("Orientation search of {0} skipped: {1} dummies"
+                          " for {2}.").format(sbu.name, k, len(X1)))
+            return numpy.eye(3), numpy.inf
+        # shared by the slots using the same SBU template
+        orders = sbu.get_dummy_orderings()
+        best_R, best_rmsd = numpy.eye(3), numpy.inf
+        for start in range(0, len(orders), chunk_size):
+            chunk = orders[start:start + chunk_size]
+            R, _ = operations.batch_procrustes(
+                numpy.broadcast_to(X1, (len(chunk), k, 3)),
+                X0[chunk],
+                method="SVD")
+            aligned = numpy.matmul(X0, R)
+            d = numpy.linalg.norm(aligned[:, :, None, :] -
+                                  X1[None, None, :, :],
+                                  axis=3)
+            rmsd = numpy.sqrt((d.min(axis=2)**2).mean(axis=1))
+            best = numpy.argmin(rmsd)
+            # the first best ordering is kept across the chunks
+            if rmsd[best] < best_rmsd:
+                best_R, best_rmsd = R[best], rmsd[best]
+        return best_R, best_rmsd
 
     def get_vector_space(self,
                          X):
@@ -402,28 +1115,33 @@ class Autografs(object):
         ----------
         X:  numpy.array(dtype-float)
             the positions of points from which to generate
-            an orthogonal vector space
+            an orthogonal vector space. A stack of point
+            sets of shape Nxnx3 is treated in one pass.
 
         Returns
         -------
         4x3 numpy.array(dtype=float)
-            generated orthogonal vector space
+            generated orthogonal vector space, or
+            Nx4x3 for a stack of point sets
         """
+        X = numpy.asarray(X, dtype=float)
+        if X.ndim == 2:
+            return self.get_vector_space(X[None])[0]
+        rows = numpy.arange(len(X))
         # initialize
-        x0 = X[0]
+        x0 = X[:, 0]
         # find the point most orthogonal
-        dots1 = [x.dot(x0)for x in X]
-        i1 = numpy.argmin(dots1)
-        x1 = X[i1]
+        dots1 = numpy.einsum("nkj,nj->nk", X, x0)
+        x1 = X[rows, numpy.argmin(dots1, axis=1)]
         # the second point maximizes the same with x1
-        dots2 = [x.dot(x1) for x in X[1:]]
-        i2 = numpy.argmin(dots2)+1
-        x2 = X[i2]
+        dots2 = numpy.einsum("nkj,nj->nk", X[:, 1:], x1)
+        x2 = X[rows, numpy.argmin(dots2, axis=1) + 1]
         # we find a third point
-        dots3 = [x.dot(x1)+x.dot(x0)+x.dot(x2) for x in X]
-        i3 = numpy.argmin(dots3)
-        x3 = X[i3]
-        vs = numpy.asarray([x0, x1, x2, x3])
+        dots3 = (numpy.einsum("nkj,nj->nk", X, x1) +
+                 numpy.einsum("nkj,nj->nk", X, x0) +
+                 numpy.einsum("nkj,nj->nk", X, x2))
+        x3 = X[rows, numpy.argmin(dots3, axis=1)]
+        vs = numpy.stack([x0, x1, x2, x3], axis=1)
         return vs
 
     def list_available_frameworks(self,
@@ -470,6 +1188,201 @@ class Autografs(object):
             dicts.append(tmp_d)
         return dicts
 
+    def iter_unique_frameworks(self,
+                               sbu_names,
+                               topology_name=None,
+                               supercell=(1, 1, 1),
+                               coercion=False):
+        """Yield the symmetry inequivalent slot to SBU assignments.
+
+        Every slot can receive any compatible SBU from sbu_names.
+        Two assignments related by a symmetry operation of the
+        topology give the same framework: only the lexicographically
+        smallest assignment of each orbit is yielded. Assignments are
+        built slot by slot, and a partial assignment is abandoned as
+        soon as a symmetry operation maps it onto a smaller one.
+
+        Parameters
+        ----------
+        sbu_names: [str,...]
+            the names of the SBU to distribute on the slots
+        topology_name: str, optional
+            name of the topology to use. If not given,
+            Autografs will use its stored topology attribute.
+        supercell: int or (int, int, int), optional
+            multiplicator for generation of a supercell
+            of the topology.
+        coercion: bool, optional
+            If True, force compatibility by coordination alone
+
+        Yields
+        ------
+        sbu_dict: {int: str, ...}
+            slot index to SBU name mapping, that can be
+            passed to Autografs.make
+        multiplicity: int
+            the number of equivalent assignments it stands for
+        """
+        slots, choices, permutations = self._get_slot_choices(
+            sbu_names=sbu_names,
+            topology_name=topology_name,
+            supercell=supercell,
+            coercion=coercion)
+        if any(len(c) == 0 for c in choices):
+            logger.info("Some slots have no compatible SBU.")
+            return
+        names = sorted(set(n for c in choices for n in c))
+        codes = [[names.index(n) for n in c] for c in choices]
+        # the operation p sends slot i to p[i]: the image b of an
+        # assignment a is b[p[i]] = a[i], or b[j] = a[inverse[j]]
+        inverse = numpy.argsort(permutations, axis=1)
+        rows = numpy.arange(len(inverse))
+        n_slots = len(slots)
+        assignment = numpy.zeros(n_slots, dtype=int)
+        counts = [0, 0]
+
+        def is_canonical(k):
+            """True if no operation gives a smaller prefix of length k"""
+            prefix = assignment[:k]
+            pk = inverse[:, :k]
+            known = (pk < k)
+            image = prefix[numpy.minimum(pk, k - 1)]
+            diff = numpy.where(known, image - prefix, 0)
+            stop = (~known) | (diff != 0)
+            first = stop.argmax(axis=1)
+            smaller = (stop.any(axis=1) &
+                       known[rows, first] &
+                       (diff[rows, first] < 0))
+            return not smaller.any()
+
+        def extend(k):
+            """Depth first completion of the assignment"""
+            if k == n_slots:
+                images = assignment[inverse]
+                stabilizer = (images == assignment).all(axis=1).sum()
+                multiplicity = len(inverse) // int(stabilizer)
+                counts[0] += 1
+                counts[1] += multiplicity
+                sbu_dict = {slot: names[code]
+                            for slot, code in zip(slots, assignment)}
+                yield sbu_dict, multiplicity
+                return
+            for code in codes[k]:
+                assignment[k] = code
+                if is_canonical(k + 1):
+                    yield from extend(k + 1)
+            return
+
+        yield from extend(0)
+        logger.info(("{0} unique frameworks out of {1} "
+                     "assignments.").format(*counts))
+
+    def count_unique_frameworks(self,
+                                sbu_names,
+                                topology_name=None,
+                                supercell=(1, 1, 1),
+                                coercion=False):
+        """Return the number of symmetry inequivalent assignments.
+
+        Uses Burnside's lemma: the number of orbits is the mean
+        number of assignments left unchanged by each symmetry
+        operation, which only requires the cycles of the slot
+        permutations. Nothing is enumerated.
+
+        Parameters
+        ----------
+        sbu_names: [str,...]
+            the names of the SBU to distribute on the slots
+        topology_name: str, optional
+            name of the topology to use.
+        supercell: int or (int, int, int), optional
+            multiplicator for generation of a supercell
+            of the topology.
+        coercion: bool, optional
+            If True, force compatibility by coordination alone
+
+        Returns
+        -------
+        unique: int
+            the number of symmetry inequivalent frameworks
+        total: int
+            the number of assignments without symmetry
+        """
+        slots, choices, permutations = self._get_slot_choices(
+            sbu_names=sbu_names,
+            topology_name=topology_name,
+            supercell=supercell,
+            coercion=coercion)
+        sizes = [len(c) for c in choices]
+        total = 1
+        for size in sizes:
+            total *= size
+        fixed = 0
+        for permutation in permutations:
+            seen = numpy.zeros(len(slots), dtype=bool)
+            # a fixed assignment is constant along each cycle
+            n_fixed = 1
+            for i in range(len(slots)):
+                if seen[i]:
+                    continue
+                n_fixed *= sizes[i]
+                j = i
+                while not seen[j]:
+                    seen[j] = True
+                    j = permutation[j]
+            fixed += n_fixed
+        unique = fixed // len(permutations)
+        return unique, total
+
+    def _get_slot_choices(self,
+                          sbu_names,
+                          topology_name=None,
+                          supercell=(1, 1, 1),
+                          coercion=False):
+        """Return the compatible SBU names and the symmetry of each slot.
+
+        Parameters
+        ----------
+        sbu_names: [str,...]
+            the names of the SBU to distribute on the slots.
+            weights, if any, are ignored.
+        topology_name: str, optional
+            name of the topology to use.
+        supercell: int or (int, int, int), optional
+            multiplicator for generation of a supercell
+        coercion: bool, optional
+            If True, force compatibility by coordination alone
+
+        Returns
+        -------
+        slots: [int, ...]
+            the sorted slot indices
+        choices: [[str, ...], ...]
+            the compatible SBU names of each slot
+        permutations: numpy.array
+            the permutations of the slots by the symmetry
+            operations. See Topology.get_slot_permutations
+        """
+        if topology_name is not None:
+            self.set_topology(topology_name=topology_name,
+                              supercell=supercell)
+        assert self.topology is not None
+        by_shape = defaultdict(list)
+        for name in sbu_names:
+            if isinstance(name, tuple):
+                name = name[0]
+            name = str(name)
+            sbu = SBU(name=name,
+                      atoms=self.sbu[name].copy())
+            for shape in self.topology.has_compatible_slots(
+                    sbu=sbu, coercion=coercion):
+                if name not in by_shape[shape]:
+                    by_shape[shape].append(name)
+        slots, permutations = self.topology.get_slot_permutations()
+        choices = [sorted(by_shape[tuple(self.topology.shapes[slot])])
+                   for slot in slots]
+        return slots, choices, permutations
+
     def list_available_topologies(self,
                                   sbu_names=[],
                                   full=True,
@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright : see accompanying license files for details
+
+"""
+Command line interface of AuToGraFS.
+
+    $ autografs run manifest.json --workers 8 --shard 0/4
+    $ autografs serve --workers 4 --preload pcu dia
+
+A manifest is a JSON file describing the jobs to run, either as the
+product of topologies, SBU sets and supercells sharing the same
+options, or as an explicit list of jobs:
+
+    {"topologies": ["pcu", "dia"],
+     "sbu_sets": [["Zn_mof5_octahedral", "Benzene_linear"]],
+     "supercells": [1, [2, 2, 1]],
+     "options": {"coercion": false, "seed": 0},
+     "jobs": [{"topology_name": "srs",
+               "sbu_names": ["Benzene_triangle", "Acetylene_linear"]}]}
+
+"topologies" can also be "auto", for all topologies compatible with
+each SBU set. Every job has an identifier derived from its content:
+it names the output, decides the shard of the job and is recorded in
+the checkpoint file once done, so that an interrupted run resumes
+where it stopped.
+"""
+
+__author__ = "Damien Coupry"
+__credits__ = ["Prof. Matthew Addicoat"]
+__license__ = "MIT"
+__maintainer__ = "Damien Coupry"
+__version__ = '2.3.2'
+__status__ = "production"
+
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import itertools
+import collections
+import multiprocessing
+import concurrent.futures
+
+import logging
+logger = logging.getLogger(__name__)
+
+def _start_pool(generator,
+                workers,
+                slow,
+                metrics=None):
+    """Fork the worker processes, inheriting the generator"""
+    from autografs import server
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=server._init_worker,
+        initargs=(generator, 128, slow, metrics))
+
+
+# arguments of Autografs.make a job can set
+JOB_KEYS = ("topology_name", "sbu_names", "sbu_dict", "supercell",
+            "coercion", "limits", "seed")
+
+
+def get_job_id(job):
+    """Return the identifier of a job, stable across runs and nodes.
+
+    Parameters
+    ----------
+    job: dict
+        the arguments of the generation
+
+    Returns
+    -------
+    job_id: str
+        the topology name and a hash of the arguments
+    """
+    content = {k: job.get(k) for k in JOB_KEYS}
+    text = json.dumps(content, sort_keys=True)
+    digest = hashlib.sha1(text.encode("utf8")).hexdigest()[:12]
+    return "{0}_{1}".format(job["topology_name"], digest)
+
+
+def read_manifest(path,
+                  generator=None):
+    """Return the list of jobs described by a manifest file.
+
+    Parameters
+    ----------
+    path: str or Path
+        the JSON manifest
+    generator: autografs.Autografs, optional
+        used to list the compatible topologies
+        when "topologies" is "auto". Created if needed.
+
+    Returns
+    -------
+    jobs: [dict, ...]
+        the jobs, with their "id", in a deterministic order
+    """
+    with open(str(path), "r") as fileobj:
+        manifest = json.load(fileobj)
+    options = manifest.get("options", {})
+    unknown = set(options) - set(JOB_KEYS)
+    if unknown:
+        raise ValueError("Unknown options: {0}".format(sorted(unknown)))
+    jobs = []
+    sbu_sets = manifest.get("sbu_sets", [])
+    supercells = manifest.get("supercells", [1])
+    topologies = manifest.get("topologies", [])
+    if topologies == "auto" and generator is None:
+        from autografs.autografs import Autografs
+        generator = Autografs()
+    for sbu_names in sbu_sets:
+        if topologies == "auto":
+            names = [n[0] if isinstance(n, list) else n for n in sbu_names]
+            available = generator.list_available_topologies(
+                sbu_names=names,
+                coercion=options.get("coercion", False))
+        else:
+            available = topologies
+        for topology_name, supercell in itertools.product(available,
+                                                          supercells):
+            job = dict(options)
+            job.update(topology_name=topology_name,
+                       sbu_names=sbu_names,
+                       supercell=supercell)
+            jobs.append(job)
+    for job in manifest.get("jobs", []):
+        job = dict(options, **job)
+        unknown = set(job) - set(JOB_KEYS)
+        if unknown:
+            raise ValueError("Unknown job keys: {0}".format(sorted(unknown)))
+        jobs.append(job)
+    for job in jobs:
+        job["id"] = get_job_id(job)
+    # group the jobs by topology for the caches of the workers
+    jobs.sort(key=lambda j: (j["topology_name"], j["id"]))
+    return jobs
+
+
+def get_shard(jobs,
+              index,
+              count):
+    """Return the jobs of one shard out of count.
+
+    Jobs are assigned by their identifier, so that
+    the shards do not depend on the order of the manifest.
+
+    Parameters
+    ----------
+    jobs: [dict, ...]
+        the jobs with their "id"
+    index: int
+        the shard to return, from 0 to count - 1
+    count: int
+        the number of shards
+
+    Returns
+    -------
+    jobs: [dict, ...]
+        the jobs of the shard
+    """
+    if not 0 <= index < count:
+        raise ValueError("Shard {0}/{1} does not exist.".format(index, count))
+    return [job for job in jobs
+            if int(job["id"].rsplit("_", 1)[1], 16) % count == index]
+
+
+def read_checkpoint(path,
+                    retry_failed=False,
+                    retry_timeouts=False):
+    """Return the identifiers of the jobs recorded in a checkpoint file.
+
+    Parameters
+    ----------
+    path: str or Path
+        the checkpoint file, one JSON record per line
+    retry_failed: bool, optional
+        if True, failed jobs are not considered done
+    retry_timeouts: bool, optional
+        if True, jobs that ran out of time are not
+        considered done, e.g. to run them with a
+        larger budget
+
+    Returns
+    -------
+    done: set
+        the identifiers of the finished jobs
+    """
+    done = set()
+    if not os.path.isfile(str(path)):
+        return done
+    with open(str(path), "r") as fileobj:
+        for line in fileobj:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # last line of a killed run
+                continue
+            retry = ((retry_failed and record["status"] == "error") or
+                     (retry_timeouts and record["status"] == "timeout"))
+            if retry:
+                done.discard(record["id"])
+            else:
+                done.add(record["id"])
+    return done
+
+
+def run(jobs,
+        output=".",
+        fmt="cif",
+        workers=None,
+        checkpoint=None,
+        batch_size=100,
+        timeout=None,
+        hard_timeout=None,
+        generator=None,
+        metrics=None,
+        metrics_format="json",
+        **options):
+    """Run generation jobs in a pool of worker processes.
+
+    Jobs running out of time are recorded with the "timeout" status
+    and the stage they were in, and the run carries on. Once the
+    analysis of a topology ran out of time, the workers skip its
+    remaining jobs. If a worker process dies, the jobs it was
+    running with the others are recorded as errors, and new
+    workers are forked.
+
+    Parameters
+    ----------
+    jobs: [dict, ...]
+        the jobs with their "id", see read_manifest
+    output: str or Path, optional
+        directory of the per-job files, or path of
+        the archive when fmt is "db"
+    fmt: str, optional
+        extension of the per-job files, "agf" for the
+        format of Framework.save, or "db" to append all
+        frameworks to a single FrameworkArchive
+    workers: int, optional
+        number of worker processes. Defaults to
+        the number of CPUs.
+    checkpoint: str or Path, optional
+        file in which each finished job is recorded
+    batch_size: int, optional
+        number of frameworks committed to the archive,
+        and recorded as done, at once
+    timeout: float, optional
+        cooperative time budget of each job, in seconds
+    hard_timeout: float, optional
+        delay after which a worker interrupts its job,
+        in seconds. Defaults to twice the timeout. Jobs
+        still running server.GRACE seconds later, e.g. in
+        a long numpy call, are stopped by killing the
+        workers, and recorded as timed out.
+    generator: autografs.Autografs, optional
+        the generator inherited by the forked workers.
+        Created from the options if not given.
+    metrics: str or Path, optional
+        file to which the merged metrics of the
+        workers are written at the end of the run
+    metrics_format: str, optional
+        "json" or "prometheus"
+    options: optional
+        passed to the Autografs constructor
+
+    Returns
+    -------
+    counts: {str: int, ...}
+        the number of jobs by status: "ok",
+        "rejected" and "error"
+    """
+    from autografs import server
+    from autografs.utils.archive import FrameworkArchive
+    counts = {"ok": 0, "rejected": 0, "timeout": 0, "error": 0}
+    if hard_timeout is None and timeout is not None:
+        hard_timeout = 2.0 * timeout
+    if not jobs:
+        return counts
+    archive = None
+    if fmt == "db":
+        archive = FrameworkArchive(output, batch_size=len(jobs) + 1)
+        jobs = [job for job in jobs if job["id"] not in archive]
+    else:
+        os.makedirs(output, exist_ok=True)
+    tasks = []
+    for job in jobs:
+        task = {k: job[k] for k in JOB_KEYS if k in job}
+        task.update(timeout=timeout, hard_timeout=hard_timeout)
+        if archive is None:
+            task["path"] = os.path.join(output, job["id"])
+            task["fmt"] = fmt
+        tasks.append(task)
+    records = open(checkpoint, "a") if checkpoint is not None else None
+    pending = []
+    slow = set()
+
+    def commit():
+        if archive is not None:
+            archive.flush()
+        if records is not None:
+            for record in pending:
+                records.write(json.dumps(record) + "\n")
+            records.flush()
+        del pending[:]
+
+    if generator is None:
+        from autografs.autografs import Autografs
+        generator = Autografs(**options)
+    # read the databases once, the forked workers inherit them
+    workers = workers or multiprocessing.cpu_count()
+    manager = multiprocessing.get_context("fork").Manager()
+    shared = manager.dict()
+    # each worker dumps its metrics there, merged at the end
+    directory = None
+    if metrics is not None:
+        directory = tempfile.mkdtemp(prefix="autografs-metrics-")
+    pool = _start_pool(generator, workers, shared, directory)
+    queue = collections.deque(zip(jobs, tasks))
+    # the running jobs, with their task and start time
+    running = {}
+    finished = 0
+
+    def record_response(job, response):
+        record = {"id": job["id"], "time": response["time"]}
+        if response.get("error") == "TimeBudgetExceeded":
+            record["status"] = "timeout"
+            record["topology"] = job["topology_name"]
+            record["stage"] = response["stage"]
+            slow.add(job["topology_name"])
+            logger.warning("{0} skipped: {1}".format(job["id"],
+                                                     response["message"]))
+        elif response["status"] != "ok":
+            record["status"] = "error"
+            record["error"] = "{0}: {1}".format(response["error"],
+                                                response["message"])
+            logger.warning("{0} failed with {1}".format(job["id"],
+                                                        record["error"]))
+        elif response.get("rejected", False):
+            record["status"] = "rejected"
+        else:
+            record["status"] = "ok"
+            if archive is not None:
+                atoms, bonds, mmtypes = server._decode_framework(
+                    response["framework"])
+                archive.write(atoms=atoms,
+                              bonds=bonds,
+                              mmtypes=mmtypes,
+                              name=job["id"],
+                              topology=job["topology_name"],
+                              sbu=atoms.info["sbu"])
+                record["path"] = archive.path
+            else:
+                record["path"] = response["path"]
+        counts[record["status"]] += 1
+        pending.append(record)
+        if len(pending) >= batch_size:
+            commit()
+        logger.info("[{0}/{1}] {2} {3} ({4:.2f}s)".format(
+            finished, len(jobs), job["id"], record["status"], record["time"]))
+        return None
+
+    start = time.perf_counter()
+    try:
+        while queue or running:
+            # one job per worker, so that each starts when submitted
+            while queue and len(running) < workers:
+                job, task = queue.popleft()
+                future = pool.submit(server._run_job, task)
+                running[future] = (job, task, time.perf_counter())
+            wait = None
+            if hard_timeout is not None:
+                deadline = hard_timeout + server.GRACE
+                first = min(started for _, _, started in running.values())
+                wait = max(first + deadline - time.perf_counter(), 0.0)
+            done, _ = concurrent.futures.wait(
+                running,
+                timeout=wait,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                # stuck jobs: the others are run again by new workers
+                logger.warning("Stopping jobs past their hard timeout.")
+                server._kill_pool(pool)
+                now = time.perf_counter()
+                for job, task, started in running.values():
+                    if now - started < deadline:
+                        queue.appendleft((job, task))
+                        continue
+                    finished += 1
+                    record_response(job, {
+                        "status": "error",
+                        "error": "TimeBudgetExceeded",
+                        "message": "Killed after {0:.1f}s.".format(
+                            now - started),
+                        "stage": "hard timeout",
+                        "budget": hard_timeout,
+                        "time": now - started})
+                running.clear()
+                pool = _start_pool(generator, workers, shared, directory)
+                continue
+            broken = False
+            while done:
+                for future in done:
+                    job, _, started = running.pop(future)
+                    finished += 1
+                    try:
+                        response = future.result()
+                    except concurrent.futures.process.BrokenProcessPool as e:
+                        broken = True
+                        response = {"status": "error",
+                                    "error": type(e).__name__,
+                                    "message": "A worker process died.",
+                                    "time": time.perf_counter() - started}
+                    record_response(job, response)
+                done = set()
+                if broken and running:
+                    # the other jobs of the pool fail with it
+                    done, _ = concurrent.futures.wait(running)
+            if broken:
+                logger.warning("A worker process died, restarting them.")
+                server._kill_pool(pool)
+                pool = _start_pool(generator, workers, shared, directory)
+        pool.shutdown(wait=True)
+    except BaseException:
+        server._kill_pool(pool)
+        raise
+    finally:
+        # what was finished is kept, even when interrupted
+        commit()
+        manager.shutdown()
+        if records is not None:
+            records.close()
+        if directory is not None:
+            server._merge_metrics(directory, metrics, metrics_format)
+            shutil.rmtree(directory)
+    logger.info("{0} jobs in {1:.1f}s: {ok} built, {rejected} rejected, "
+                "{timeout} timed out, {error} failed".format(
+                    len(jobs), time.perf_counter() - start, **counts))
+    if slow:
+        logger.warning("Topologies out of time: {0}".format(
+            ", ".join(sorted(slow))))
+    return counts
+
+
+def _parse_shard(text):
+    """Return the index and count of a shard written as i/k"""
+    try:
+        index, count = (int(x) for x in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("Shards are written as i/k.")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError("Shard {0} does not exist.".format(
+            text))
+    return index, count
+
+
+def _run_command(args):
+    """Entry point of the run subcommand"""
+    from autografs.autografs import Autografs
+    generator = Autografs(topology_path=args.topology_path,
+                          sbu_path=args.sbu_path)
+    jobs = read_manifest(args.manifest, generator=generator)
+    total = len(jobs)
+    index, count = args.shard
+    jobs = get_shard(jobs, index, count)
+    if args.checkpoint is not None:
+        done = read_checkpoint(args.checkpoint,
+                               retry_failed=args.retry_failed,
+                               retry_timeouts=args.retry_timeouts)
+        jobs = [job for job in jobs if job["id"] not in done]
+    logger.info("{0} jobs to run in shard {1}/{2}, out of {3}.".format(
+        len(jobs), index, count, total))
+    counts = run(jobs,
+                 output=args.output,
+                 fmt=args.format,
+                 workers=args.workers,
+                 checkpoint=args.checkpoint,
+                 batch_size=args.batch_size,
+                 timeout=args.timeout,
+                 hard_timeout=args.hard_timeout,
+                 generator=generator,
+                 metrics=args.metrics,
+                 metrics_format=args.metrics_format)
+    return 1 if counts["error"] else 0
+
+
+def main(argv=None):
+    """Entry point of the autografs command"""
+    parser = argparse.ArgumentParser(prog="autografs",
+                                     description=("Automatic Topological "
+                                                  "Generator for Framework "
+                                                  "Structures."))
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="log every step of the generation")
+    subparsers = parser.add_subparsers(dest="command")
+    runner = subparsers.add_parser("run", help="run the jobs of a manifest")
+    runner.add_argument("manifest", help="JSON file describing the jobs")
+    runner.add_argument("-o", "--output", default=".",
+                        help=("directory of the written frameworks, or "
+                              "archive file with --format db"))
+    runner.add_argument("-f", "--format", default="cif",
+                        help="file extension, 'agf' or 'db' (default: cif)")
+    runner.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of worker processes")
+    runner.add_argument("--shard", type=_parse_shard, default=(0, 1),
+                        help="only run the shard i out of k, as i/k")
+    runner.add_argument("--checkpoint", default=None,
+                        help="file recording the finished jobs, to resume")
+    runner.add_argument("--retry-failed", action="store_true",
+                        help="run again the jobs that failed")
+    runner.add_argument("--retry-timeouts", action="store_true",
+                        help="run again the jobs that ran out of time")
+    runner.add_argument("--batch-size", type=int, default=100,
+                        help="jobs committed to disk at once")
+    runner.add_argument("--timeout", type=float, default=None,
+                        help="time budget of each job, in seconds")
+    runner.add_argument("--hard-timeout", type=float, default=None,
+                        help=("interrupt jobs after this many seconds "
+                              "(default: twice the timeout)"))
+    runner.add_argument("--metrics", default=None,
+                        help="file receiving the metrics of the workers")
+    runner.add_argument("--metrics-format", default="json",
+                        choices=("json", "prometheus"))
+    runner.add_argument("--topology-path", default=None)
+    runner.add_argument("--sbu-path", default=None)
+    subparsers.add_parser("serve", add_help=False,
+                          help="run a generation server")
+    args, remaining = parser.parse_known_args(argv)
+    if args.command == "serve":
+        from autografs.server import main as serve
+        return serve(remaining)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    args = parser.parse_args(argv)
+    logging.basicConfig(format='%(asctime)s | %(message)s',
+                        level=logging.INFO if args.verbose else logging.WARNING,
+                        datefmt='%I:%M:%S')
+    logger.setLevel(logging.INFO)
+    return _run_command(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
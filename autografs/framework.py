@@ -12,9 +12,10 @@ __status__ = "production"
 import os
 import sys
 import numpy
-import scipy
+import scipy.linalg
 import typing
 import ase
+import ase.data
 import copy
 import itertools
 import logging
@@ -24,6 +25,9 @@ from autografs.utils.sbu import read_sbu_database
 from autografs.utils.topology import read_topologies_database
 from autografs.utils.mmanalysis import analyze_mm
 from autografs.utils.topology import Topology
+from autografs.utils import operations
+from autografs.utils import tracing
+from autografs.utils import budget
 import autografs.utils.sbu
 
 
@@ -87,14 +91,19 @@ class Framework(object):
         # each SBU at connection time. Necessary for example
         # during iterative functionalization.
         self._todel = defaultdict(list)
+        # alignment residual of each slot
+        self.rmsd = {}
+        # timings of the generation, if traced
+        self.trace = None
         return None
 
     def __contains__(self,
                      obj):
         """Iterable intrinsic"""
         r = False
-        if hasattr(obj, 'atoms'):
-            r = any([obj.atoms == sbu.atoms for sbu in self.SBU.values()])
+        if hasattr(obj, 'get_atoms'):
+            atoms = obj.get_atoms()
+            r = any([atoms == sbu.get_atoms() for sbu in self.SBU.values()])
         return r
 
     def __delitem__(self,
@@ -135,13 +144,18 @@ class Framework(object):
         Returns
         -------
         autografs.framework.Framework
-            deep copy of the current framework object
+            copy of the current framework object. the
+            building units share their data with the
+            original until they are modified.
         """
+        building_units = {idx: sbu.copy() for idx, sbu in self}
         new = self.__class__(topology=self.get_topology(),
-                             building_units=copy.deepcopy(self.SBU),
-                             mmtypes=self.process_mmtypes(),
-                             bonds=self.process_bonds())
+                             building_units=building_units,
+                             mmtypes=self.mmtypes,
+                             bonds=self.bonds)
         new._todel = copy.deepcopy(self._todel)
+        new.rmsd = dict(self.rmsd)
+        new.trace = self.trace
         return new
 
     def set_topology(self,
@@ -161,6 +175,38 @@ class Framework(object):
         self.topology = topology.copy()
         return None
 
+    def get_memory_usage(self):
+        """Return the bytes held by the framework, by component.
+
+        Data shared between building units, like the template
+        atoms of copies of the same SBU, is only counted once.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        usage: {str: int, ...}
+            bytes held by the topology, the building unit
+            templates, their bonds, types and placements, the
+            rest of the building units, the framework bonds and
+            types, the bookkeeping, and their total
+        """
+        from autografs.utils.memory import get_breakdown
+        sbus = [sbu for _, sbu in self]
+        return get_breakdown([
+            ("topology", self.topology),
+            ("sbu_templates", [sbu._atoms for sbu in sbus]),
+            ("sbu_bonds", [sbu.bonds for sbu in sbus]),
+            ("sbu_mmtypes", [sbu.mmtypes for sbu in sbus]),
+            ("sbu_placements", [(sbu._rotation, sbu._translation, sbu._tags)
+                                for sbu in sbus]),
+            ("sbu_other", self.SBU),
+            ("bonds", self.bonds),
+            ("mmtypes", self.mmtypes),
+            ("bookkeeping", (self._todel, self.rmsd, self.trace))])
+
     def get_topology(self):
         """Return a copy of the framework's topology
 
@@ -197,64 +243,35 @@ class Framework(object):
         if isinstance(m, int):
             m = (m, m, m)
         logger.info("Creating supercell {0}x{1}x{2}.".format(*m))
-        # get the offset direction ranges
-        x = list(range(0, m[0], 1))
-        y = list(range(0, m[1], 1))
-        z = list(range(0, m[2], 1))
+        # the topology supercell is derived from the current one
+        # and shares its atom ordering: image k of index i is k*L+i
+        otopo = self.topology
+        ocell = otopo.atoms.get_cell()
+        L = len(otopo.atoms)
+        supertopo = otopo.get_supercell(m=m)
         # new framework object
         supercell = self.copy()
-        ocell = supercell.topology.atoms.get_cell()
-        ocellpar = ase.geometry.cell_to_cellpar(ocell)
-        newcellpar = ocellpar.copy()
-        newcellpar[0] *= m[0]
-        newcellpar[1] *= m[1]
-        newcellpar[2] *= m[2]
-        newcell = ase.geometry.cellpar_to_cell(newcellpar)
-        otopo = supercell.topology.copy()
-        supercell.topology.atoms.set_cell(newcell,
-                                          scale_atoms=False)
-        L = len(otopo.atoms)
-        # for the correct tagging analysis
-        superatoms = otopo.atoms.copy().repeat(rep=m)
-        # ERROR PRONE! the scaling modifies the shape
-        # in the topology, resulting in weird behaviour in
-        # very deformed cells.
-        supertopo = Topology(name="supertopo",
-                             atoms=superatoms,
-                             analyze=True)
+        supercell.topology = supertopo
+        offsets = itertools.product(*[range(i) for i in m])
         # iterate over offsets and add the corresponding objects
-        for offset in itertools.product(x, y, z):
-            # central cell, ignore
-            if offset == (0, 0, 0):
-                for atom in otopo.atoms.copy():
-                    if atom.symbol == "X":
-                        continue
-                    if atom.index not in supercell.SBU.keys():
-                        continue
-                    # directly tranfer new tags
-                    sbu = supercell[atom.index]
-                    sbu.transfer_tags(supertopo.fragments[atom.index])
-            else:
-                offset = numpy.asarray(offset)
-                coffset = offset.dot(ocell)
-                for atom in otopo.atoms.copy():
-                    atom.position += coffset
-                    supercell.topology.atoms.append(atom)
-                    if atom.symbol == "X":
-                        continue
-                    # check the new idx of the SBU
-                    newidx = len(supercell.topology.atoms)-1
-                    # check that the SBU was not deleted before
-                    if atom.index not in supercell.SBU.keys():
-                        continue
-                    sbu = supercell[atom.index].copy()
-                    sbu.atoms.positions += coffset
-                    sbu.transfer_tags(supertopo.fragments[newidx])
-                    supercell.append(index=newidx,
-                                     sbu=sbu,
-                                     update=False)
-                    s_todel = list(supercell._todel[atom.index])
-                    supercell._todel[newidx] = s_todel
+        for k, offset in enumerate(offsets):
+            coffset = numpy.asarray(offset).dot(ocell)
+            for index in sorted(self.SBU.keys()):
+                newidx = k * L + index
+                # central cell: directly transfer new tags
+                if k == 0:
+                    supercell[index].transfer_tags(supertopo.fragments[index])
+                    continue
+                sbu = supercell[index].copy()
+                sbu.transform(translation=coffset)
+                sbu.transfer_tags(supertopo.fragments[newidx])
+                supercell.append(index=newidx,
+                                 sbu=sbu,
+                                 update=False)
+                s_todel = list(supercell._todel[index])
+                supercell._todel[newidx] = s_todel
+                if index in self.rmsd:
+                    supercell.rmsd[newidx] = self.rmsd[index]
         return supercell
 
     def append(self,
@@ -362,8 +379,8 @@ class Framework(object):
         # then center the SBUs on this position
         for i, sbu in self:
             center = self.topology.atoms[i]
-            cop = sbu.atoms.positions.mean(axis=0)
-            sbu.atoms.positions += center.position - cop
+            cop = sbu.get_positions().mean(axis=0)
+            sbu.transform(translation=center.position - cop)
         return None
 
     def refine(self,
@@ -385,15 +402,8 @@ class Framework(object):
         """
         logger.info("Refining unit cell.")
         # get the scaled cell, normalized
-        cell0 = self.topology.atoms.get_cell()
-        norm0 = cell0/numpy.linalg.norm(cell0, axis=0)
         pbc = sum(self.topology.atoms.get_pbc())
-        sn0 = numpy.linalg.norm(norm0, axis=0)
-        sc0 = numpy.linalg.norm(cell0, axis=0)
-        cellpar0 = ase.geometry.cell_to_cellpar(norm0, radians=False)
-        cellpar0[:3] *= alpha0*sn0/sc0
-        if pbc == 2:
-            cellpar0 = cellpar0[[0, 1, 5]]
+        cellpar0 = self.topology.get_cellpar(alpha=alpha0)
         # compile a list of mutual pairs
         atoms, _, _ = self.get_atoms(dummies=True)
         tags = atoms.get_tags()
@@ -405,6 +415,7 @@ class Framework(object):
         # define the cost function
         def MSE(x):
             """Return cost of scaling as MSE of distances"""
+            budget.check("refine")
             # scale with this parameter
             self.scale(cellpar=x)
             atoms, _, _ = self.get_atoms(dummies=True)
@@ -414,19 +425,24 @@ class Framework(object):
             d = [atoms.get_distance(i0, i1, mic=True) for i0, i1 in pairs]
             d = numpy.asarray(d)
             mse = numpy.mean(d**2)
-            logger.info("\t|--> Scaling error = {e:>5.3f}".format(e=mse))
+            logger.debug("\t|--> Scaling error = {e:>5.3f}".format(e=mse))
             return mse
 
+        import scipy.optimize
         # first get an idea of the bounds.
         bounds = list(zip(0.5*cellpar0, 2.0*cellpar0))
         eps = 0.05*cellpar0.min()
-        result = scipy.optimize.minimize(fun=MSE,
-                                         x0=cellpar0,
-                                         method="L-BFGS-B",
-                                         bounds=bounds,
-                                         tol=0.5,
-                                         options={"eps": eps,
-                                                  "maxiter": 20})
+        with tracing.span("refine") as span:
+            result = scipy.optimize.minimize(fun=MSE,
+                                             x0=cellpar0,
+                                             method="L-BFGS-B",
+                                             bounds=bounds,
+                                             tol=0.5,
+                                             options={"eps": eps,
+                                                      "maxiter": 20})
+            span.set(evaluations=int(result.nfev))
+        logger.info(("Cell refined in {0} evaluations, scaling"
+                     " error = {1:>5.3f}").format(result.nfev, result.fun))
         self.scale(cellpar=result.x)
         logger.info("Best cell parameters found:")
         logger.info("\ta = {a:<5.1f} Angstroms".format(a=result.x[0]))
@@ -537,11 +553,68 @@ class Framework(object):
         -------
         None
         """
-        self[index].atoms.positions = self[index].atoms.positions.dot(M)
+        self[index].transform(rotation=M)
         fragment = self.topology.fragments[index]
         self[index].transfer_tags(fragment=fragment)
         return None
 
+    def get_functionalizable_sites(self,
+                                   symbol=None,
+                                   sbu_names=None):
+        """Return the functionalizable sites as a structured array.
+
+        A site is an atom bonded to exactly one other atom by a
+        single bond. The sites of each SBU are indexed once per
+        template and shared by all the slots using it. Atoms
+        already replaced by a functional group are left out.
+
+        Parameters
+        ----------
+        symbol: str or [str, ...], optional
+            the types of atom to consider.
+            defaults to all elements
+        sbu_names: [str, ...], optional
+            the names of the SBU to consider.
+            defaults to all SBU
+
+        Returns
+        -------
+        sites: numpy.array
+            structured array with fields "slot", "index"
+            and "symbol", sorted by slot then atom index
+        """
+        dtype = [("slot", numpy.int64),
+                 ("index", numpy.int64),
+                 ("symbol", "U2")]
+        numbers = None
+        if symbol is not None:
+            if isinstance(symbol, str):
+                symbol = [symbol]
+            numbers = [ase.data.atomic_numbers[s] for s in symbol]
+        slots = []
+        indices = []
+        elements = []
+        for idx, sbu in self:
+            if sbu_names and sbu.name not in sbu_names:
+                continue
+            sites = sbu.get_terminal_sites()
+            sbu_numbers = sbu.get_atomic_numbers()[sites]
+            keep = numpy.ones(len(sites), dtype=bool)
+            if numbers is not None:
+                keep &= numpy.isin(sbu_numbers, numbers)
+            if self._todel.get(idx):
+                keep &= ~numpy.isin(sites, self._todel[idx])
+            slots.append(numpy.full(keep.sum(), idx, dtype=numpy.int64))
+            indices.append(sites[keep])
+            elements.append(sbu_numbers[keep])
+        sites = numpy.zeros(sum(len(i) for i in indices), dtype=dtype)
+        if len(sites) > 0:
+            symbols = numpy.array(ase.data.chemical_symbols)
+            sites["slot"] = numpy.hstack(slots)
+            sites["index"] = numpy.hstack(indices)
+            sites["symbol"] = symbols[numpy.hstack(elements)]
+        return sites
+
     def list_functionalizable_sites(self,
                                     symbol=None,
                                     sbu_names=[]):
@@ -569,34 +642,12 @@ class Framework(object):
                          " SBU types for functionalization:"))
             for sbu_name in sbu_names:
                 logger.info("\t|--> {nm}".format(nm=sbu_name))
-        if symbol is not None:
-            logger.info(("Listing available "
-                         "functionalizable {sy}").format(sy=symbol))
-        else:
-            logger.info("Listing all available functionalization sites")
-        sites = []
-        for idx, sbu in self:
-            if sbu_names and sbu.name not in sbu_names:
-                continue
-            bonds = sbu.bonds
-            for atom in sbu.atoms:
-                if symbol is not None and atom.symbol != symbol:
-                    continue
-                if atom.symbol == "X":
-                    continue
-                bidx = numpy.where(bonds[atom.index, :] > 0.0)[0]
-                if len(bidx) != 1:
-                    continue
-                elif bonds[atom.index, bidx[0]] != 1.0:
-                    continue
-                else:
-                    logger.info(("\t|--> Available site: {0:<2}{1:<3}"
-                                 " in {2} {3}").format(atom.symbol,
-                                                       atom.index,
-                                                       sbu.name,
-                                                       idx))
-                    sites.append((idx, atom.index))
-        return sites
+        sites = self.get_functionalizable_sites(symbol=symbol,
+                                                sbu_names=sbu_names)
+        logger.info("{n} functionalizable {sy} sites available.".format(
+            n=len(sites), sy=symbol if symbol is not None else "atom"))
+        return [(int(s), int(i)) for s, i in zip(sites["slot"],
+                                                 sites["index"])]
 
     def functionalize(self,
                       where,
@@ -622,54 +673,121 @@ class Framework(object):
         -------
         None
         """
-        sidx, aidx = where
-        # create the SBU object for the functional group
-        fg_name = "func:{0}".format(fg.get_chemical_formula(mode="hill"))
         logger.info(("Functionalization of"
                      " atom {1} in slot {0}.").format(*where))
-        logger.info("\t|--> replace by {f}.".format(f=fg_name))
-        fg = autografs.utils.sbu.SBU(name=fg_name,
-                                     atoms=fg)
-        # center the positions
-        fg_cop = fg.atoms.positions.mean(axis=0)
-        fg.atoms.positions -= fg_cop
-        # check that only one dummy exists
-        xidx = [x.index for x in fg.atoms if x.symbol == "X"]
-        assert len(xidx) == 1
-        xidx = xidx[0]
-        # center the sbu
-        sbu = self.SBU[sidx].atoms
-        sbu_name = self.SBU[sidx].name
-        sbu_cop = sbu.positions.mean(axis=0)
-        sbu.positions -= sbu_cop
-        # find the bonds
-        bonds = self.SBU[sidx].bonds
-        bidx = numpy.where(bonds[aidx] > 0.0)[0]
-        # check that only one bond exists
-        assert len(bidx) == 1
-        # now get vectors to align
-        fgbidx = numpy.where(fg.bonds[xidx] > 0.0)[0]
-        assert len(fgbidx) == 1
-        # func-x
-        v0 = fg.atoms.positions[fgbidx]-fg.atoms.positions[xidx]
-        # where[1]-bonded atom
-        v1 = sbu.positions[aidx]-sbu.positions[bidx]
-        R, _ = scipy.linalg.orthogonal_procrustes(v0, v1)
-        fg.atoms.positions = fg.atoms.positions.dot(R)
-        fg.atoms.positions -= fg.atoms.positions[xidx]
-        fg.atoms.positions += sbu.positions[bidx]
-        # create the new object
-        # keep note of what to delete.
-        self._todel[sidx] += [aidx, xidx+len(sbu)]
-        sbu += fg.atoms
-        sbu.positions += sbu_cop
-        self.SBU[sidx].set_atoms(sbu, analyze=False)
-        self.SBU[sidx].bonds = scipy.linalg.block_diag(bonds,
-                                                       fg.bonds)
-        self.SBU[sidx].mmtypes = numpy.hstack([self.SBU[sidx].mmtypes,
-                                              fg.mmtypes])
+        self.functionalize_many(sites=[where],
+                                groups=fg)
+        return None
+
+    def functionalize_many(self,
+                           sites,
+                           groups):
+        """Modify many valid slot atoms to become functional groups.
+
+        Same as functionalize, for many sites at once. Each distinct
+        functional group is analyzed once, all the rotations are
+        solved in one batched procrustes, and every modified SBU
+        grows its atoms, bonds and types in a single step.
+
+        Parameters
+        ----------
+        sites: [(int,int), ...]
+            sites where the functionalize funtion is applied.
+            each site is of the type (SBU index, atom index in SBU)
+        groups: ase.Atoms or [ase.Atoms, ...]
+            the functional group replacing the atom of every site,
+            or one functional group per site
+
+        Returns
+        -------
+        None
+        """
+        if getattr(sites, "dtype", None) is not None and sites.dtype.names:
+            # structured array from get_functionalizable_sites
+            sites = zip(sites["slot"], sites["index"])
+        sites = [(int(sidx), int(aidx)) for sidx, aidx in sites]
+        if not sites:
+            logger.info("No site to functionalize.")
+            return None
+        if isinstance(groups, ase.Atoms):
+            groups = [groups] * len(sites)
+        assert len(groups) == len(sites)
+        assert len(set(sites)) == len(sites)
+        # analyze each distinct functional group once
+        templates = {}
+        which = []
+        for fg in groups:
+            key = id(fg)
+            if key not in templates:
+                fg_name = "func:{0}".format(
+                    fg.get_chemical_formula(mode="hill"))
+                fg = autografs.utils.sbu.SBU(name=fg_name,
+                                             atoms=fg)
+                # check that only one dummy exists
+                xidx = numpy.where(fg.get_atomic_numbers() == 0)[0]
+                assert len(xidx) == 1
+                xidx = xidx[0]
+                fgbidx = numpy.where(fg.bonds[xidx] > 0.0)[0]
+                assert len(fgbidx) == 1
+                positions = fg.get_positions()
+                templates[key] = (fg, xidx, positions - positions[xidx])
+            which.append(key)
+        by_slot = defaultdict(list)
+        for (sidx, aidx), key in zip(sites, which):
+            by_slot[sidx].append((aidx, key))
+        logger.info(("Functionalization of {0} sites"
+                     " in {1} slots.").format(len(sites), len(by_slot)))
+        # the atoms bonded to each site, and the vectors to align
+        v0 = []
+        v1 = []
+        anchors = []
+        for sidx, items in by_slot.items():
+            sbu = self.SBU[sidx]
+            positions = sbu.get_positions()
+            for aidx, key in items:
+                bidx = numpy.where(sbu.bonds[aidx] > 0.0)[0]
+                # check that only one bond exists
+                assert len(bidx) == 1
+                fg, xidx, fg_positions = templates[key]
+                fgbidx = numpy.where(fg.bonds[xidx] > 0.0)[0]
+                # func-x
+                v0.append(fg_positions[fgbidx])
+                # where[1]-bonded atom
+                v1.append(positions[aidx] - positions[bidx])
+                anchors.append(positions[bidx[0]])
+        R, _ = operations.batch_procrustes(numpy.array(v1),
+                                           numpy.array(v0),
+                                           method="SVD")
+        k = 0
+        for sidx, items in by_slot.items():
+            sbu = self.SBU[sidx]
+            atoms = sbu.atoms
+            n = len(atoms)
+            numbers = []
+            positions = []
+            tags = []
+            bonds = [sbu.bonds]
+            mmtypes = [sbu.mmtypes]
+            for aidx, key in items:
+                fg, xidx, fg_positions = templates[key]
+                # keep note of what to delete.
+                self._todel[sidx] += [aidx, xidx + n]
+                n += len(fg_positions)
+                numbers.append(fg.get_atomic_numbers())
+                positions.append(fg_positions.dot(R[k]) + anchors[k])
+                tags.append(fg.get_tags())
+                bonds.append(fg.bonds)
+                mmtypes.append(fg.mmtypes)
+                k += 1
+            atoms += ase.Atoms(numbers=numpy.hstack(numbers),
+                               positions=numpy.vstack(positions),
+                               tags=numpy.hstack(tags))
+            sbu.set_atoms(atoms, analyze=False)
+            sbu.bonds = scipy.linalg.block_diag(*bonds)
+            sbu.mmtypes = numpy.hstack(mmtypes)
         return None
 
+    @tracing.traced("assembly")
     def get_atoms(self,
                   dummies=False):
         """Return the concatenated Atoms objects.
@@ -694,19 +812,26 @@ class Framework(object):
             the UFF atom types of the connected framework
         """
         # concatenate every sbu into one Atoms object
-        framework = self.copy()
-        cell = framework.topology.atoms.get_cell()
-        pbc = framework.topology.atoms.get_pbc()
+        cell = self.topology.atoms.get_cell()
+        pbc = self.topology.atoms.get_pbc()
         structure = ase.Atoms(cell=cell, pbc=pbc)
-        for idx, sbu in framework:
-            atoms = sbu.atoms.copy()
-            todel = framework._todel[idx]
+        bonds = []
+        mmtypes = []
+        for idx, sbu in self:
+            atoms = sbu.get_atoms()
+            todel = self._todel[idx]
             if len(todel) > 0:
+                # edited units are typed again. the others
+                # only moved rigidly since their analysis
                 del atoms[todel]
-            framework[idx].set_atoms(atoms, analyze=True)
+                sbu_bonds, sbu_mmtypes = analyze_mm(atoms)
+            else:
+                sbu_bonds, sbu_mmtypes = sbu.bonds, sbu.mmtypes
             structure += atoms
-        bonds = framework.process_bonds()
-        mmtypes = framework.process_mmtypes()
+            bonds.append(sbu_bonds)
+            mmtypes.append(sbu_mmtypes)
+        bonds = scipy.linalg.block_diag(*bonds)
+        mmtypes = numpy.hstack(mmtypes)
         symbols = numpy.asarray(structure.get_chemical_symbols())
         if not dummies:
             # keep track of dummies
@@ -750,6 +875,7 @@ class Framework(object):
             del structure[xis]
         return structure, bonds, mmtypes
 
+    @tracing.traced("write")
     def write(self,
               f="./mof",
               ext="gin"):
@@ -761,7 +887,8 @@ class Framework(object):
             the file path without extension to
             which the framework will be written
         ext: str
-            the extension of the file.
+            the extension of the file. "db" appends the
+            framework to a single file archive instead.
 
         Returns
         -------
@@ -777,12 +904,68 @@ class Framework(object):
         if ext == "gin":
             from autografs.utils.io import write_gin
             write_gin(path, atoms, bonds, mmtypes)
+        elif ext == "db":
+            from autografs.utils.archive import FrameworkArchive
+            with FrameworkArchive(path, batch_size=1) as archive:
+                name = "{t}_{n}".format(t=self.topology.name,
+                                        n=len(archive))
+                archive.write(atoms=atoms,
+                              bonds=bonds,
+                              mmtypes=mmtypes,
+                              name=name,
+                              topology=self.topology.name,
+                              sbu={idx: sbu.name for idx, sbu in self})
         else:
+            import ase.io
             ase.io.write(path, atoms)
         return None
 
+    @tracing.traced("write")
+    def save(self,
+             path):
+        """Save the framework to disk in a compact binary format.
+
+        Unlike write, the building units, topology and
+        functionalization bookkeeping are kept, so that the
+        framework can be reloaded for post-processing.
+
+        Parameters
+        ----------
+        path: str or Path
+            the file path to which the
+            framework will be saved
+
+        Returns
+        -------
+        None
+        """
+        from autografs.utils.io import write_framework
+        path = os.path.abspath(str(path))
+        write_framework(path, self)
+        logger.info("Framework saved to disk at {p}".format(p=path))
+        return None
+
+    @staticmethod
+    def load(path):
+        """Return a framework saved with Framework.save
+
+        Parameters
+        ----------
+        path: str or Path
+            the file path from which the
+            framework will be loaded
+
+        Returns
+        -------
+        autografs.framework.Framework
+            the framework as it was saved
+        """
+        from autografs.utils.io import read_framework
+        return read_framework(os.path.abspath(str(path)))
+
     def view(self):
         """Use ASE gui for visualization"""
+        import ase.visualize
         atoms, _, _ = self.get_atoms(dummies=False)
         ase.visualize.view(atoms)
         return None
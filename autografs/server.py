@@ -0,0 +1,776 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright : see accompanying license files for details
+
+"""
+Long running generation server and its client.
+
+The server loads the topology and building unit databases once, then
+forks a pool of worker processes inheriting them. Requests are JSON
+objects, one per line, sent over a Unix socket or a loopback TCP port.
+Each worker keeps the topologies it analysed, so that the cost of a
+request is the cost of building the framework.
+"""
+
+__author__ = "Damien Coupry"
+__credits__ = ["Prof. Matthew Addicoat"]
+__license__ = "MIT"
+__maintainer__ = "Damien Coupry"
+__version__ = '2.3.2'
+__status__ = "production"
+
+
+import os
+import sys
+import glob
+import json
+import time
+import numpy
+import shutil
+import getpass
+import socket
+import tempfile
+import threading
+import socketserver
+import multiprocessing
+import multiprocessing.util
+import concurrent.futures
+from collections import OrderedDict
+
+import ase
+
+from autografs.utils import budget
+
+import logging
+logger = logging.getLogger(__name__)
+
+# only the user running the server can connect to its socket
+DEFAULT_ADDRESS = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR", tempfile.gettempdir()),
+    "autografs-{0}.sock".format(getpass.getuser()))
+_LOOPBACK = ("127.0.0.1", "localhost", "::1")
+
+# state of a worker process: the generator and the analysed topologies
+_generator = None
+_topologies = OrderedDict()
+_cache_size = 128
+# topologies whose analysis ran out of time, with the budget.
+# shared between the workers of a pool, see _init_worker
+_slow = {}
+# collector of the worker metrics, see _init_worker
+_metrics = None
+# seconds given to a worker to interrupt itself after a hard timeout,
+# before the job is stopped by killing its process
+GRACE = 5.0
+
+
+def _init_worker(generator,
+                 cache_size,
+                 slow=None,
+                 metrics=None):
+    """Prepare a worker process, forked with its generator.
+
+    slow is a dictionary shared by all workers, e.g. from a
+    multiprocessing manager, recording the topologies whose
+    analysis ran out of time. Otherwise, each worker finds
+    them on its own. If metrics is a directory, the worker
+    collects its metrics and dumps them there in JSON, to be
+    merged by _merge_metrics.
+    """
+    global _generator, _cache_size, _slow, _metrics
+    if metrics is not None:
+        from autografs.utils.metrics import MetricsCollector
+        if _metrics is not None:
+            _metrics.uninstall()
+        path = os.path.join(metrics, "{0}.json".format(os.getpid()))
+        _metrics = MetricsCollector(path, interval=1.0)
+        _metrics.install()
+        # pool workers leave through os._exit, without atexit
+        multiprocessing.util.Finalize(_metrics, _metrics.dump,
+                                      exitpriority=10)
+    if generator is not _generator:
+        # the analysed topologies belong to the previous databases
+        _topologies.clear()
+        _slow = {}
+    if slow is not None:
+        _slow = slow
+    _generator = generator
+    _cache_size = cache_size
+    return None
+
+
+def _get_topology(topology_name,
+                  supercell,
+                  timeout=None):
+    """Return the analysed topology, from the worker cache if possible"""
+    key = (topology_name, supercell)
+    topology = _topologies.get(key)
+    if topology is None:
+        slow = _slow.get(topology_name, -1.0)
+        if timeout is not None and timeout <= slow:
+            # do not try again with the same budget
+            raise budget.TimeBudgetExceeded(stage="topology", seconds=slow)
+        try:
+            topology = _generator.get_topology(topology_name=topology_name,
+                                               supercell=supercell)
+        except budget.TimeBudgetExceeded:
+            _slow[topology_name] = max(slow, timeout or 0.0)
+            raise
+        _topologies[key] = topology
+        while len(_topologies) > _cache_size:
+            _topologies.popitem(last=False)
+    else:
+        _topologies.move_to_end(key)
+    return topology
+
+
+def _jsonable(obj):
+    """Return numpy containers and scalars as python objects"""
+    if isinstance(obj, dict):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, numpy.ndarray):
+        return obj.tolist()
+    if isinstance(obj, numpy.generic):
+        return obj.item()
+    return obj
+
+
+def _encode_framework(framework):
+    """Return a connected framework as a JSON serializable dictionary"""
+    atoms, bonds, mmtypes = framework.get_atoms(dummies=False)
+    # the bond matrix is symmetric: keep the upper triangle only
+    i0, i1 = numpy.nonzero(numpy.triu(bonds, k=1))
+    return {"symbols": atoms.get_chemical_symbols(),
+            "positions": atoms.positions.tolist(),
+            "cell": numpy.asarray(atoms.get_cell()).tolist(),
+            "pbc": atoms.pbc.tolist(),
+            "edges": numpy.array([i0, i1]).T.tolist(),
+            "orders": bonds[i0, i1].tolist(),
+            "mmtypes": [str(m) for m in mmtypes],
+            "topology": framework.topology.name,
+            "sbu": {str(idx): sbu.name for idx, sbu in framework}}
+
+
+def _decode_framework(result):
+    """Return the atoms, bonds and mmtypes encoded by the server"""
+    atoms = ase.Atoms(symbols=result["symbols"],
+                      positions=result["positions"],
+                      cell=result["cell"],
+                      pbc=result["pbc"])
+    atoms.info["topology"] = result["topology"]
+    atoms.info["sbu"] = {int(k): v for k, v in result["sbu"].items()}
+    bonds = numpy.zeros((len(atoms), len(atoms)))
+    edges = numpy.asarray(result["edges"], dtype=int).reshape(-1, 2)
+    bonds[edges[:, 0], edges[:, 1]] = result["orders"]
+    bonds[edges[:, 1], edges[:, 0]] = result["orders"]
+    return atoms, bonds, numpy.array(result["mmtypes"])
+
+
+def _build(job):
+    """Run one generation request in the worker, see Client.make"""
+    supercell = job.get("supercell", 1)
+    if isinstance(supercell, int):
+        supercell = (supercell, supercell, supercell)
+    supercell = tuple(int(m) for m in supercell)
+    if job.get("topology_name") is None:
+        raise ValueError("The server needs a topology_name.")
+    topology = _get_topology(job["topology_name"],
+                             supercell,
+                             job.get("timeout"))
+    sbu_names = job.get("sbu_names")
+    if sbu_names is not None:
+        # weighted names are sent as lists
+        sbu_names = [tuple(n) if isinstance(n, list) else n
+                     for n in sbu_names]
+    sbu_dict = job.get("sbu_dict")
+    if sbu_dict is not None:
+        sbu_dict = {int(k): v for k, v in sbu_dict.items()}
+    # the cached topology is left untouched by the generation
+    framework = _generator.generate(topology=topology,
+                                    sbu_names=sbu_names,
+                                    sbu_dict=sbu_dict,
+                                    coercion=job.get("coercion", False),
+                                    dry_run=job.get("dry_run", False),
+                                    limits=job.get("limits"),
+                                    seed=job.get("seed"))
+    if job.get("dry_run", False):
+        return {"estimate": _jsonable(framework)}
+    if framework is None:
+        return {"rejected": True}
+    path = job.get("path")
+    if path is None:
+        return {"framework": _encode_framework(framework)}
+    fmt = job.get("fmt", "cif")
+    path = os.path.abspath("{0}.{1}".format(path, fmt))
+    if fmt == "agf":
+        framework.save(path)
+    else:
+        framework.write(f=path[:-len(fmt) - 1], ext=fmt)
+    return {"path": path}
+
+
+def _merge_metrics(directory,
+                   path,
+                   fmt="json"):
+    """Merge the metrics dumped by the workers into a single file"""
+    from autografs.utils.metrics import MetricsCollector
+    collector = MetricsCollector.load(
+        sorted(glob.glob(os.path.join(directory, "*.json"))))
+    collector.dump(path, fmt)
+    return collector
+
+
+def _kill_pool(pool):
+    """Stop a pool at once, without waiting for the running jobs"""
+    # the executor has no terminate: stop its processes directly
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False)
+    return None
+
+
+def _run_job(job):
+    """Worker entry point: never raises, errors are reported"""
+    start = time.perf_counter()
+    try:
+        with budget.hard_timeout(job.get("hard_timeout")), \
+                budget.time_budget(job.get("timeout")):
+            response = _build(job)
+        response["status"] = "ok"
+    except budget.TimeBudgetExceeded as e:
+        logger.debug("Request timed out: {0}".format(e))
+        response = {"status": "error",
+                    "error": type(e).__name__,
+                    "message": str(e),
+                    "stage": e.stage,
+                    "budget": e.seconds}
+    except Exception as e:
+        logger.debug("Request failed: {0!r}".format(e))
+        response = {"status": "error",
+                    "error": type(e).__name__,
+                    "message": str(e)}
+    response["time"] = time.perf_counter() - start
+    return response
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answer the requests of one connection, one JSON per line."""
+
+    def handle(self):
+        """Serve requests until the client disconnects"""
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line.decode("utf8"))
+                if not isinstance(request, dict):
+                    raise ValueError("Requests are JSON objects.")
+            except ValueError as e:
+                response = {"status": "error",
+                            "error": type(e).__name__,
+                            "message": str(e)}
+            else:
+                response = self.server.owner.process(request)
+            self.wfile.write((json.dumps(response) + "\n").encode("utf8"))
+        return None
+
+
+class GenerationServer(object):
+    """Local server keeping the generator and its caches warm."""
+
+    def __init__(self,
+                 address=None,
+                 workers=None,
+                 preload=None,
+                 cache_size=128,
+                 metrics=None,
+                 metrics_format="json",
+                 output=None,
+                 **options):
+        """Constructor for the generation server.
+
+        The databases are read, and the preloaded topologies
+        analysed, before the worker processes are forked.
+
+        Parameters
+        ----------
+        address: str or (str, int), optional
+            path of the Unix socket, or loopback host and port
+            to listen on. Defaults to autografs-<user>.sock in
+            XDG_RUNTIME_DIR, or in the temporary directory.
+            Only the user of the server can use the socket.
+        workers: int, optional
+            number of worker processes. Defaults to the
+            number of CPUs.
+        preload: [str, ...], optional
+            names of topologies to analyse before forking
+        cache_size: int, optional
+            number of analysed topologies kept by each worker
+        metrics: str or Path, optional
+            file to which the merged metrics of the workers
+            are written, every minute and at shutdown
+        metrics_format: str, optional
+            "json" or "prometheus"
+        output: str or Path, optional
+            directory under which the clients can write
+            frameworks. Relative paths are resolved from
+            it. Defaults to the working directory.
+        options: optional
+            passed to the Autografs constructor
+
+        Returns
+        -------
+        None
+        """
+        if address is None:
+            address = DEFAULT_ADDRESS
+        if not isinstance(address, str):
+            host, port = address
+            if host not in _LOOPBACK:
+                raise ValueError("The server only listens on loopback.")
+            address = (host, int(port))
+        self.address = address
+        self.workers = workers or multiprocessing.cpu_count()
+        self.served = 0
+        self._cache_size = cache_size
+        self.output = os.path.realpath(os.getcwd() if output is None
+                                       else str(output))
+        self.metrics = metrics
+        self.metrics_format = metrics_format
+        self._metrics_dir = None
+        if metrics is not None:
+            self._metrics_dir = tempfile.mkdtemp(prefix="autografs-metrics-")
+        self._metrics_dumped = time.time()
+        self._manager = None
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        from autografs.autografs import Autografs
+        self._generator = Autografs(**options)
+        _init_worker(self._generator, cache_size)
+        for topology_name in (preload or []):
+            _get_topology(topology_name, (1, 1, 1))
+        context = multiprocessing.get_context("fork")
+        self._manager = context.Manager()
+        self._slow = self._manager.dict()
+        self._pool = self._start_pool()
+        logger.info("{0} generation workers ready.".format(self.workers))
+        return None
+
+    def _start_pool(self):
+        """Fork the worker processes, inheriting the warm generator"""
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(self._generator, self._cache_size, self._slow,
+                      self._metrics_dir))
+        # all workers are forked at the first submission
+        pool.submit(os.getpid).result()
+        return pool
+
+    def _restart_pool(self,
+                      pool):
+        """Replace a broken or stuck pool, once"""
+        with self._lock:
+            if self._pool is pool:
+                _kill_pool(pool)
+                self._pool = self._start_pool()
+        return None
+
+    def __enter__(self):
+        """Context manager intrinsic: serve in a background thread"""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        """Context manager intrinsic: stop serving"""
+        self.shutdown()
+        return False
+
+    def _bind(self):
+        """Create the listening socket server"""
+        if self._server is not None:
+            return self._server
+        if isinstance(self.address, str):
+            if os.path.exists(self.address):
+                # only remove the socket if nobody answers on it
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    probe.connect(self.address)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    os.unlink(self.address)
+                else:
+                    raise OSError("A server already listens on "
+                                  "{0}".format(self.address))
+                finally:
+                    probe.close()
+            server_class = socketserver.ThreadingUnixStreamServer
+        else:
+            server_class = socketserver.ThreadingTCPServer
+            server_class.allow_reuse_address = True
+        # the socket file is created private, without a window for others
+        umask = os.umask(0o177)
+        try:
+            self._server = server_class(self.address, _RequestHandler)
+        finally:
+            os.umask(umask)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        if not isinstance(self.address, str):
+            # the port might have been chosen by the system
+            self.address = self._server.server_address[:2]
+        logger.info("Listening on {0}".format(self.address))
+        return self._server
+
+    def start(self):
+        """Serve requests from a background thread"""
+        server = self._bind()
+        self._thread = threading.Thread(target=server.serve_forever,
+                                        name="autografs-server",
+                                        daemon=True)
+        self._thread.start()
+        return None
+
+    def serve_forever(self):
+        """Serve requests until interrupted"""
+        try:
+            self._bind().serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+        return None
+
+    def shutdown(self):
+        """Stop serving, finish the running jobs and close the pool"""
+        if self._server is not None:
+            if self._thread is not None:
+                self._server.shutdown()
+                self._thread.join()
+            self._server.server_close()
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                os.unlink(self.address)
+            self._server = None
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+        if self._metrics_dir is not None:
+            self.dump_metrics()
+            shutil.rmtree(self._metrics_dir)
+            self._metrics_dir = None
+        return None
+
+    def dump_metrics(self):
+        """Write the merged metrics of the workers to the metrics file"""
+        self._metrics_dumped = time.time()
+        return _merge_metrics(self._metrics_dir,
+                              self.metrics,
+                              self.metrics_format)
+
+    def process(self,
+                request):
+        """Return the response to a request.
+
+        Parameters
+        ----------
+        request: dict
+            the "action" is "make" (default) or "ping". Generation
+            requests take the arguments of Client.make. An "id"
+            is sent back with the response.
+
+        Returns
+        -------
+        response: dict
+            always has a "status", "ok" or "error"
+        """
+        request = dict(request)
+        action = request.pop("action", "make")
+        ident = request.pop("id", None)
+        if action == "ping":
+            response = {"status": "ok",
+                        "workers": self.workers,
+                        "served": self.served,
+                        "pid": os.getpid()}
+        elif action == "make":
+            try:
+                self._resolve_output(request)
+            except ValueError as e:
+                response = {"status": "error",
+                            "error": type(e).__name__,
+                            "message": str(e)}
+            else:
+                response = self._make(request)
+            with self._lock:
+                self.served += 1
+                dump = (self._metrics_dir is not None and
+                        time.time() - self._metrics_dumped >= 60.0)
+            if dump:
+                self.dump_metrics()
+        else:
+            response = {"status": "error",
+                        "error": "ValueError",
+                        "message": "Unknown action {0}".format(action)}
+        if ident is not None:
+            response["id"] = ident
+        return response
+
+    def _resolve_output(self,
+                        request):
+        """Resolve the requested file under the output directory"""
+        path = request.get("path")
+        if path is None:
+            return None
+        fmt = str(request.get("fmt", "cif"))
+        if not fmt.isalnum():
+            raise ValueError("Invalid file extension {0}".format(fmt))
+        path = os.path.realpath(os.path.join(self.output, str(path)))
+        # symbolic links are followed to the file actually written
+        target = os.path.realpath("{0}.{1}".format(path, fmt))
+        if os.path.commonpath([self.output, target]) != self.output:
+            raise ValueError("Frameworks are only written under {0}".format(
+                self.output))
+        request["path"] = path
+        request["fmt"] = fmt
+        return None
+
+    def _make(self,
+              request):
+        """Run a generation request in the pool"""
+        pool = self._pool
+        hard_timeout = request.get("hard_timeout")
+        wait = None
+        if hard_timeout is not None:
+            wait = hard_timeout + GRACE
+        start = time.perf_counter()
+        try:
+            response = pool.submit(_run_job, request).result(wait)
+        except concurrent.futures.TimeoutError:
+            # the worker is stuck: the pending requests fail with it
+            logger.warning("Stopping a job past its hard timeout.")
+            self._restart_pool(pool)
+            response = {"status": "error",
+                        "error": "TimeBudgetExceeded",
+                        "message": "Killed after {0:.1f}s.".format(
+                            time.perf_counter() - start),
+                        "stage": "hard timeout",
+                        "budget": hard_timeout}
+        except concurrent.futures.process.BrokenProcessPool as e:
+            # a worker died: the pending requests fail with this one
+            logger.warning("A worker process died, restarting them.")
+            self._restart_pool(pool)
+            response = {"status": "error",
+                        "error": type(e).__name__,
+                        "message": "The worker process died."}
+        return response
+
+
+class Client(object):
+    """Submit generation requests to a running GenerationServer."""
+
+    def __init__(self,
+                 address=None,
+                 timeout=None):
+        """Constructor for the client. Connects on first use.
+
+        Parameters
+        ----------
+        address: str or (str, int), optional
+            the address of the server
+        timeout: float, optional
+            seconds to wait for each answer
+
+        Returns
+        -------
+        None
+        """
+        self.address = DEFAULT_ADDRESS if address is None else address
+        self.timeout = timeout
+        self._socket = None
+        self._file = None
+        self._lock = threading.Lock()
+        return None
+
+    def __enter__(self):
+        """Context manager intrinsic"""
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        """Context manager intrinsic: disconnect"""
+        self.close()
+        return False
+
+    def _connect(self):
+        """Open the connection to the server"""
+        if isinstance(self.address, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.settimeout(self.timeout)
+        self._socket.connect(tuple(self.address)
+                             if not isinstance(self.address, str)
+                             else self.address)
+        self._file = self._socket.makefile("rb")
+        return None
+
+    def close(self):
+        """Close the connection to the server"""
+        if self._socket is not None:
+            self._file.close()
+            self._socket.close()
+            self._socket = None
+            self._file = None
+        return None
+
+    def request(self,
+                **request):
+        """Send a raw request and return the raw response.
+
+        Parameters
+        ----------
+        request: optional
+            the JSON serializable request, see
+            GenerationServer.process
+
+        Returns
+        -------
+        response: dict
+            the answer of the server
+        """
+        message = (json.dumps(_jsonable(request)) + "\n").encode("utf8")
+        with self._lock:
+            if self._socket is None:
+                self._connect()
+            self._socket.sendall(message)
+            line = self._file.readline()
+        if not line:
+            self.close()
+            raise IOError("The server closed the connection.")
+        return json.loads(line.decode("utf8"))
+
+    def ping(self):
+        """Return the state of the server"""
+        return self.request(action="ping")
+
+    def make(self,
+             topology_name=None,
+             sbu_names=None,
+             sbu_dict=None,
+             supercell=(1, 1, 1),
+             coercion=False,
+             dry_run=False,
+             limits=None,
+             seed=None,
+             path=None,
+             fmt="cif",
+             timeout=None,
+             hard_timeout=None):
+        """Generate a framework on the server.
+
+        The arguments are those of Autografs.make. The
+        SBU have to be given by name, and the seed as an int.
+
+        Parameters
+        ----------
+        path: str, optional
+            the file path without extension to which the
+            framework is written by the server, as in
+            Framework.write. If not given, the framework
+            is sent back. Relative to the output directory
+            of the server, outside of which nothing is written.
+        fmt: str, optional
+            the extension of the file. "agf" saves the
+            framework as in Framework.save.
+        timeout: float, optional
+            cooperative time budget of the job, in seconds
+        hard_timeout: float, optional
+            delay after which the worker interrupts the job.
+            Its process is killed if the job still runs
+            GRACE seconds later.
+
+        Returns
+        -------
+        result: str, tuple, dict or None
+            the path of the written file if path is given,
+            the estimate dictionary if dry_run, None if
+            rejected by the limits, else the atoms, bonds
+            and mmtypes of the connected framework.
+        """
+        response = self.request(action="make",
+                                topology_name=topology_name,
+                                sbu_names=sbu_names,
+                                sbu_dict=sbu_dict,
+                                supercell=supercell,
+                                coercion=coercion,
+                                dry_run=dry_run,
+                                limits=limits,
+                                seed=seed,
+                                path=path,
+                                fmt=fmt,
+                                timeout=timeout,
+                                hard_timeout=hard_timeout)
+        if response.get("error") == "TimeBudgetExceeded":
+            raise budget.TimeBudgetExceeded(stage=response["stage"],
+                                            seconds=response["budget"])
+        if response["status"] != "ok":
+            raise RuntimeError("{0}: {1}".format(response["error"],
+                                                 response["message"]))
+        if "path" in response:
+            return response["path"]
+        if "estimate" in response:
+            return response["estimate"]
+        if response.get("rejected", False):
+            return None
+        return _decode_framework(response["framework"])
+
+
+def main(argv=None):
+    """Run a generation server until interrupted"""
+    import argparse
+    parser = argparse.ArgumentParser(description=("Serve framework "
+                                                  "generation requests."))
+    parser.add_argument("--socket", default=DEFAULT_ADDRESS,
+                        help="path of the Unix socket to listen on")
+    parser.add_argument("--port", type=int, default=None,
+                        help="listen on this loopback TCP port instead")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes")
+    parser.add_argument("--preload", nargs="*", default=[],
+                        help="topologies to analyse at startup")
+    parser.add_argument("--topology-path", default=None)
+    parser.add_argument("--sbu-path", default=None)
+    parser.add_argument("--output", default=None,
+                        help=("directory under which clients can write "
+                              "frameworks (default: working directory)"))
+    parser.add_argument("--metrics", default=None,
+                        help="file receiving the metrics of the workers")
+    parser.add_argument("--metrics-format", default="json",
+                        choices=("json", "prometheus"))
+    args = parser.parse_args(argv)
+    logging.basicConfig(format='%(asctime)s | %(message)s',
+                        level=logging.INFO,
+                        datefmt='%I:%M:%S')
+    address = args.socket
+    if args.port is not None:
+        address = ("127.0.0.1", args.port)
+    server = GenerationServer(address=address,
+                              workers=args.workers,
+                              preload=args.preload,
+                              metrics=args.metrics,
+                              metrics_format=args.metrics_format,
+                              output=args.output,
+                              topology_path=args.topology_path,
+                              sbu_path=args.sbu_path)
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
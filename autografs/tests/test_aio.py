@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import asyncio
+import unittest
+
+from autografs import aio
+
+
+def get_worker_topology(_):
+    return aio._generator.topology.name
+
+
+class AioTestSuite(unittest.TestCase):
+    """Asyncio front-end test cases."""
+
+    def setUp(self):
+        self.mofgen = autografs.Autografs()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_make_async(self):
+        sbu_names = ["Zn_mof5_octahedral", "Benzene_linear"]
+        mof = self.loop.run_until_complete(
+            self.mofgen.make_async(topology_name="pcu", sbu_names=sbu_names))
+        reference = self.mofgen.copy().make(topology_name="pcu",
+                                            sbu_names=sbu_names)
+        self.assertEqual(len(mof.get_atoms()[0]),
+                         len(reference.get_atoms()[0]))
+        # the generator itself is left untouched
+        self.assertIsNone(self.mofgen.topology)
+
+    def test_iter_make(self):
+        sbu_names = ["Zn_mof5_octahedral", "Benzene_linear"]
+        jobs = [{"topology_name": "pcu", "sbu_names": sbu_names},
+                {"topology_name": "not_a_topology", "sbu_names": sbu_names},
+                {"topology_name": "pcu", "sbu_names": sbu_names,
+                 "supercell": (2, 1, 1)}]
+
+        async def collect():
+            iterator = self.mofgen.iter_make(jobs,
+                                             max_pending=2,
+                                             return_exceptions=True)
+            return [result async for result in iterator]
+
+        results = self.loop.run_until_complete(collect())
+        self.assertEqual(len(results), 3)
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(len(results[2].get_atoms()[0]),
+                         2 * len(results[0].get_atoms()[0]))
+
+    def test_process_executors(self):
+        # each pool works with its own generator
+        other = self.mofgen.copy()
+        self.mofgen.set_topology("pcu")
+        other.set_topology("dia")
+        with aio.ProcessExecutor(self.mofgen, max_workers=1) as first, \
+                aio.ProcessExecutor(other, max_workers=1) as second:
+            self.assertEqual(first.submit(get_worker_topology, 0).result(),
+                             "pcu")
+            self.assertEqual(second.submit(get_worker_topology, 0).result(),
+                             "dia")
+            # the workers cannot use another generator
+            with self.assertRaises(ValueError):
+                asyncio.run(aio.make_async(self.mofgen, executor=second,
+                                           dry_run=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
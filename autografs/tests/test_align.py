@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import unittest
+import concurrent.futures
+
+import ase
+import numpy
+
+from autografs.utils.sbu import SBU
+
+
+class AlignTestSuite(unittest.TestCase):
+    """Alignment test cases."""
+
+    def setUp(self):
+        self.mofgen = autografs.Autografs()
+
+    def test_square_orientation_search(self):
+        # slightly puckered square, as in paddlewheels
+        square = [[1, -1, 0.05], [1, 1, -0.05], [-1, 1, 0.05], [-1, -1, -0.05]]
+        sbu = SBU(name="square", atoms=ase.Atoms("CX4",
+                                                  [[0, 0, 0]] + square))
+        self.assertEqual(len(sbu.get_dummy_permutations()), 8)
+        # the dummy ordering of the slot is not the one of the SBU
+        fragment = ase.Atoms("X4",
+                             [[1.5, 0, 1.5], [1.5, 0, -1.5],
+                              [-1.5, 0, 1.5], [-1.5, 0, -1.5]],
+                             tags=[1, 2, 3, 4])
+        _, _, rmsd = self.mofgen.align(fragment=fragment,
+                                       sbu=sbu.copy(),
+                                       rmsd_threshold=numpy.inf)
+        self.assertGreater(rmsd, 1.0)
+        sbu, alpha, rmsd = self.mofgen.align(fragment=fragment,
+                                             sbu=sbu.copy())
+        self.assertLess(rmsd, 0.06)
+        xis = numpy.where(sbu.get_atomic_numbers() == 0)[0]
+        # every dummy points towards the one of the slot with its tag
+        for xi, tag in zip(xis, sbu.get_tags()[xis]):
+            direction = fragment.positions[tag - 1]
+            vector = sbu.get_positions()[xi]
+            cosine = numpy.dot(direction, vector) / (
+                numpy.linalg.norm(direction) * numpy.linalg.norm(vector))
+            self.assertGreater(cosine, 0.99)
+
+    def test_estimate(self):
+        names = ["Benzene_linear", "Zn_mof5_octahedral"]
+        estimate = self.mofgen.make(topology_name="pcu",
+                                    sbu_names=names,
+                                    dry_run=True)
+        mof = self.mofgen.make(sbu_names=names)
+        atoms, _, _ = mof.get_atoms(dummies=False)
+        self.assertEqual(estimate["natoms"], len(atoms))
+        cellpar = ase.geometry.cell_to_cellpar(atoms.get_cell())
+        self.assertTrue(numpy.allclose(estimate["cellpar"], cellpar,
+                                       rtol=0.05))
+        self.assertTrue(0.0 < estimate["void_fraction"] < 1.0)
+        # rejected before building anything
+        mof = self.mofgen.make(sbu_names=names,
+                               limits={"a": (None, 10.0)})
+        self.assertIsNone(mof)
+
+    def test_seeded_scheduling(self):
+        names = ["Zn_mof5_octahedral",
+                 ("Benzene_linear", 2.0),
+                 ("Acetylene_linear", 1.0)]
+        self.mofgen.set_topology("pcu", supercell=2)
+        drawn = []
+        for seed in (42, 42, numpy.random.RandomState(42)):
+            sbu_dict = self.mofgen.get_sbu_dict(sbu_names=names, seed=seed)
+            drawn.append([sbu_dict[i].name for i in sorted(sbu_dict)])
+        self.assertEqual(drawn[0], drawn[1])
+        self.assertEqual(drawn[0], drawn[2])
+        self.assertEqual(len(set(drawn[0])), 3)
+
+    def test_unique_frameworks(self):
+        names = ["Zn_mof5_octahedral", "Benzene_linear", "Acetylene_linear"]
+        self.mofgen.set_topology("pcu", supercell=(2, 1, 1))
+        unique, total = self.mofgen.count_unique_frameworks(sbu_names=names)
+        frameworks = list(self.mofgen.iter_unique_frameworks(sbu_names=names))
+        self.assertEqual(total, 2**6)
+        self.assertEqual(unique, len(frameworks))
+        self.assertEqual(sum(m for _, m in frameworks), total)
+        # no two frameworks are related by symmetry
+        slots, permutations = self.mofgen.topology.get_slot_permutations()
+        seen = set()
+        for sbu_dict, multiplicity in frameworks:
+            names = numpy.array([sbu_dict[slot] for slot in slots])
+            images = set(tuple(names[numpy.argsort(p)])
+                         for p in permutations)
+            self.assertEqual(len(images), multiplicity)
+            self.assertFalse(images & seen)
+            seen |= images
+
+    def test_threaded_generation(self):
+        names = ["Zn_mof5_octahedral",
+                 ("Benzene_linear", 2.0),
+                 ("Acetylene_linear", 1.0)]
+        positions = self.mofgen.topologies["pcu"].get_positions().copy()
+        topology = self.mofgen.get_topology("pcu", supercell=2)
+        cell = topology.atoms.get_cell().copy()
+        jobs = [dict(topology=topology, sbu_names=names, seed=seed)
+                for seed in range(4)]
+        jobs += [dict(topology_name="pcu", supercell=m,
+                      sbu_names=names, seed=0) for m in (1, 2)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
+            mofs = list(pool.map(lambda job: self.mofgen.generate(**job),
+                                 jobs))
+        # same frameworks as one after the other
+        for job, mof in zip(jobs, mofs):
+            expected = self.mofgen.generate(**job)
+            self.assertTrue(numpy.allclose(expected.get_atoms()[0].positions,
+                                           mof.get_atoms()[0].positions))
+        self.assertIsNone(self.mofgen.topology)
+        # nothing shared was modified
+        self.assertTrue(numpy.allclose(topology.atoms.get_cell(), cell))
+        self.assertTrue(numpy.allclose(
+            self.mofgen.topologies["pcu"].get_positions(), positions))
+        with self.assertRaises(ValueError):
+            self.mofgen.generate(sbu_names=names)
+
+
+if __name__ == '__main__':
+    unittest.main()
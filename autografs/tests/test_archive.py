@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import ase
+import numpy
+
+from autografs.utils.archive import FrameworkArchive
+
+
+class ArchiveTestSuite(unittest.TestCase):
+    """Bulk framework archive test cases."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, "frameworks.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_roundtrip(self):
+        atoms = ase.Atoms("COH", positions=[[0, 0, 0], [1.2, 0, 0], [2.1, 0, 0]])
+        bonds = numpy.array([[0.0, 2.0, 0.0],
+                             [2.0, 0.0, 1.0],
+                             [0.0, 1.0, 0.0]])
+        mmtypes = ["C_2", "O_3", "H_"]
+        with FrameworkArchive(self.path, batch_size=2) as archive:
+            for i in range(3):
+                archive.write(atoms=atoms,
+                              bonds=bonds,
+                              mmtypes=mmtypes,
+                              name="fw{0}".format(i),
+                              topology="pcu",
+                              sbu={0: "Benzene_linear"})
+            self.assertEqual(len(archive), 3)
+        archive = FrameworkArchive(self.path)
+        self.assertEqual(list(archive), ["fw0", "fw1", "fw2"])
+        self.assertIn("fw1", archive)
+        read_atoms, read_bonds, read_mmtypes = archive["fw1"]
+        self.assertTrue(numpy.allclose(read_atoms.positions, atoms.positions))
+        self.assertTrue((read_bonds == bonds).all())
+        self.assertEqual(list(read_mmtypes), mmtypes)
+        self.assertEqual(read_atoms.info["topology"], "pcu")
+        self.assertEqual(read_atoms.info["sbu"], {0: "Benzene_linear"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import os
+import json
+import time
+import signal
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from autografs import cli
+from autografs import server
+
+run_job = server._run_job
+
+
+def kill_worker(job):
+    if job["topology_name"] == "not_a_net":
+        os._exit(1)
+    return run_job(job)
+
+
+def stuck_worker(job):
+    if job["topology_name"] == "not_a_net":
+        # deaf to the hard timeout of the worker
+        signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGALRM])
+        time.sleep(60.0)
+    return run_job(job)
+
+
+class CLITestSuite(unittest.TestCase):
+    """Command line batch runner test cases."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.manifest = os.path.join(self.tmpdir, "manifest.json")
+        with open(self.manifest, "w") as fileobj:
+            json.dump({"topologies": ["pcu", "not_a_net"],
+                       "sbu_sets": [["Zn_mof5_octahedral",
+                                     "Benzene_linear"]],
+                       "supercells": [1, [2, 1, 1]],
+                       "options": {"seed": 0}}, fileobj)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_manifest(self):
+        jobs = cli.read_manifest(self.manifest)
+        self.assertEqual(len(jobs), 4)
+        self.assertEqual(len(set(job["id"] for job in jobs)), 4)
+        # the identifiers do not depend on the order of the manifest
+        self.assertEqual([job["id"] for job in jobs],
+                         [job["id"] for job in cli.read_manifest(
+                             self.manifest)])
+        shards = [cli.get_shard(jobs, i, 3) for i in range(3)]
+        self.assertEqual(sorted(job["id"] for shard in shards
+                                for job in shard),
+                         sorted(job["id"] for job in jobs))
+
+    def test_resume(self):
+        checkpoint = os.path.join(self.tmpdir, "done.jsonl")
+        output = os.path.join(self.tmpdir, "out")
+        argv = ["run", self.manifest, "-o", output, "-f", "xyz",
+                "-j", "1", "--checkpoint", checkpoint]
+        metrics = os.path.join(self.tmpdir, "metrics.json")
+        # the unknown topology fails
+        self.assertEqual(cli.main(argv + ["--metrics", metrics]), 1)
+        self.assertEqual(len(os.listdir(output)), 2)
+        # the metrics of the workers are merged
+        with open(metrics, "r") as fileobj:
+            self.assertEqual(json.load(fileobj)["results"]["framework"], 2)
+        self.assertEqual(len(cli.read_checkpoint(checkpoint)), 4)
+        self.assertEqual(len(cli.read_checkpoint(checkpoint,
+                                                 retry_failed=True)), 2)
+        # nothing is left to do
+        self.assertEqual(cli.main(argv), 0)
+
+    def test_worker_death(self):
+        checkpoint = os.path.join(self.tmpdir, "done.jsonl")
+        jobs = cli.read_manifest(self.manifest)
+        with mock.patch.object(server, "_run_job", kill_worker):
+            counts = cli.run(jobs,
+                             output=os.path.join(self.tmpdir, "out"),
+                             workers=1,
+                             checkpoint=checkpoint)
+        # the run carries on with new workers
+        self.assertEqual(counts, {"ok": 2, "rejected": 0,
+                                  "timeout": 0, "error": 2})
+        self.assertEqual(len(cli.read_checkpoint(checkpoint,
+                                                 retry_failed=True)), 2)
+
+    def test_stuck_worker(self):
+        checkpoint = os.path.join(self.tmpdir, "done.jsonl")
+        jobs = cli.read_manifest(self.manifest)
+        with mock.patch.object(server, "_run_job", stuck_worker), \
+                mock.patch.object(server, "GRACE", 0.5):
+            counts = cli.run(jobs,
+                             output=os.path.join(self.tmpdir, "out"),
+                             workers=2,
+                             checkpoint=checkpoint,
+                             hard_timeout=5.0)
+        # the stuck jobs are killed and can be retried
+        self.assertEqual(counts, {"ok": 2, "rejected": 0,
+                                  "timeout": 2, "error": 0})
+        self.assertEqual(len(cli.read_checkpoint(checkpoint,
+                                                 retry_timeouts=True)), 2)
+
+    def test_retry_timeouts(self):
+        checkpoint = os.path.join(self.tmpdir, "done.jsonl")
+        argv = ["run", self.manifest, "-o", os.path.join(self.tmpdir, "out"),
+                "-j", "1", "--checkpoint", checkpoint, "--timeout", "0"]
+        cli.main(argv)
+        self.assertEqual(len(cli.read_checkpoint(checkpoint)), 4)
+        self.assertEqual(len(cli.read_checkpoint(checkpoint,
+                                                 retry_timeouts=True)), 2)
+        # a larger budget builds the frameworks that timed out
+        argv[-1] = "60"
+        cli.main(argv + ["--retry-timeouts"])
+        self.assertEqual(len(cli.read_checkpoint(checkpoint,
+                                                 retry_timeouts=True)), 4)
+
+    def test_run_databases(self):
+        jobs = [job for job in cli.read_manifest(self.manifest)
+                if job["topology_name"] == "pcu"]
+        output = os.path.join(self.tmpdir, "out")
+        self.assertEqual(cli.run(jobs, output=output, workers=1)["ok"], 2)
+        # each run uses its own databases
+        generator = autografs.Autografs()
+        del generator.topologies["pcu"]
+        counts = cli.run(jobs, output=output, workers=1, generator=generator)
+        self.assertEqual(counts["error"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import unittest
+
+import ase
+import numpy
+
+from autografs.utils import memory
+from autografs.utils import tracing
+
+
+class FrameworkTestSuite(unittest.TestCase):
+    """Framework post-processing test cases."""
+
+    def setUp(self):
+        self.mofgen = autografs.Autografs()
+        self.mof = self.mofgen.make(topology_name="pcu",
+                                    sbu_names=["Zn_mof5_octahedral",
+                                               "Benzene_linear"])
+
+    def test_functionalize_many(self):
+        fluoro = ase.Atoms("XF", positions=[[0, 0, 0], [0, 0, 1.35]])
+        sites = self.mof.list_functionalizable_sites(symbol="H")
+        sites = [(int(s[0]), int(s[1])) for s in sites]
+        sequential = self.mof.copy()
+        for site in sites:
+            sequential.functionalize(where=site, fg=fluoro)
+        self.mof.functionalize_many(sites=sites, groups=fluoro)
+        atoms0, bonds0, mmtypes0 = sequential.get_atoms()
+        atoms1, bonds1, mmtypes1 = self.mof.get_atoms()
+        self.assertEqual(atoms1.get_chemical_symbols().count("H"), 0)
+        self.assertEqual(atoms1.get_chemical_symbols().count("F"),
+                         len(sites))
+        self.assertTrue(numpy.allclose(atoms0.positions, atoms1.positions))
+        self.assertTrue(numpy.allclose(bonds0, bonds1))
+        self.assertEqual(list(mmtypes0), list(mmtypes1))
+        # nothing to do
+        self.mof.functionalize_many(sites=[], groups=fluoro)
+        self.assertEqual(len(self.mof.get_atoms()[0]), len(atoms1))
+
+    def test_functionalizable_sites(self):
+        sites = self.mof.get_functionalizable_sites(symbol="H")
+        self.assertEqual(sites.dtype.names, ("slot", "index", "symbol"))
+        self.assertTrue((sites["symbol"] == "H").all())
+        self.assertEqual(self.mof.list_functionalizable_sites(symbol="H"),
+                         [(int(s), int(i)) for s, i, _ in sites])
+        linkers = self.mof.get_functionalizable_sites(
+            sbu_names=["Benzene_linear"])
+        self.assertEqual(len(linkers), len(sites))
+        self.assertEqual(len(self.mof.get_functionalizable_sites(
+            sbu_names=["Zn_mof5_octahedral"])), 0)
+        # replaced atoms are no longer available
+        fluoro = ase.Atoms("XF", positions=[[0, 0, 0], [0, 0, 1.35]])
+        self.mof.functionalize_many(sites=sites[:2], groups=fluoro)
+        left = self.mof.get_functionalizable_sites(symbol="H")
+        self.assertEqual(len(left), len(sites) - 2)
+
+    def test_memory_usage(self):
+        usage = self.mof.get_memory_usage()
+        self.assertEqual(usage["total"],
+                         sum(v for k, v in usage.items() if k != "total"))
+        # the linkers share their template until edited
+        _, linker = next((i, s) for i, s in self.mof
+                         if s.name == "Benzene_linear")
+        linker.atoms.positions += 0.0
+        edited = self.mof.get_memory_usage()
+        self.assertGreater(edited["sbu_templates"], usage["sbu_templates"])
+        with memory.profile() as report:
+            with tracing.span("allocation"):
+                data = numpy.ones(10**6)
+        span, = report.spans
+        self.assertGreaterEqual(span.attributes["memory_delta"], data.nbytes)
+        self.assertGreaterEqual(span.attributes["memory_peak"], data.nbytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import os
+import sys
+import json
+import unittest
+import subprocess
+
+# run in a fresh interpreter, the test runner has already imported everything
+SCRIPT = """
+import sys, json, time, logging, warnings
+filters = list(warnings.filters)
+start = time.perf_counter()
+import autografs
+elapsed = time.perf_counter() - start
+loaded = sorted(m for m in ("numpy", "scipy", "ase", "autografs.autografs")
+                if m in sys.modules)
+print(json.dumps({"elapsed": elapsed,
+                  "loaded": loaded,
+                  "handlers": len(logging.getLogger().handlers),
+                  "filters": warnings.filters == filters}))
+from autografs import Autografs
+print(json.dumps({"scipy.optimize": "scipy.optimize" in sys.modules,
+                  "scipy.cluster": "scipy.cluster" in sys.modules,
+                  "errors": [f[0] for f in warnings.filters].count("error")}))
+"""
+
+
+class ImportTestSuite(unittest.TestCase):
+    """Import time test cases."""
+
+    def test_import(self):
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(root))
+        output = subprocess.check_output([sys.executable, "-c", SCRIPT],
+                                         env=env)
+        package, classes = [json.loads(line)
+                            for line in output.decode().splitlines()]
+        # the package itself imports nothing heavy
+        self.assertEqual(package["loaded"], [])
+        self.assertLess(package["elapsed"], 1.0)
+        # and configures neither logging nor warnings
+        self.assertEqual(package["handlers"], 0)
+        self.assertTrue(package["filters"])
+        # optional kernels wait for their first use
+        self.assertFalse(classes["scipy.optimize"])
+        self.assertFalse(classes["scipy.cluster"])
+        self.assertEqual(classes["errors"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
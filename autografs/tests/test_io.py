@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import ase
+import numpy
+
+from autografs.framework import Framework
+from autografs.utils.sbu import SBU
+from autografs.utils.topology import Topology
+
+
+def make_toy_framework():
+    """Return a one slot framework built without any analysis"""
+    atoms = ase.Atoms("CXX",
+                      positions=[[0, 0, 0], [-1, 0, 0], [1, 0, 0]],
+                      cell=numpy.eye(3) * 2.0,
+                      pbc=True)
+    topology = Topology(name="toy", atoms=atoms, analyze=False)
+    topology.fragments[0] = ase.Atoms("XX",
+                                      positions=[[-1, 0, 0], [1, 0, 0]],
+                                      tags=[2, 3])
+    topology.shapes[0] = numpy.array([1, 1, 0, 1, 1, 2])
+    topology.pointgroups[0] = "D*h"
+    topology.equivalent_sites = [[0]]
+    sbu = SBU(name="toy_linear", atoms=None)
+    sbu.set_atoms(ase.Atoms("XCCX",
+                            positions=[[-1.5, 0, 0], [-0.6, 0, 0],
+                                       [0.6, 0, 0], [1.5, 0, 0]],
+                            tags=[2, 0, 0, 3]))
+    sbu.bonds = numpy.array([[0.0, 1.0, 0.0, 0.0],
+                             [1.0, 0.0, 3.0, 0.0],
+                             [0.0, 3.0, 0.0, 1.0],
+                             [0.0, 0.0, 1.0, 0.0]])
+    sbu.mmtypes = numpy.array(["C_1", "C_1", "C_1", "C_1"])
+    sbu.shape = numpy.array([1, 1, 0, 1, 1, 2])
+    sbu.pg = "D*h"
+    framework = Framework(topology=topology)
+    framework.append(index=0, sbu=sbu)
+    framework._todel[0] = [1]
+    return framework
+
+
+class IOTestSuite(unittest.TestCase):
+    """Input and output test cases."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_framework_binary_roundtrip(self):
+        framework = make_toy_framework()
+        path = os.path.join(self.root, "toy.agf")
+        framework.save(path)
+        loaded = Framework.load(path)
+        self.assertEqual(loaded.topology.name, "toy")
+        self.assertEqual(loaded.topology.pointgroups, {0: "D*h"})
+        self.assertEqual(loaded.topology.equivalent_sites, [[0]])
+        self.assertEqual(loaded._todel[0], [1])
+        sbu, new = framework[0], loaded[0]
+        self.assertEqual(new.name, sbu.name)
+        self.assertEqual(new.pg, sbu.pg)
+        self.assertTrue(numpy.allclose(new.atoms.positions,
+                                       sbu.atoms.positions))
+        self.assertTrue((new.atoms.get_tags() == sbu.atoms.get_tags()).all())
+        self.assertTrue((new.bonds == sbu.bonds).all())
+        self.assertEqual(list(new.mmtypes), list(sbu.mmtypes))
+        self.assertEqual(list(new.shape), list(sbu.shape))
+
+
+if __name__ == '__main__':
+    unittest.main()
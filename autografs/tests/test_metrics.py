@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from autografs.utils import tracing
+from autografs.utils.metrics import MetricsCollector
+
+
+class MetricsTestSuite(unittest.TestCase):
+    """Throughput metrics test cases."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_collector(self):
+        path = os.path.join(self.tmpdir, "worker0.json")
+        with MetricsCollector(path) as metrics:
+            for result in ("framework", "framework", "rejected"):
+                with tracing.span("make", topology="pcu") as span:
+                    with tracing.span("align"):
+                        pass
+                    span.set(result=result)
+            with self.assertRaises(ValueError):
+                with tracing.span("make", topology="dia"):
+                    raise ValueError("unfilled slot")
+        self.assertFalse(tracing.is_enabled())
+        self.assertEqual(dict(metrics.results), {"framework": 2,
+                                                 "rejected": 1})
+        self.assertEqual(dict(metrics.failures), {"ValueError": 1})
+        counts, _ = metrics.histograms["align"]
+        self.assertEqual(sum(counts), 3)
+        names = [t[0] for t in metrics.get_slowest_topologies()]
+        self.assertEqual(sorted(names), ["dia", "pcu"])
+        # the dump of each worker can be merged
+        with open(path, "r") as fileobj:
+            self.assertEqual(json.load(fileobj)["results"]["framework"], 2)
+        merged = MetricsCollector.load([path, path])
+        self.assertEqual(merged.results["framework"], 4)
+        self.assertEqual(merged.failures["ValueError"], 2)
+        text = merged.to_prometheus()
+        self.assertIn('autografs_stage_seconds_count{stage="align"} 6', text)
+        self.assertIn('le="+Inf"} 8', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import unittest
+
+import ase
+import numpy
+
+from autografs.utils.operations import procrustes
+from autografs.utils.operations import batch_procrustes
+from autografs.utils import symmetry
+
+
+class OperationsTestSuite(unittest.TestCase):
+    """Geometric operations test cases."""
+
+    def test_batch_procrustes(self):
+        rng = numpy.random.RandomState(42)
+        X = rng.normal(size=(5, 6, 3))
+        Y = rng.normal(size=(5, 6, 3))
+        for method in ("SVD", "Q"):
+            R, scale = batch_procrustes(X, Y, method=method)
+            self.assertEqual(R.shape, (5, 3, 3))
+            for i in range(5):
+                Ri, si = procrustes(X[i], Y[i], method=method)
+                self.assertTrue(numpy.allclose(R[i], Ri))
+                self.assertTrue(numpy.isclose(scale[i], si))
+
+    def test_unique_axes(self):
+        axes = numpy.array([[1.0, 0.0, 0.0],
+                            [0.0, 1.0, 0.0],
+                            [-0.99, 0.1, 0.0],
+                            [0.0, 0.0, 0.0],
+                            [0.0, -1.0, 0.0],
+                            [0.0, 0.0, 0.0]])
+        # first axis of each direction, degenerate ones are kept
+        unique = symmetry.unique_axes(axes)
+        self.assertTrue(numpy.array_equal(unique, axes[[0, 1, 3, 5]]))
+        # planar hexagon: in plane and normal axes
+        t = numpy.linspace(0.0, 2.0 * numpy.pi, 6, endpoint=False)
+        hexagon = ase.Atoms("X6", positions=numpy.c_[numpy.cos(t),
+                                                     numpy.sin(t),
+                                                     numpy.zeros(6)] * 10.0)
+        axes = symmetry.get_potential_axes(hexagon)
+        axes = axes[numpy.linalg.norm(axes, axis=1) > 0.5]
+        self.assertTrue(numpy.isclose(numpy.abs(axes[:, 2]), 1.0).any())
+        # one in plane direction every 30 degrees, and the normal
+        self.assertEqual(len(axes), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
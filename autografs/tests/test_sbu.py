@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import unittest
+
+import ase
+import numpy
+
+from autografs.utils.sbu import SBU
+
+
+class SBUTestSuite(unittest.TestCase):
+    """Building unit test cases."""
+
+    def test_copy_on_write(self):
+        sbu = SBU(name="toy_linear", atoms=None)
+        sbu.set_atoms(ase.Atoms("XCCX",
+                                positions=[[-1.5, 0, 0], [-0.6, 0, 0],
+                                           [0.6, 0, 0], [1.5, 0, 0]]))
+        copies = [sbu.copy() for _ in range(3)]
+        # nothing is copied until modified
+        self.assertTrue(all(c._atoms is sbu._atoms for c in copies))
+        copies[0].atoms.positions += 1.0
+        self.assertIsNot(copies[0]._atoms, sbu._atoms)
+        self.assertTrue(copies[1]._atoms is sbu._atoms)
+        self.assertTrue(numpy.allclose(sbu.get_atoms().positions[:, 1], 0.0))
+        # the original also copies before modification
+        sbu.atoms.positions -= 1.0
+        self.assertTrue(numpy.allclose(copies[1].get_atoms().positions[:, 1],
+                                       0.0))
+
+    def test_placement_shares_template(self):
+        sbu = SBU(name="toy_linear", atoms=None)
+        sbu.set_atoms(ase.Atoms("XCCX",
+                                positions=[[-1.5, 0, 0], [-0.6, 0, 0],
+                                           [0.6, 0, 0], [1.5, 0, 0]]))
+        template = sbu._atoms
+        R = numpy.array([[0.0, 1.0, 0.0],
+                         [-1.0, 0.0, 0.0],
+                         [0.0, 0.0, 1.0]])
+        placed = sbu.copy()
+        placed.transform(translation=[1.0, 0.0, 0.0])
+        placed.transform(rotation=R, translation=[0.0, 0.0, 2.0])
+        expected = (template.positions + [1.0, 0.0, 0.0]).dot(R) + [0, 0, 2]
+        self.assertTrue(numpy.allclose(placed.get_positions(), expected))
+        fragment = ase.Atoms("XX",
+                             positions=expected[[3, 0]],
+                             tags=[7, 8])
+        placed.transfer_tags(fragment)
+        self.assertEqual(placed.get_tags().tolist(), [8, 0, 0, 7])
+        # the template is untouched until the atoms are edited
+        self.assertIs(placed._atoms, template)
+        self.assertTrue(numpy.allclose(placed.atoms.positions, expected))
+        self.assertIsNot(placed._atoms, template)
+        self.assertEqual(sbu.get_tags().tolist(), [0, 0, 0, 0])
+
+    def test_dummy_orderings(self):
+        square = [[1, -1, 0], [1, 1, 0], [-1, 1, 0], [-1, -1, 0]]
+        sbu = SBU(name="square", atoms=ase.Atoms("CX4",
+                                                  [[0, 0, 0]] + square))
+        # 4! orderings, in classes of the 8 operations of D4h
+        orders = sbu.get_dummy_orderings()
+        self.assertEqual(orders.shape, (3, 4))
+        # computed once for all copies
+        self.assertIs(sbu.copy().get_dummy_orderings(), orders)
+
+
+if __name__ == '__main__':
+    unittest.main()
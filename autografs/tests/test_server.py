@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import os
+import time
+import stat
+import signal
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from autografs import server
+from autografs.server import GenerationServer, Client
+
+
+run_job = server._run_job
+
+
+def kill_worker(job):
+    if job.pop("kill", False):
+        os._exit(1)
+    if job.pop("stuck", False):
+        # deaf to the hard timeout of the worker
+        signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGALRM])
+        time.sleep(60.0)
+    return run_job(job)
+
+
+class ServerTestSuite(unittest.TestCase):
+    """Generation server test cases."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_server(self):
+        address = os.path.join(self.tmpdir, "autografs.sock")
+        sbu_names = ["Zn_mof5_octahedral", "Benzene_linear"]
+        local = autografs.Autografs().make(topology_name="pcu",
+                                           sbu_names=sbu_names)
+        atoms0, bonds0, mmtypes0 = local.get_atoms(dummies=False)
+        metrics = os.path.join(self.tmpdir, "metrics.prom")
+        with GenerationServer(address=address, workers=1, preload=["pcu"],
+                              metrics=metrics, metrics_format="prometheus",
+                              output=self.tmpdir):
+            self.assertEqual(stat.S_IMODE(os.stat(address).st_mode), 0o600)
+            with Client(address) as client:
+                self.assertEqual(client.ping()["workers"], 1)
+                atoms, bonds, mmtypes = client.make(topology_name="pcu",
+                                                    sbu_names=sbu_names)
+                self.assertEqual(len(atoms), len(atoms0))
+                self.assertEqual((bonds != 0).sum(), (bonds0 != 0).sum())
+                self.assertEqual(list(mmtypes), list(mmtypes0))
+                path = client.make(topology_name="pcu",
+                                   sbu_names=sbu_names,
+                                   path=os.path.join(self.tmpdir, "mof"),
+                                   fmt="xyz")
+                self.assertTrue(os.path.isfile(path))
+                # nothing is written outside of the output directory
+                with self.assertRaises(RuntimeError):
+                    client.make(topology_name="pcu",
+                                sbu_names=sbu_names,
+                                path=os.path.join(self.tmpdir, "..", "mof"),
+                                fmt="xyz")
+                with self.assertRaises(RuntimeError):
+                    client.make(topology_name="not_a_net",
+                                sbu_names=sbu_names)
+                self.assertEqual(client.ping()["served"], 4)
+        self.assertFalse(os.path.exists(address))
+        with open(metrics, "r") as fileobj:
+            self.assertIn('autografs_generations_total{result="framework"} 2',
+                          fileobj.read())
+
+    def test_worker_death(self):
+        sbu_names = ["Zn_mof5_octahedral", "Benzene_linear"]
+        generation = GenerationServer(address=os.path.join(self.tmpdir, "s"),
+                                      workers=1)
+        try:
+            with mock.patch.object(server, "_run_job", kill_worker), \
+                    mock.patch.object(server, "GRACE", 0.5):
+                response = generation.process({"topology_name": "pcu",
+                                               "sbu_names": sbu_names,
+                                               "kill": True})
+                self.assertEqual(response["error"], "BrokenProcessPool")
+                # stuck workers are killed too
+                response = generation.process({"topology_name": "pcu",
+                                               "sbu_names": sbu_names,
+                                               "hard_timeout": 1.0,
+                                               "stuck": True})
+                self.assertEqual(response["stage"], "hard timeout")
+                # the workers are replaced
+                response = generation.process({"topology_name": "pcu",
+                                               "sbu_names": sbu_names,
+                                               "dry_run": True})
+                self.assertEqual(response["status"], "ok")
+        finally:
+            generation.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
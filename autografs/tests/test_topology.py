@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import unittest
+
+import ase
+import numpy
+
+from autografs.utils.topology import Topology
+from autografs.utils import budget
+
+
+def make_toy_chain(shifts=True):
+    """Return a one node periodic chain built without any analysis"""
+    atoms = ase.Atoms("CX",
+                      positions=[[0, 0, 0], [1, 0, 0]],
+                      tags=[0, 2],
+                      cell=numpy.eye(3) * 2.0,
+                      pbc=True)
+    topology = Topology(name="toy", atoms=atoms, analyze=False)
+    fragment = ase.Atoms("XX",
+                         positions=[[1, 0, 0], [-1, 0, 0]],
+                         tags=[2, 2])
+    if shifts:
+        fragment.set_array("shifts", numpy.array([[0, 0, 0], [-1, 0, 0]]))
+    topology.fragments[0] = fragment
+    topology.shapes[0] = numpy.array([1, 1, 0, 1, 1, 2])
+    topology.pointgroups[0] = "D*h"
+    topology.equivalent_sites = [[0]]
+    return topology
+
+
+class TopologyTestSuite(unittest.TestCase):
+    """Topology test cases."""
+
+    def test_supercell_tags(self):
+        for shifts in (True, False):
+            topology = make_toy_chain(shifts=shifts)
+            supercell = topology.get_supercell(m=(2, 1, 1))
+            # the primitive topology is left untouched
+            self.assertEqual(len(topology.atoms), 2)
+            self.assertEqual(len(supercell.atoms), 4)
+            self.assertEqual(sorted(supercell.fragments.keys()), [0, 2])
+            self.assertEqual(supercell.fragments[0].get_tags().tolist(),
+                             [2, 4])
+            self.assertEqual(supercell.fragments[2].get_tags().tolist(),
+                             [4, 2])
+            self.assertTrue(numpy.allclose(
+                supercell.fragments[2].positions[:, 0], [3.0, 1.0]))
+            self.assertEqual(supercell.pointgroups[2], "D*h")
+            self.assertEqual(supercell.equivalent_sites, [[0, 2]])
+
+    def test_time_budget(self):
+        mofgen = autografs.Autografs()
+        atoms = mofgen.topologies["pcu"]
+        with self.assertRaises(budget.TimeBudgetExceeded) as context:
+            with budget.time_budget(0.0):
+                Topology(name="pcu", atoms=atoms.copy())
+        self.assertEqual(context.exception.stage, "topology")
+        # the budget only holds in its context
+        self.assertIsNone(budget.remaining())
+        Topology(name="pcu", atoms=atoms.copy())
+        with self.assertRaises(budget.TimeBudgetExceeded):
+            mofgen.make(topology_name="pcu",
+                        sbu_names=["Zn_mof5_octahedral", "Benzene_linear"],
+                        timeout=0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from .context import autografs
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from autografs.utils import tracing
+
+
+class TracingTestSuite(unittest.TestCase):
+    """Tracing test cases."""
+
+    def test_spans(self):
+        # nothing is recorded when disabled
+        self.assertFalse(tracing.is_enabled())
+        self.assertIs(tracing.span("stage"), tracing.span("other"))
+        finished = []
+        tracing.add_hook(finished.append)
+        try:
+            with tracing.Trace() as report:
+                with tracing.span("make") as root:
+                    for i in range(3):
+                        with tracing.span("align", slot=i) as span:
+                            span.set(rmsd=0.0)
+                    root.set(slots=3)
+        finally:
+            tracing.remove_hook(finished.append)
+        self.assertFalse(tracing.is_enabled())
+        self.assertEqual([s.name for s in finished],
+                         ["align"] * 3 + ["make"])
+        self.assertEqual(len(report), 4)
+        durations = report.get_durations()
+        self.assertEqual(durations["align"][1], 3)
+        spans = report.as_dict()
+        self.assertEqual(spans[0]["name"], "make")
+        self.assertEqual(spans[0]["attributes"], {"slots": 3})
+        self.assertEqual(spans[1]["parent"], "make")
+        self.assertEqual(spans[1]["attributes"], {"slot": 0, "rmsd": 0.0})
+
+    def test_reopen_trace(self):
+        mof = autografs.Autografs().make(topology_name="pcu",
+                                         sbu_names=["Zn_mof5_octahedral",
+                                                    "Benzene_linear"],
+                                         trace=True)
+        self.assertNotIn("write", mof.trace.get_durations())
+        tmpdir = tempfile.mkdtemp()
+        try:
+            # the writing is added to the report of the generation
+            with mof.trace:
+                mof.write(os.path.join(tmpdir, "pcu"), ext="xyz")
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertEqual(mof.trace.get_durations()["write"][1], 1)
+        self.assertIn("make", mof.trace.get_durations())
+
+
+if __name__ == '__main__':
+    unittest.main()
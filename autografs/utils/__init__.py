@@ -11,7 +11,17 @@ __status__ = "production"
 
 
 import os
+import importlib
 
-__all__ = ["topology", "sbu", "operations", "mmanalysis", "io", "symmetry"]
+__all__ = ["topology", "sbu", "operations", "mmanalysis", "io", "symmetry",
+           "archive", "tracing", "memory", "metrics", "budget"]
 __data__ = os.path.join(
     "/".join(os.path.dirname(__file__).split("/")[:-1]), "data")
+
+
+def __getattr__(name):
+    """Import the utility modules on first access"""
+    if name not in __all__:
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(
+            __name__, name))
+    return importlib.import_module("{0}.{1}".format(__name__, name))
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright : see accompanying license files for details
+
+__author__ = "Damien Coupry"
+__credits__ = ["Prof. Matthew Addicoat"]
+__license__ = "MIT"
+__maintainer__ = "Damien Coupry"
+__version__ = '2.3.2'
+__status__ = "production"
+
+
+import os
+import numpy
+
+import ase
+import ase.db
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class FrameworkArchive(object):
+    """Single file container for many generated frameworks.
+
+    The frameworks are stored as rows of an ASE SQLite database:
+    the connected atoms, the bond orders as an edge list, the UFF
+    atomic types, the topology name and the SBU assigned to each slot.
+    Writes are buffered and committed in batches inside a single
+    transaction, and rows can be read back individually by name
+    without loading the rest of the file.
+    """
+
+    def __init__(self,
+                 path,
+                 batch_size=100):
+        """Constructor for the framework archive.
+
+        Parameters
+        ----------
+        path: str or Path
+            path to the database file. created if
+            it does not exist, appended to otherwise.
+        batch_size: int, optional
+            number of frameworks kept in memory before
+            being committed to disk in one transaction.
+
+        Returns
+        -------
+        None
+        """
+        self.path = os.path.abspath(str(path))
+        self.batch_size = max(1, int(batch_size))
+        # sqlite already locks the file: no need for
+        # an extra lock file per row on shared filesystems
+        self._db = ase.db.connect(self.path,
+                                  type="db",
+                                  append=True,
+                                  use_lock_file=False)
+        self._buffer = []
+        return None
+
+    def __enter__(self):
+        """Context manager intrinsic"""
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        """Context manager intrinsic: commit what is left"""
+        self.close()
+        return False
+
+    def __len__(self):
+        """Sizeable intrinsic"""
+        return self._db.count() + len(self._buffer)
+
+    def __contains__(self,
+                     name):
+        """Iterable intrinsic"""
+        if any(kvp["name"] == name for _, kvp, _ in self._buffer):
+            return True
+        return self._db.count(name=name) > 0
+
+    def __iter__(self):
+        """Iterable intrinsic, over the stored names"""
+        self.flush()
+        for row in self._db.select(include_data=False):
+            yield row.name
+
+    def __getitem__(self,
+                    name):
+        """Indexable intrinsic"""
+        return self.read(name=name)
+
+    def append(self,
+               framework,
+               name=None,
+               **info):
+        """Append a framework to the archive.
+
+        Parameters
+        ----------
+        framework: autografs.framework.Framework
+            the framework to store. it is connected
+            without dummies before storage.
+        name: str, optional
+            the key under which the framework is stored.
+            defaults to the topology name and the row number.
+        info: scalars, optional
+            additional key-value pairs to store and
+            query along with the framework.
+
+        Returns
+        -------
+        name: str
+            the key under which the framework was stored
+        """
+        atoms, bonds, mmtypes = framework.get_atoms(dummies=False)
+        topology = framework.topology.name
+        sbu = {idx: s.name for idx, s in framework}
+        if name is None:
+            name = "{t}_{n}".format(t=topology, n=len(self))
+        self.write(atoms=atoms,
+                   bonds=bonds,
+                   mmtypes=mmtypes,
+                   name=name,
+                   topology=topology,
+                   sbu=sbu,
+                   **info)
+        return name
+
+    def write(self,
+              atoms,
+              bonds,
+              mmtypes,
+              name,
+              topology=None,
+              sbu=None,
+              **info):
+        """Buffer already connected framework data for writing.
+
+        Parameters
+        ----------
+        atoms: ase.Atoms
+            the chemical information
+        bonds: numpy.array
+            the block symmetric matrix of bond orders
+        mmtypes: [str, ...]
+            the UFF atomic types
+        name: str
+            the key under which the framework is stored
+        topology: str, optional
+            name of the topology used for generation
+        sbu: {int: str, ...}, optional
+            name of the building unit at each slot index
+        info: scalars, optional
+            additional key-value pairs to store
+
+        Returns
+        -------
+        None
+        """
+        bonds = numpy.asarray(bonds)
+        # the bond matrix is symmetric: keep the upper triangle only
+        i0, i1 = numpy.nonzero(numpy.triu(bonds, k=1))
+        key_value_pairs = dict(info)
+        key_value_pairs["name"] = str(name)
+        if topology is not None:
+            key_value_pairs["topology"] = str(topology)
+        data = {"edges": numpy.array([i0, i1], dtype=int).T,
+                "orders": bonds[i0, i1],
+                "mmtypes": [str(m) for m in mmtypes]}
+        if sbu is not None:
+            data["sbu"] = {str(k): str(v) for k, v in sbu.items()}
+        self._buffer.append((atoms.copy(), key_value_pairs, data))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+        return None
+
+    def flush(self):
+        """Commit the buffered frameworks in a single transaction.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if not self._buffer:
+            return None
+        logger.debug("Committing {0} frameworks to {1}".format(
+            len(self._buffer), self.path))
+        with self._db as db:
+            for atoms, key_value_pairs, data in self._buffer:
+                db.write(atoms,
+                         key_value_pairs=key_value_pairs,
+                         data=data)
+        self._buffer = []
+        return None
+
+    def close(self):
+        """Commit the remaining buffered frameworks."""
+        self.flush()
+        return None
+
+    def read(self,
+             name):
+        """Return a stored framework by name.
+
+        Parameters
+        ----------
+        name: str
+            the key under which the framework was stored
+
+        Returns
+        -------
+        atoms: ase.Atoms
+            the framework in atoms form. The topology name
+            and slot to SBU mapping are kept in atoms.info
+        bonds: numpy.array
+            the bond matrix of the connected framework
+        mmtypes: numpy.array
+            the UFF atom types of the connected framework
+        """
+        self.flush()
+        row = self._db.get(name=name)
+        atoms = row.toatoms()
+        data = row.data
+        bonds = numpy.zeros((len(atoms), len(atoms)))
+        edges = numpy.asarray(data["edges"], dtype=int).reshape(-1, 2)
+        bonds[edges[:, 0], edges[:, 1]] = data["orders"]
+        bonds[edges[:, 1], edges[:, 0]] = data["orders"]
+        mmtypes = numpy.array(data["mmtypes"])
+        atoms.info.update(row.key_value_pairs)
+        if "sbu" in data:
+            atoms.info["sbu"] = {int(k): v for k, v in data["sbu"].items()}
+        return atoms, bonds, mmtypes
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright : see accompanying license files for details
+
+__author__ = "Damien Coupry"
+__credits__ = ["Prof. Matthew Addicoat"]
+__license__ = "MIT"
+__maintainer__ = "Damien Coupry"
+__version__ = '2.3.2'
+__status__ = "production"
+
+
+import time
+import signal
+import contextlib
+import threading
+
+import logging
+logger = logging.getLogger(__name__)
+
+# deadline of the running generation, per thread
+_local = threading.local()
+
+
+class TimeBudgetExceeded(RuntimeError):
+    """Raised when a generation runs past its time budget."""
+
+    def __init__(self,
+                 stage=None,
+                 seconds=None):
+        """Constructor for the exception.
+
+        Parameters
+        ----------
+        stage: str, optional
+            the stage during which the budget ran out
+        seconds: float, optional
+            the budget, in seconds
+
+        Returns
+        -------
+        None
+        """
+        self.stage = stage
+        self.seconds = seconds
+        message = "Time budget"
+        if seconds is not None:
+            message += " of {0:.1f}s".format(seconds)
+        message += " exceeded"
+        if stage is not None:
+            message += " during {0}".format(stage)
+        super(TimeBudgetExceeded, self).__init__(message + ".")
+        return None
+
+    def __reduce__(self):
+        """Pickling intrinsic, to cross process boundaries"""
+        return (self.__class__, (self.stage, self.seconds))
+
+
+class GenerationCancelled(RuntimeError):
+    """Raised when a generation is cancelled from another thread."""
+
+    def __init__(self,
+                 stage=None):
+        """Constructor for the exception.
+
+        Parameters
+        ----------
+        stage: str, optional
+            the stage during which the generation stopped
+
+        Returns
+        -------
+        None
+        """
+        self.stage = stage
+        message = "Generation cancelled"
+        if stage is not None:
+            message += " during {0}".format(stage)
+        super(GenerationCancelled, self).__init__(message + ".")
+        return None
+
+    def __reduce__(self):
+        """Pickling intrinsic, to cross process boundaries"""
+        return (self.__class__, (self.stage,))
+
+
+@contextlib.contextmanager
+def time_budget(seconds):
+    """Give the enclosed generation a deadline.
+
+    The budget is cooperative: the analysis, alignment and refinement
+    loops call check, which raises TimeBudgetExceeded once the deadline
+    is passed. Nested budgets can only shorten the deadline.
+
+    Parameters
+    ----------
+    seconds: float or None
+        the time allowed. None means no limit.
+
+    Yields
+    ------
+    None
+    """
+    if seconds is None:
+        yield
+        return
+    outer = getattr(_local, "deadline", None)
+    deadline = time.monotonic() + seconds
+    if outer is None or deadline < outer[0]:
+        _local.deadline = (deadline, seconds)
+    try:
+        yield
+    finally:
+        _local.deadline = outer
+
+
+@contextlib.contextmanager
+def cancellable(event):
+    """Let another thread stop the enclosed generation.
+
+    Parameters
+    ----------
+    event: threading.Event
+        once set, the next call to check raises
+        GenerationCancelled
+
+    Yields
+    ------
+    None
+    """
+    outer = getattr(_local, "cancel", None)
+    _local.cancel = event
+    try:
+        yield
+    finally:
+        _local.cancel = outer
+
+
+def check(stage=None):
+    """Raise TimeBudgetExceeded if the deadline is passed.
+
+    GenerationCancelled is raised instead if the
+    generation was cancelled, see cancellable.
+
+    Parameters
+    ----------
+    stage: str, optional
+        the name of the running stage, for the report
+
+    Returns
+    -------
+    None
+    """
+    event = getattr(_local, "cancel", None)
+    if event is not None and event.is_set():
+        raise GenerationCancelled(stage=stage)
+    deadline = getattr(_local, "deadline", None)
+    if deadline is not None and time.monotonic() > deadline[0]:
+        raise TimeBudgetExceeded(stage=stage, seconds=deadline[1])
+    return None
+
+
+def remaining():
+    """Return the seconds left before the deadline, or None"""
+    deadline = getattr(_local, "deadline", None)
+    if deadline is None:
+        return None
+    return deadline[0] - time.monotonic()
+
+
+@contextlib.contextmanager
+def hard_timeout(seconds):
+    """Interrupt the enclosed code after a delay, with a signal.
+
+    Unlike time_budget, this stops code that never checks the
+    deadline, as long as it returns to the interpreter. It only
+    works in the main thread of a process on POSIX systems, and
+    does nothing elsewhere.
+
+    Parameters
+    ----------
+    seconds: float or None
+        the time allowed. None means no limit.
+
+    Yields
+    ------
+    None
+    """
+    usable = (seconds is not None and
+              hasattr(signal, "setitimer") and
+              threading.current_thread() is threading.main_thread())
+    if not usable:
+        yield
+        return
+
+    def interrupt(signum, frame):
+        raise TimeBudgetExceeded(stage="hard timeout", seconds=seconds)
+
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
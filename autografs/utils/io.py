@@ -12,7 +12,9 @@ __status__ = "production"
 
 import os
 import sys
+import json
 import numpy
+import struct
 import _pickle as pickle
 
 import ase
@@ -21,10 +23,6 @@ from ase import Atoms
 from ase.spacegroup import crystal
 from ase.spacegroup import Spacegroup
 from ase.data import chemical_symbols
-from ase.neighborlist import NeighborList
-
-
-from scipy.cluster.hierarchy import fclusterdata as cluster
 
 import warnings
 
@@ -33,6 +31,14 @@ from autografs.utils import __data__
 import logging
 logger = logging.getLogger(__name__)
 
+# binary framework format: magic bytes, then a little-endian
+# (version, header length) pair, then a JSON header describing
+# the aligned arrays that follow.
+FRAMEWORK_MAGIC = b"AGFS"
+FRAMEWORK_VERSION = 1
+_PREAMBLE = struct.Struct("<4sHI")
+_ALIGN = 64
+
 
 def read_cgd(path=None):
     """Return a dictionary of topologies as ASE Atoms objects
@@ -69,7 +75,9 @@ def read_cgd(path=None):
         topology_file = os.path.abspath(path)
     # the script as such starts here
     error_counter = 0
-    with open(topology_file, "rb") as tpf:
+    # nets for which ASE warns are discarded
+    with open(topology_file, "rb") as tpf, warnings.catch_warnings():
+        warnings.simplefilter("error")
         text = tpf.read().decode("utf8")
         # split the file by topology
         topologies_raw = [t.strip().strip("CRYSTAL")
@@ -203,6 +211,7 @@ def read_sbu(path=None,
         path = os.path.abspath(path)
     else:
         path = os.path.join(__data__, "sbu")
+    import ase.io
     SBUs = {}
     for sbu_file in os.listdir(path):
         ext = sbu_file.split(".")[-1]
@@ -306,3 +315,252 @@ def write_gin(path,
         if sum(pbc) == 3:
             fileobj.write('output cif {0}.cif\n'.format(name))
         return None
+
+
+def _ragged(arrays,
+            dtype):
+    """Return the concatenation and offsets of a list of arrays"""
+    arrays = [numpy.asarray(a, dtype=dtype) for a in arrays]
+    lengths = [len(a) for a in arrays]
+    offsets = numpy.zeros(len(arrays) + 1, dtype=numpy.int64)
+    offsets[1:] = numpy.cumsum(lengths)
+    if arrays:
+        flat = numpy.concatenate(arrays)
+    else:
+        flat = numpy.zeros(0, dtype=dtype)
+    return flat, offsets
+
+
+def _intern(strings,
+            table):
+    """Return the codes of strings in an interned table"""
+    codes = numpy.zeros(len(strings), dtype=numpy.int32)
+    for i, string in enumerate(strings):
+        string = str(string)
+        if string not in table:
+            table[string] = len(table)
+        codes[i] = table[string]
+    return codes
+
+
+def write_framework(path,
+                    framework):
+    """Write a Framework to disk in the compact binary format.
+
+    Everything needed to post-process the framework is stored:
+    the topology and its fragments, and for every slot the building
+    unit positions, numbers, tags, UFF types and bonds. Atoms of all
+    slots are stored as contiguous arrays, the UFF types and names
+    as codes into interned string tables and the bonds as an edge list.
+
+    Parameters
+    ----------
+    path: str or Path
+        the file path to the file object
+        where the framework will be written
+    framework: autografs.framework.Framework
+        the framework to serialize
+
+    Returns
+    -------
+    None
+    """
+    topology = framework.topology
+    strings = {}
+    arrays = {}
+    # the topology
+    tatoms = topology.atoms
+    arrays["topology_positions"] = tatoms.get_positions()
+    arrays["topology_numbers"] = tatoms.get_atomic_numbers()
+    arrays["topology_tags"] = tatoms.get_tags()
+    arrays["topology_cell"] = numpy.asarray(tatoms.get_cell())
+    arrays["topology_pbc"] = tatoms.get_pbc()
+    slots = sorted(topology.fragments.keys())
+    arrays["fragment_slots"] = numpy.asarray(slots, dtype=numpy.int64)
+    fragments = [topology.fragments[s] for s in slots]
+    arrays["fragment_positions"], arrays["fragment_offsets"] = _ragged(
+        [f.get_positions() for f in fragments], numpy.float64)
+    arrays["fragment_tags"], _ = _ragged(
+        [f.get_tags() for f in fragments], numpy.int64)
+    if all(f.has("shifts") for f in fragments):
+        arrays["fragment_shifts"], _ = _ragged(
+            [f.get_array("shifts") for f in fragments], numpy.int64)
+    arrays["fragment_shapes"], arrays["fragment_shape_offsets"] = _ragged(
+        [topology.shapes[s] for s in slots], numpy.int64)
+    pointgroups = [topology.pointgroups.get(s, "") for s in slots]
+    arrays["fragment_pointgroups"] = _intern(pointgroups, strings)
+    arrays["equivalent_sites"], arrays["equivalent_offsets"] = _ragged(
+        topology.equivalent_sites, numpy.int64)
+    if topology._operations is not None:
+        # derived operations of supercells are not in the spacegroup
+        arrays["symmetry_rotations"] = numpy.asarray(
+            topology._operations[0], dtype=numpy.float64)
+        arrays["symmetry_translations"] = numpy.asarray(
+            topology._operations[1], dtype=numpy.float64)
+    # the building units
+    sbu_slots = sorted(framework.SBU.keys())
+    sbus = [framework[s] for s in sbu_slots]
+    arrays["sbu_slots"] = numpy.asarray(sbu_slots, dtype=numpy.int64)
+    arrays["sbu_names"] = _intern([s.name for s in sbus], strings)
+    arrays["sbu_pointgroups"] = _intern([s.pg or "" for s in sbus], strings)
+    arrays["positions"], arrays["sbu_offsets"] = _ragged(
+        [s.get_positions() for s in sbus], numpy.float64)
+    arrays["numbers"], _ = _ragged(
+        [s.get_atomic_numbers() for s in sbus], numpy.int64)
+    arrays["tags"], _ = _ragged(
+        [s.get_tags() for s in sbus], numpy.int64)
+    arrays["mmtypes"] = _intern(
+        numpy.concatenate([numpy.asarray(s.mmtypes, dtype=str)
+                           for s in sbus]) if sbus else [], strings)
+    edges = []
+    orders = []
+    for s in sbus:
+        i0, i1 = numpy.nonzero(numpy.triu(numpy.asarray(s.bonds), k=1))
+        edges.append(numpy.array([i0, i1], dtype=numpy.int32).T)
+        orders.append(numpy.asarray(s.bonds)[i0, i1])
+    edges, arrays["edge_offsets"] = _ragged(edges, numpy.int32)
+    arrays["edges"] = edges.reshape(-1, 2)
+    arrays["orders"], _ = _ragged(orders, numpy.float64)
+    arrays["sbu_shapes"], arrays["sbu_shape_offsets"] = _ragged(
+        [s.shape for s in sbus], numpy.int64)
+    arrays["todel"], arrays["todel_offsets"] = _ragged(
+        [framework._todel.get(s, []) for s in sbu_slots], numpy.int64)
+    # spacegroup information of the topology
+    spacegroup = tatoms.info.get("spacegroup", None)
+    if spacegroup is not None and hasattr(spacegroup, "no"):
+        spacegroup = (int(spacegroup.no), int(spacegroup.setting))
+    elif spacegroup is not None:
+        spacegroup = (int(spacegroup), 1)
+    # layout of the data block, all arrays aligned
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = numpy.ascontiguousarray(array)
+        if array.dtype.byteorder == ">":
+            array = array.astype(array.dtype.newbyteorder("<"))
+        arrays[name] = array
+        layout[name] = {"dtype": array.dtype.str,
+                        "shape": list(array.shape),
+                        "offset": offset}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    table = sorted(strings, key=strings.get)
+    header = {"name": topology.name,
+              "spacegroup": spacegroup,
+              "strings": table,
+              "arrays": layout}
+    header = json.dumps(header).encode("utf8")
+    start = _PREAMBLE.size + len(header)
+    start = -(-start // _ALIGN) * _ALIGN
+    with open(path, "wb") as fileobj:
+        fileobj.write(_PREAMBLE.pack(FRAMEWORK_MAGIC,
+                                     FRAMEWORK_VERSION,
+                                     len(header)))
+        fileobj.write(header)
+        for name, array in arrays.items():
+            fileobj.seek(start + layout[name]["offset"])
+            fileobj.write(array.tobytes())
+        fileobj.truncate(start + offset)
+    return None
+
+
+def read_framework(path):
+    """Return a Framework read from the compact binary format.
+
+    The file is memory-mapped and the arrays are read in place.
+    No analysis is run: topology fragments, symmetry shapes, bonds
+    and UFF types are restored as stored.
+
+    Parameters
+    ----------
+    path: str or Path
+        the file path to a file written by
+        autografs.utils.io.write_framework
+
+    Returns
+    -------
+    framework: autografs.framework.Framework
+        the framework as it was written
+    """
+    from autografs.framework import Framework
+    from autografs.utils.topology import Topology
+    from autografs.utils.sbu import SBU
+    buf = numpy.memmap(path, dtype=numpy.uint8, mode="r")
+    magic, version, hlen = _PREAMBLE.unpack(bytes(buf[:_PREAMBLE.size]))
+    if magic != FRAMEWORK_MAGIC:
+        raise IOError("{0} is not an autografs framework file.".format(path))
+    if version > FRAMEWORK_VERSION:
+        raise IOError(("Framework file version {0} is newer than the"
+                       " supported version {1}.").format(version,
+                                                         FRAMEWORK_VERSION))
+    header = bytes(buf[_PREAMBLE.size:_PREAMBLE.size + hlen])
+    header = json.loads(header.decode("utf8"))
+    start = -(-(_PREAMBLE.size + hlen) // _ALIGN) * _ALIGN
+    strings = numpy.array(header["strings"] + [""])
+    a = {}
+    for name, lay in header["arrays"].items():
+        dtype = numpy.dtype(lay["dtype"])
+        shape = tuple(lay["shape"])
+        size = int(numpy.prod(shape)) * dtype.itemsize
+        offset = start + lay["offset"]
+        a[name] = buf[offset:offset + size].view(dtype).reshape(shape)
+    # the topology
+    tatoms = Atoms(numbers=a["topology_numbers"],
+                   positions=a["topology_positions"],
+                   tags=a["topology_tags"],
+                   cell=a["topology_cell"],
+                   pbc=a["topology_pbc"])
+    if header["spacegroup"] is not None:
+        no, setting = header["spacegroup"]
+        tatoms.info["spacegroup"] = Spacegroup(no, setting)
+    topology = Topology(name=header["name"],
+                        atoms=tatoms,
+                        analyze=False)
+    fo = a["fragment_offsets"]
+    so = a["fragment_shape_offsets"]
+    for i, slot in enumerate(a["fragment_slots"].tolist()):
+        n0, n1 = fo[i], fo[i + 1]
+        topology.fragments[slot] = Atoms(
+            "X" * int(n1 - n0),
+            positions=a["fragment_positions"][n0:n1],
+            tags=a["fragment_tags"][n0:n1])
+        if "fragment_shifts" in a:
+            topology.fragments[slot].set_array(
+                "shifts", numpy.array(a["fragment_shifts"][n0:n1]))
+        topology.shapes[slot] = numpy.array(a["fragment_shapes"][so[i]:
+                                                                 so[i + 1]])
+        pointgroup = str(strings[a["fragment_pointgroups"][i]])
+        if pointgroup:
+            topology.pointgroups[slot] = pointgroup
+    eo = a["equivalent_offsets"]
+    topology.equivalent_sites = [a["equivalent_sites"][eo[i]:eo[i + 1]]
+                                 .tolist() for i in range(len(eo) - 1)]
+    if "symmetry_rotations" in a:
+        topology._operations = (numpy.array(a["symmetry_rotations"]),
+                                numpy.array(a["symmetry_translations"]))
+    # the building units
+    framework = Framework(topology=topology)
+    ao = a["sbu_offsets"]
+    bo = a["edge_offsets"]
+    so = a["sbu_shape_offsets"]
+    do = a["todel_offsets"]
+    for i, slot in enumerate(a["sbu_slots"].tolist()):
+        n0, n1 = ao[i], ao[i + 1]
+        e0, e1 = bo[i], bo[i + 1]
+        sbu = SBU(name=str(strings[a["sbu_names"][i]]), atoms=None)
+        sbu.set_atoms(Atoms(numbers=a["numbers"][n0:n1],
+                            positions=a["positions"][n0:n1],
+                            tags=a["tags"][n0:n1]),
+                      analyze=False)
+        bonds = numpy.zeros((n1 - n0, n1 - n0))
+        edges = a["edges"][e0:e1]
+        bonds[edges[:, 0], edges[:, 1]] = a["orders"][e0:e1]
+        bonds[edges[:, 1], edges[:, 0]] = a["orders"][e0:e1]
+        sbu.bonds = bonds
+        sbu.mmtypes = strings[a["mmtypes"][n0:n1]]
+        sbu.shape = numpy.array(a["sbu_shapes"][so[i]:so[i + 1]])
+        sbu.pg = str(strings[a["sbu_pointgroups"][i]]) or None
+        framework.append(index=slot, sbu=sbu)
+        todel = a["todel"][do[i]:do[i + 1]].tolist()
+        if todel:
+            framework._todel[slot] = todel
+    return framework
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright : see accompanying license files for details
+
+__author__ = "Damien Coupry"
+__credits__ = ["Prof. Matthew Addicoat"]
+__license__ = "MIT"
+__maintainer__ = "Damien Coupry"
+__version__ = '2.3.2'
+__status__ = "production"
+
+
+import sys
+import numpy
+import contextlib
+import tracemalloc
+
+import ase
+
+from autografs.utils import tracing
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def get_nbytes(obj,
+               seen=None):
+    """Return the number of bytes held by an object and its content.
+
+    Numpy arrays count their data buffer, ASE Atoms their arrays,
+    and containers or plain objects are followed recursively.
+    Objects already in seen are not counted again, so that data
+    shared between building units is only accounted for once.
+
+    Parameters
+    ----------
+    obj: object
+        the object to measure
+    seen: set, optional
+        ids of the objects already counted. updated in place.
+
+    Returns
+    -------
+    nbytes: int
+        the size of the object, in bytes
+    """
+    if seen is None:
+        seen = set()
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, numpy.ndarray):
+        nbytes = sys.getsizeof(obj)
+        if obj.base is not None:
+            # views count the buffer they look into
+            nbytes += get_nbytes(obj.base, seen)
+        elif obj.dtype == object:
+            nbytes += sum(get_nbytes(o, seen) for o in obj.flat)
+        return nbytes
+    if isinstance(obj, ase.Atoms):
+        nbytes = sys.getsizeof(obj)
+        nbytes += get_nbytes(obj.arrays, seen)
+        nbytes += get_nbytes(obj.info, seen)
+        nbytes += get_nbytes(numpy.asarray(obj.get_cell()), seen)
+        return nbytes
+    nbytes = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            nbytes += get_nbytes(key, seen) + get_nbytes(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        nbytes += sum(get_nbytes(o, seen) for o in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        nbytes += get_nbytes(vars(obj), seen)
+    return nbytes
+
+
+def get_breakdown(components,
+                  seen=None):
+    """Return the bytes held by each named component.
+
+    The components are measured in order, sharing the same set of
+    already counted objects: data shared between components is
+    attributed to the first one holding it, and the total is exact.
+
+    Parameters
+    ----------
+    components: [(str, object), ...]
+        the names and objects to measure
+    seen: set, optional
+        ids of the objects already counted
+
+    Returns
+    -------
+    breakdown: {str: int, ...}
+        the bytes held by each component, and their "total"
+    """
+    if seen is None:
+        seen = set()
+    breakdown = {}
+    for name, obj in components:
+        breakdown[name] = breakdown.get(name, 0) + get_nbytes(obj, seen)
+    breakdown["total"] = sum(breakdown.values())
+    return breakdown
+
+
+@contextlib.contextmanager
+def profile(frames=1):
+    """Record the memory allocated during each stage of the generation.
+
+    Starts tracemalloc if needed and records a tracing.Trace, whose
+    spans get the "memory_delta" and "memory_peak" attributes: the
+    memory still allocated at the end of the stage and the highest
+    memory allocated during the stage, both in bytes, relative to
+    its start. Per-stage peaks need python 3.9 or above. Before, the
+    peak is only known when the stage raises the peak of the run,
+    and is otherwise a lower bound.
+
+    Parameters
+    ----------
+    frames: int, optional
+        number of frames stored by tracemalloc
+        for each allocation
+
+    Yields
+    ------
+    trace: autografs.utils.tracing.Trace
+        the spans recorded during the profiling
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(frames)
+    try:
+        with tracing.Trace() as trace:
+            yield trace
+    finally:
+        if started:
+            tracemalloc.stop()
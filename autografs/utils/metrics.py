@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright : see accompanying license files for details
+
+__author__ = "Damien Coupry"
+__credits__ = ["Prof. Matthew Addicoat"]
+__license__ = "MIT"
+__maintainer__ = "Damien Coupry"
+__version__ = '2.3.2'
+__status__ = "production"
+
+
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+
+from autografs.utils import tracing
+
+import logging
+logger = logging.getLogger(__name__)
+
+# upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0,
+           float("inf"))
+
+
+class MetricsCollector(object):
+    """In-process throughput metrics of a generation run.
+
+    The collector receives the spans of tracing as a hook: every
+    call to Autografs.make is counted as a framework, an estimate,
+    a rejection or a failure by exception type, every stage feeds
+    a latency histogram, and the time spent is accumulated by
+    topology. Collectors of different processes can be merged,
+    and are periodically dumped to a local file in JSON or
+    Prometheus textfile format.
+    """
+
+    def __init__(self,
+                 path=None,
+                 fmt="json",
+                 interval=60.0):
+        """Constructor for the metrics collector.
+
+        Parameters
+        ----------
+        path: str or Path, optional
+            file to which the metrics are dumped. If not
+            given, the metrics are only kept in memory.
+        fmt: str, optional
+            "json" or "prometheus"
+        interval: float, optional
+            minimum time between two dumps, in seconds
+
+        Returns
+        -------
+        None
+        """
+        if fmt not in ("json", "prometheus"):
+            raise ValueError("fmt has to be 'json' or 'prometheus'.")
+        self.path = None if path is None else os.path.abspath(str(path))
+        self.fmt = fmt
+        self.interval = float(interval)
+        self._lock = threading.Lock()
+        self._last_dump = time.time()
+        self.start = time.time()
+        self.last = self.start
+        # outcome of each generation
+        self.results = defaultdict(int)
+        self.failures = defaultdict(int)
+        # latency histograms, by stage: bucket counts, sum
+        self.histograms = {}
+        # time spent, count and slowest generation by topology
+        self.topologies = {}
+        return None
+
+    def __enter__(self):
+        """Context manager intrinsic: start collecting"""
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        """Context manager intrinsic: stop collecting and dump"""
+        self.uninstall()
+        if self.path is not None:
+            self.dump()
+        return False
+
+    def install(self):
+        """Start receiving the spans of every thread"""
+        tracing.add_hook(self.observe)
+        return None
+
+    def uninstall(self):
+        """Stop receiving spans"""
+        tracing.remove_hook(self.observe)
+        return None
+
+    def observe(self,
+                span):
+        """Account for a finished span.
+
+        Parameters
+        ----------
+        span: autografs.utils.tracing.Span
+            the finished stage
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self.last = time.time()
+            self._add_latency(span.name, span.duration)
+            if span.name == "make":
+                error = span.attributes.get("error")
+                if error is not None:
+                    self.failures[error] += 1
+                else:
+                    result = span.attributes.get("result", "framework")
+                    self.results[result] += 1
+                topology = str(span.attributes.get("topology"))
+                total, count, slowest = self.topologies.get(topology,
+                                                            (0.0, 0, 0.0))
+                self.topologies[topology] = (total + span.duration,
+                                             count + 1,
+                                             max(slowest, span.duration))
+            dump = (self.path is not None and
+                    self.last - self._last_dump >= self.interval)
+        if dump:
+            self.dump()
+        return None
+
+    def _add_latency(self,
+                     stage,
+                     duration):
+        """Add a duration to the histogram of a stage"""
+        counts, total = self.histograms.get(stage,
+                                            ([0] * len(BUCKETS), 0.0))
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                counts[i] += 1
+                break
+        self.histograms[stage] = (counts, total + duration)
+        return None
+
+    def get_throughput(self):
+        """Return the number of frameworks made per second"""
+        elapsed = max(self.last - self.start, 1e-9)
+        return self.results["framework"] / elapsed
+
+    def get_slowest_topologies(self,
+                               n=10):
+        """Return the topologies with the longest mean generation time.
+
+        Parameters
+        ----------
+        n: int, optional
+            number of topologies to return
+
+        Returns
+        -------
+        slowest: [(str, float, float, int), ...]
+            name, mean and maximum time in seconds, and
+            number of generations of each topology
+        """
+        slowest = [(name, total / count, longest, count)
+                   for name, (total, count, longest)
+                   in self.topologies.items()]
+        slowest.sort(key=lambda t: -t[1])
+        return slowest[:n]
+
+    def merge(self,
+              other):
+        """Add the counts of another collector, from another process.
+
+        Parameters
+        ----------
+        other: MetricsCollector or dict
+            the collector, or its as_dict() form
+
+        Returns
+        -------
+        None
+        """
+        if isinstance(other, MetricsCollector):
+            other = other.as_dict()
+        with self._lock:
+            self.start = min(self.start, other["start"])
+            self.last = max(self.last, other["last"])
+            for key, value in other["results"].items():
+                self.results[key] += value
+            for key, value in other["failures"].items():
+                self.failures[key] += value
+            for stage, (counts, total) in other["histograms"].items():
+                counts0, total0 = self.histograms.get(
+                    stage, ([0] * len(BUCKETS), 0.0))
+                self.histograms[stage] = ([a + b for a, b in zip(counts0,
+                                                                 counts)],
+                                          total0 + total)
+            for name, (total, count, longest) in other["topologies"].items():
+                total0, count0, longest0 = self.topologies.get(name,
+                                                               (0.0, 0, 0.0))
+                self.topologies[name] = (total0 + total,
+                                         count0 + count,
+                                         max(longest0, longest))
+        return None
+
+    def as_dict(self):
+        """Return the metrics as a JSON serializable dictionary"""
+        with self._lock:
+            return {"start": self.start,
+                    "last": self.last,
+                    "results": dict(self.results),
+                    "failures": dict(self.failures),
+                    "histograms": {k: (list(c), t) for k, (c, t)
+                                   in self.histograms.items()},
+                    "topologies": dict(self.topologies)}
+
+    @classmethod
+    def load(cls,
+             paths):
+        """Return a collector merging JSON dumps of other collectors.
+
+        Parameters
+        ----------
+        paths: [str, ...]
+            the files written by MetricsCollector.dump
+            in JSON format, e.g. one per worker
+
+        Returns
+        -------
+        collector: autografs.utils.metrics.MetricsCollector
+            the merged metrics
+        """
+        collector = cls()
+        collector.start = float("inf")
+        collector.last = 0.0
+        for path in paths:
+            with open(str(path), "r") as fileobj:
+                collector.merge(json.load(fileobj))
+        return collector
+
+    def to_prometheus(self):
+        """Return the metrics in the Prometheus textfile format"""
+        data = self.as_dict()
+        lines = []
+
+        def header(name, kind, text):
+            lines.append("# HELP {0} {1}".format(name, text))
+            lines.append("# TYPE {0} {1}".format(name, kind))
+
+        header("autografs_generations_total", "counter",
+               "Calls to Autografs.make by result.")
+        for result, value in sorted(data["results"].items()):
+            lines.append(('autografs_generations_total{{result="{0}"}}'
+                          ' {1}').format(result, value))
+        header("autografs_failures_total", "counter",
+               "Failed generations by exception type.")
+        for error, value in sorted(data["failures"].items()):
+            lines.append(('autografs_failures_total{{exception="{0}"}}'
+                          ' {1}').format(error, value))
+        header("autografs_frameworks_per_second", "gauge",
+               "Frameworks made per second since the start.")
+        lines.append("autografs_frameworks_per_second {0:.6g}".format(
+            self.get_throughput()))
+        header("autografs_stage_seconds", "histogram",
+               "Duration of the generation stages.")
+        for stage, (counts, total) in sorted(data["histograms"].items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(('autografs_stage_seconds_bucket{{stage="{0}",'
+                              'le="{1}"}} {2}').format(stage, le, cumulative))
+            lines.append(('autografs_stage_seconds_sum{{stage="{0}"}}'
+                          ' {1:.6g}').format(stage, total))
+            lines.append(('autografs_stage_seconds_count{{stage="{0}"}}'
+                          ' {1}').format(stage, cumulative))
+        header("autografs_topology_seconds_total", "counter",
+               "Time spent generating each topology.")
+        for name, (total, _, _) in sorted(data["topologies"].items()):
+            lines.append(('autografs_topology_seconds_total{{topology="{0}"}}'
+                          ' {1:.6g}').format(name, total))
+        return "\n".join(lines) + "\n"
+
+    def dump(self,
+             path=None,
+             fmt=None):
+        """Write the metrics to a file, atomically.
+
+        Parameters
+        ----------
+        path: str or Path, optional
+            defaults to the path of the collector
+        fmt: str, optional
+            "json" or "prometheus", defaults to
+            the format of the collector
+
+        Returns
+        -------
+        None
+        """
+        path = self.path if path is None else os.path.abspath(str(path))
+        fmt = self.fmt if fmt is None else fmt
+        if fmt == "prometheus":
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.as_dict())
+        # readers never see a partially written file
+        tmp = "{0}.{1}.tmp".format(path, os.getpid())
+        with open(tmp, "w") as fileobj:
+            fileobj.write(text)
+        os.replace(tmp, path)
+        self._last_dump = time.time()
+        logger.debug("Metrics written to {0}".format(path))
+        return None
@@ -239,3 +239,101 @@ def is_valid_op(mol,
     distances = numpy.array(distances)
     is_valid = (distances < epsilon).all()
     return is_valid
+
+
+def batch_procrustes(X,
+                     Y,
+                     method="SVD"):
+    """Return the optimal rotations between stacks of coordinates
+
+    Solves procrustes(X[i], Y[i], method) for all i at once,
+    with stacked decompositions instead of a python loop.
+
+    Parameters
+    ----------
+    X: numpy.array
+        3D cartesian coordinates of point
+        clouds. shape: NxNpointsx3
+    Y: numpy.array
+        3D cartesian coordinates of point
+        clouds. shape: NxNpointsx3
+    method: str
+        which method to use for the solution
+        of the orthogonal procrustes problem.
+        Q means quaternions, SVD means singular
+        value decomposition
+
+    Returns
+    -------
+    R: numpy.array
+        the rotation matrices for best alignment
+        of X on Y. shape: Nx3x3
+    scale: numpy.array
+        the isotropic scaling factors of X to Y
+    """
+    X = numpy.array(X, dtype=float)
+    Y = numpy.array(Y, dtype=float)
+    # stacked covariance matrices
+    H = numpy.matmul(X.transpose(0, 2, 1), Y)
+    if method == "Q":
+        # four dimensional matrices for quaternion calculation
+        P = numpy.empty((len(H), 4, 4))
+        P[:, 0, 0] = H[:, 0, 0] + H[:, 1, 1] + H[:, 2, 2]
+        P[:, 1, 1] = H[:, 0, 0] - H[:, 1, 1] - H[:, 2, 2]
+        P[:, 2, 2] = H[:, 1, 1] - H[:, 0, 0] - H[:, 2, 2]
+        P[:, 3, 3] = H[:, 2, 2] - H[:, 1, 1] - H[:, 0, 0]
+        P[:, 0, 1] = P[:, 1, 0] = H[:, 1, 2] - H[:, 2, 1]
+        P[:, 0, 2] = P[:, 2, 0] = H[:, 2, 0] - H[:, 0, 2]
+        P[:, 0, 3] = P[:, 3, 0] = H[:, 0, 1] - H[:, 1, 0]
+        P[:, 1, 2] = P[:, 2, 1] = H[:, 0, 1] + H[:, 1, 0]
+        P[:, 1, 3] = P[:, 3, 1] = H[:, 2, 0] + H[:, 0, 2]
+        P[:, 2, 3] = P[:, 3, 2] = H[:, 1, 2] + H[:, 2, 1]
+        # compute eigenvalues
+        eigenvalues, eigenvectors = numpy.linalg.eigh(P)
+        # quaternions
+        best = numpy.argmax(eigenvalues, axis=1)
+        q = eigenvectors[numpy.arange(len(P)), :, best]
+        q /= numpy.linalg.norm(q, axis=1)[:, None]
+        q0, q1, q2, q3 = q.T
+        # orthogonal rotation matrices
+        R = numpy.empty((len(P), 3, 3))
+        R[:, 0, 0] = (q0**2) + (q1**2) - (q2**2) - (q3**2)
+        R[:, 0, 1] = 2 * (q1 * q2 - q0 * q3)
+        R[:, 0, 2] = 2 * (q1 * q3 + q0 * q2)
+        R[:, 1, 0] = 2 * (q1 * q2 + q0 * q3)
+        R[:, 1, 1] = (q0**2) - (q1**2) + (q2**2) - (q3**2)
+        R[:, 1, 2] = 2 * (q2 * q3 - q0 * q1)
+        R[:, 2, 0] = 2 * (q1 * q3 - q0 * q2)
+        R[:, 2, 1] = 2 * (q2 * q3 + q0 * q1)
+        R[:, 2, 2] = (q0**2) - (q1**2) - (q2**2) + (q3**2)
+        scale = numpy.ones(len(P))
+    elif method == "SVD":
+        u, w, vt = numpy.linalg.svd(H.transpose(0, 2, 1))
+        R = numpy.matmul(u, vt)
+        scale = w.sum(axis=1)
+    else:
+        raise NotImplementedError("Unknown method. Implemented are SVD or Q")
+    return R, scale
+
+
+def get_random_state(seed=None):
+    """Return a random number generator from a seed.
+
+    Parameters
+    ----------
+    seed: None, int, numpy.random.RandomState or numpy.random.Generator
+        None uses the global numpy generator, so that
+        numpy.random.seed keeps working. An integer gives
+        a new RandomState, whose stream does not depend on
+        the numpy version. Generators are returned as is.
+
+    Returns
+    -------
+    rng: object
+        anything with a numpy compatible choice method
+    """
+    if seed is None:
+        return numpy.random
+    if hasattr(seed, "choice"):
+        return seed
+    return numpy.random.RandomState(seed)
@@ -13,19 +13,15 @@ __status__ = "production"
 import os
 import sys
 import numpy
+import itertools
+import threading
 import logging
 import _pickle as pickle
 
 import ase
-from ase.spacegroup import crystal
-from ase.data import chemical_symbols
-from ase.neighborlist import NeighborList
 
 from collections import Counter
 
-from scipy.cluster.hierarchy import fclusterdata as cluster
-import warnings
-
 
 from autografs.utils import symmetry
 from autografs.utils.mmanalysis import analyze_mm
@@ -34,6 +30,9 @@ from autografs.utils import __data__
 
 logger = logging.getLogger(__name__)
 
+# guards the counts of SBU sharing a template, copied from many threads
+_owners_lock = threading.Lock()
+
 
 class SBU(object):
     """Container class for a building unit information"""
@@ -43,15 +42,51 @@ class SBU(object):
                  atoms=None):
         """Constructor for a building unit, from an ASE Atoms."""
         self.name = name
+        # number of SBU sharing the same Atoms object
+        self._owners = [1]
         self.atoms = atoms
         self.mmtypes = []
         self.bonds = []
         self.shape = []
         self.pg = None
+        # symmetry operations of the dummies, in the template frame
+        self.symmops = []
         if self.atoms is not None:
             self._analyze()
         return None
 
+    @property
+    def atoms(self):
+        """The building unit as ASE Atoms.
+
+        Copies of an SBU share the same template Atoms and only
+        store the rigid transformation and the dummy tags that
+        place them in their slot. Accessing this attribute gives
+        the unit its own Atoms, with the placement applied, so
+        that it can be edited. Read-only access should go through
+        get_atoms, get_positions and get_tags instead.
+        """
+        placed = (self._rotation is not None or
+                  self._translation is not None or
+                  self._tags is not None)
+        if self._atoms is not None and (placed or self._owners[0] > 1):
+            self.atoms = self.get_atoms()
+        return self._atoms
+
+    @atoms.setter
+    def atoms(self,
+              atoms):
+        """Setter for the atoms attribute"""
+        with _owners_lock:
+            self._owners[0] -= 1
+        self._owners = [1]
+        # derived data, shared by copies of the same atoms
+        self._cache = {}
+        self._atoms = atoms
+        self._rotation = None
+        self._translation = None
+        self._tags = None
+
     def __repr__(self):
         """Uses repr to print the string."""
         return self.name
@@ -61,12 +96,13 @@ class SBU(object):
         strings = []
         strings.append("\nSBU: {name}\n".format(name=self.name))
         # catch for empty object
-        if self.atoms is None:
+        if self._atoms is None:
             return "".join(strings)
+        atoms = self.get_atoms()
         strings.append("Coordination: {co}\n".format(co=self.shape[-1]))
         if self.pg is not None:
             strings.append("Detected Point Group: {pg}\n".format(pg=self.pg))
-        for atom in self.atoms:
+        for atom in atoms:
             p0, p1, p2 = atom.position
             sy = atom.symbol
             tp = self.mmtypes[atom.index]
@@ -114,6 +150,10 @@ class SBU(object):
     def copy(self):
         """Return a copy of the object
 
+        The copy is cheap: the template Atoms is shared until
+        either SBU is edited, and the bonds and mmtypes arrays,
+        which are only ever replaced, are shared as well.
+
         Parameters
         ----------
         None
@@ -121,13 +161,23 @@ class SBU(object):
         Returns
         -------
         new: autografs.utils.sbu.SBU
-            a new deep copy of the current SBU
+            a new copy of the current SBU
         """
         new = SBU(name=str(self.name), atoms=None)
-        new.set_atoms(atoms=self.get_atoms(), analyze=False)
-        new.mmtypes = numpy.copy(self.mmtypes)
-        new.bonds = numpy.copy(self.bonds)
+        new._atoms = self._atoms
+        new._owners = self._owners
+        new._cache = self._cache
+        with _owners_lock:
+            self._owners[0] += 1
+        # the placement is never modified in place
+        new._rotation = self._rotation
+        new._translation = self._translation
+        new._tags = self._tags
+        new.mmtypes = self.mmtypes
+        new.bonds = self.bonds
         new.shape = list(self.shape)
+        new.pg = self.pg
+        new.symmops = self.symmops
         return new
 
     def is_compatible(self,
@@ -174,7 +224,48 @@ class SBU(object):
         return compatible
 
     def get_atoms(self):
-        """Return a copy of the topology as ASE Atoms.
+        """Return a copy of the SBU as ASE Atoms.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        atoms: ase.Atoms
+            the template atoms, placed in the slot
+
+        """
+        atoms = self._atoms.copy()
+        atoms.set_positions(self.get_positions())
+        atoms.set_tags(self.get_tags())
+        return atoms
+
+    def get_positions(self):
+        """Return the positions of the SBU atoms in its slot.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        positions: numpy.array
+            the transformed positions of the template atoms
+        """
+        positions = self._atoms.get_positions()
+        if self._rotation is not None:
+            positions = positions.dot(self._rotation)
+        if self._translation is not None:
+            positions += self._translation
+        return positions
+
+    def get_atomic_numbers(self):
+        """Return the atomic numbers of the SBU atoms, 0 for dummies."""
+        return self._atoms.get_atomic_numbers()
+
+    def get_tags(self):
+        """Return the tags of the SBU atoms.
 
         Parameters
         ----------
@@ -182,15 +273,159 @@ class SBU(object):
 
         Returns
         -------
-        atoms: set
-            the copy of the current topology atoms attribute
+        tags: numpy.array
+            the template tags, with the dummies
+            tagged for their slot
+        """
+        tags = self._atoms.get_tags()
+        if self._tags is not None:
+            tags[self._atoms.numbers == 0] = self._tags
+        return tags
+
+    def get_terminal_sites(self):
+        """Return the atoms bonded to exactly one atom by a single bond.
+
+        These are the sites that can be functionalized. The index
+        is computed once from the bond matrix and shared with
+        the copies of the SBU.
 
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        sites: numpy.array
+            the indices of the terminal atoms, dummies excluded
         """
-        return self.atoms.copy()
+        cached = self._cache.get("terminal")
+        if cached is not None and cached[0] is self.bonds:
+            return cached[1]
+        bonds = numpy.asarray(self.bonds)
+        numbers = self.get_atomic_numbers()
+        if bonds.shape != (len(numbers), len(numbers)):
+            return numpy.zeros(0, dtype=int)
+        single = ((bonds > 0.0).sum(axis=1) == 1) & (bonds.max(axis=1) == 1.0)
+        sites = numpy.where(single & (numbers > 0))[0]
+        self._cache["terminal"] = (self.bonds, sites)
+        return sites
+
+    def transform(self,
+                  rotation=None,
+                  translation=None):
+        """Move the SBU rigidly within its slot.
+
+        The positions p become p.rotation + translation. Only the
+        placement is updated: the template atoms are not copied.
+
+        Parameters
+        ----------
+        rotation: numpy.array, optional
+            3x3 matrix applied to the positions
+        translation: numpy.array, optional
+            vector added to the positions, after rotation
+
+        Returns
+        -------
+        None
+        """
+        if rotation is not None:
+            rotation = numpy.asarray(rotation, dtype=float)
+            if self._translation is not None:
+                self._translation = self._translation.dot(rotation)
+            if self._rotation is not None:
+                rotation = self._rotation.dot(rotation)
+            self._rotation = rotation
+        if translation is not None:
+            translation = numpy.asarray(translation, dtype=float)
+            if self._translation is not None:
+                translation = self._translation + translation
+            self._translation = translation
+        return None
+
+    def get_dummy_permutations(self,
+                               tol=0.1):
+        """Return the permutations of the dummies by the SBU symmetry.
+
+        Each symmetry operation S of the point group maps the dummy
+        positions X onto themselves, up to a reordering p such that
+        X.S = X[p]. The permutations of the known operations are
+        closed under composition to give the whole group.
+
+        Parameters
+        ----------
+        tol: float
+            tolerance on the positions of the normalized dummies
+
+        Returns
+        -------
+        permutations: numpy.array
+            the index arrays of the permutations,
+            identity included. shape: (Nops x Ndummies)
+        """
+        xis = numpy.where(self._atoms.numbers == 0)[0]
+        X = self._atoms.positions[xis]
+        X = X - X.mean(axis=0)
+        norm = numpy.linalg.norm(X, axis=1).max()
+        if norm > 1e-6:
+            X /= norm
+        generators = set()
+        for op in self.symmops:
+            d = numpy.linalg.norm(X.dot(op)[:, None, :] - X[None, :, :],
+                                  axis=2)
+            p = d.argmin(axis=1)
+            if len(set(p)) == len(xis) and d.min(axis=1).max() < tol:
+                generators.add(tuple(p))
+        permutations = {tuple(range(len(xis)))}
+        frontier = list(permutations)
+        while frontier:
+            new = set()
+            for p in frontier:
+                for g in generators:
+                    q = tuple(p[i] for i in g)
+                    if q not in permutations:
+                        new.add(q)
+            permutations |= new
+            frontier = list(new)
+        return numpy.array(sorted(permutations), dtype=int)
+
+    def get_dummy_orderings(self):
+        """Return one ordering of the dummies per symmetry class.
+
+        Orderings of the dummies that only differ by a symmetry
+        operation of the SBU are equivalent for the alignment. The
+        orderings are computed once, from all k! of them in chunks
+        of at most 5040, and shared with the copies of the SBU.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        orders: numpy.array
+            the canonical orderings, as index arrays
+            of the dummies. shape: (Norders x Ndummies)
+        """
+        cached = self._cache.get("orderings")
+        if cached is not None and cached[0] is self.symmops:
+            return cached[1]
+        k = int((self._atoms.numbers == 0).sum())
+        orders = numpy.array(list(itertools.permutations(range(k))))
+        # canonical representative of each class of orderings
+        symmetry = self.get_dummy_permutations()
+        weights = k ** numpy.arange(k)
+        codes = numpy.concatenate([
+            symmetry[:, orders[i:i + 5040]].dot(weights).min(axis=0)
+            for i in range(0, len(orders), 5040)])
+        _, keep = numpy.unique(codes, return_index=True)
+        orders = orders[keep]
+        self._cache["orderings"] = (self.symmops, orders)
+        return orders
 
     def _analyze(self):
         """Guesses the mmtypes, bonds and pointgroup"""
-        dummies = ase.Atoms([x for x in self.atoms if x.symbol == "X"])
+        dummies = ase.Atoms([x for x in self._atoms if x.symbol == "X"])
         if len(dummies) > 0:
             pg = symmetry.PointGroup(mol=dummies.copy(), tol=0.1)
             max_order = min(8, len(dummies))
@@ -198,6 +433,12 @@ class SBU(object):
                                                    max_order=max_order)
             self.shape = shape
             self.pg = pg.schoenflies
+            symmops = [pg.symmops["I"]]
+            if pg.symmops["-I"] is not None:
+                symmops.append(pg.symmops["-I"])
+            for key in ("C", "S", "sigma"):
+                symmops += [op for _, _, op in pg.symmops[key]]
+            self.symmops = symmops
         bonds, mmtypes = analyze_mm(self.get_atoms())
         self.bonds = bonds
         self.mmtypes = mmtypes
@@ -205,17 +446,45 @@ class SBU(object):
 
     def transfer_tags(self,
                       fragment):
-        """Transfer tags between an aligned fragment and the SBU"""
-        # we keep a record of used tags.
-        unused = [x.index for x in self.atoms if x.symbol == "X"]
-        for atom in fragment:
-            ids = [s.index for s in self.atoms if s.index in unused]
-            pf = atom.position
-            ps = self.atoms.positions[unused]
-            d = numpy.linalg.norm(ps - pf, axis=1)
-            si = ids[numpy.argmin(d)]
-            self.atoms[si].tag = atom.tag
-            unused.remove(si)
+        """Transfer tags between an aligned fragment and the SBU
+
+        Every dummy of the fragment is matched to a distinct
+        dummy of the SBU in one shot, by solving the assignment
+        problem on the matrix of distances between the two sets.
+
+        Parameters
+        ----------
+        fragment: ase.Atoms
+            the aligned slot, made only of tagged dummies
+
+        Returns
+        -------
+        None
+        """
+        xis = numpy.where(self._atoms.numbers == 0)[0]
+        if len(xis) < len(fragment):
+            raise ValueError(("SBU {name} has {nx} dummies for a"
+                              " slot of {nf}.").format(name=self.name,
+                                                       nx=len(xis),
+                                                       nf=len(fragment)))
+        from scipy.optimize import linear_sum_assignment
+        pf = fragment.positions
+        ps = self.get_positions()[xis]
+        d = numpy.linalg.norm(pf[:, None, :] - ps[None, :, :], axis=2)
+        rows, cols = linear_sum_assignment(d)
+        # the matching is unambiguous if every fragment dummy
+        # is assigned its strictly closest SBU dummy
+        nearest = numpy.argmin(d, axis=1)
+        ambiguous = (nearest[rows] != cols).any()
+        if d.shape[1] > 1:
+            closest = numpy.partition(d, 1, axis=1)[:, :2]
+            ambiguous |= ((closest[:, 1] - closest[:, 0]) < 1e-3).any()
+        if ambiguous:
+            logger.warning(("Ambiguous dummy matching"
+                            " for SBU {name}").format(name=self.name))
+        tags = self.get_tags()[xis]
+        tags[cols] = fragment.get_tags()[rows]
+        self._tags = tags
         return None
 
 
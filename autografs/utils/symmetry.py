@@ -10,12 +10,11 @@ __version__ = '2.3.2'
 __status__  = "production"
 
 import scipy.spatial
-import scipy.cluster.hierarchy
-import ase.visualize
 import itertools
 import numpy
 
 from autografs.utils.operations import rotation, reflection, inertia, is_valid_op
+from autografs.utils import budget
 
 import logging
 logger = logging.getLogger(__name__)
@@ -213,6 +212,7 @@ class PointGroup(object):
         else:
             # Iterate through all pairs of atoms to find mirror
             for s1, s2 in itertools.combinations(self.mol, 2):
+                budget.check("symmetry")
                 if s1.symbol == s2.symbol:
                     normal = s1.position - s2.position
                     if normal.dot(axis) < self.tol:
@@ -244,6 +244,7 @@ class PointGroup(object):
         def not_on_axis(index):
             v = numpy.cross(self.mol.positions[index], axis)
             return numpy.linalg.norm(v) > self.tol
+        import scipy.cluster.hierarchy
         valid_sets = []
         numbers  = self.mol.get_atomic_numbers()
         dists    = numpy.linalg.norm(self.mol.get_positions(),axis=1,keepdims=True)
@@ -338,6 +339,7 @@ class PointGroup(object):
         rot_present = {2:False,3:False,4:False,5:False}
         test_set = self.find_possible_equivalent_positions()
         for c1, c2, c3 in itertools.combinations(test_set, 3):
+            budget.check("symmetry")
             for cc1, cc2 in itertools.combinations([c1, c2, c3], 2):
                 if not rot_present[2]:
                     test_axis = cc1 + cc2
@@ -369,47 +371,62 @@ class PointGroup(object):
 def get_potential_axes(mol):
     """Return all potential symmetry axes.
     faces, nodes, midway points, etc.
+    The candidates are built as arrays, in the
+    order in which unique_axes considers them.
+    Null candidates, which are all kept, come last.
     """
-    potential_axes = []
+    positions = mol.get_positions()
     try:
         # full analysis needed
-        qhull = scipy.spatial.ConvexHull(mol.get_positions())
+        qhull = scipy.spatial.ConvexHull(positions)
         logger.debug("Using Convex Hull algorithm for axis detection.")
-        for equation in qhull.equations:
-            # normal of simplices
-            axis = equation[0:3]
-            potential_axes.append(axis)
-        for node in qhull.vertices:
-            # exterior points
-            axis = qhull.points[node]
-            norm = numpy.linalg.norm(axis)
-            potential_axes.append(axis)
-        for simplex in qhull.simplices:
-            for side in itertools.combinations(list(simplex), 2):
-                # middle of side
-                side = numpy.array(side)
-                axis = qhull.points[side].mean(axis=0)
-                potential_axes.append(axis)
-                # perpendicular to side
-                a0,a1 = qhull.points[side]  
-                axis = numpy.cross(a0,a1)
-                potential_axes.append(axis)
+        # normal of simplices
+        normals = qhull.equations[:,0:3]
+        # exterior points
+        vertices = qhull.points[qhull.vertices]
+        # sides of each simplex: Fx3x2x3 points
+        pairs = numpy.array(list(itertools.combinations(
+                    range(qhull.simplices.shape[1]),2)))
+        sides = qhull.points[qhull.simplices[:,pairs]]
+        # middle of side, then perpendicular to side
+        middles = sides.mean(axis=2)
+        crosses = numpy.cross(sides[:,:,0],sides[:,:,1])
+        edges = numpy.stack([middles,crosses],axis=2).reshape(-1,3)
+        potential_axes = numpy.vstack([normals,vertices,edges])
     except scipy.spatial.qhull.QhullError:
         logger.debug("Planar connectivity detected.")
         #coplanarity detected
-        positions = mol.get_positions()
-        potential_axes += [axis for axis in positions]
+        i,j = numpy.triu_indices(len(positions),k=1)
         # since coplanar, any two simplices describe the plane
-        for side in itertools.combinations(list(positions), 2):
-            # middle of side
-            axis = numpy.array(side).mean(axis=0)
-            potential_axes.append(axis)             
-            axis = numpy.cross(side[0],side[1])
-            potential_axes.append(axis)     
-        for a0,a1 in itertools.combinations(list(potential_axes),2):
-            axis = numpy.cross(a0,a1)
-            potential_axes.append(axis)     
-    potential_axes = numpy.array(potential_axes)
+        sides = numpy.stack([positions[i],positions[j]],axis=1)
+        middles = sides.mean(axis=1)
+        crosses = numpy.cross(positions[i],positions[j])
+        edges = numpy.stack([middles,crosses],axis=1).reshape(-1,3)
+        axes = numpy.vstack([positions,edges])
+        budget.check("symmetry")
+        # identical candidates, up to the sign, only add parallel
+        # or null crosses: the first one of each is crossed
+        first = {}
+        keep = []
+        counts = []
+        for index,axis in enumerate(numpy.round(axes,6)):
+            key = max(tuple(axis),tuple(-axis))
+            if key in first:
+                counts[first[key]] += 1
+                continue
+            first[key] = len(keep)
+            keep.append(index)
+            counts.append(1)
+        unique = axes[keep]
+        counts = numpy.array(counts)
+        # every pair of the unique candidates, at once
+        i,j = numpy.triu_indices(len(unique),k=1)
+        crosses = numpy.cross(unique[i],unique[j])
+        null = numpy.linalg.norm(crosses,axis=1)<1e-3
+        # null crosses are all kept as axes: count those of every pair
+        nulls = (counts*(counts-1)//2).sum()+(counts[i]*counts[j])[null].sum()
+        potential_axes = numpy.vstack([axes,crosses[~null],
+                                       numpy.zeros((nulls,3))])
     norm = numpy.linalg.norm(potential_axes,axis=1)
     norm[norm<1e-3] = 1.0
     potential_axes /= norm[:,None]
@@ -420,19 +437,20 @@ def get_potential_axes(mol):
     return axes
 
 def unique_axes(potential_axes,epsilon=0.1):
-    """Return non colinear potential_axes only"""
-    axes = [potential_axes[0],]
-    indices = []
-    for axis in potential_axes[1:]:
-        colinear = False
-        for seen_axis in axes:
-            dot = abs(seen_axis.dot(axis))
-            if dot>1.0-epsilon:
-                colinear = True
-                break
-        if not colinear:
-            axes.append(axis)
-    return numpy.asarray(axes)
+    """Return non colinear potential_axes only.
+    The first axis of each direction is kept: every
+    kept axis removes the remaining colinear ones at once.
+    """
+    potential_axes = numpy.asarray(potential_axes)
+    candidates = numpy.arange(len(potential_axes))
+    kept = []
+    while candidates.size:
+        budget.check("symmetry")
+        axis,candidates = candidates[0],candidates[1:]
+        kept.append(axis)
+        dots = numpy.abs(potential_axes[candidates].dot(potential_axes[axis]))
+        candidates = candidates[dots<=1.0-epsilon]
+    return potential_axes[kept]
 
 def get_symmetry_elements(mol, 
                           max_order=8,
@@ -470,6 +488,7 @@ def get_symmetry_elements(mol,
     principal_order = 1
     principal_axes  = []
     for axis in axes:
+        budget.check("symmetry")
         for order in range(2,max_order+1):
             rot = rotation(axis,order)
             has_rot = is_valid_op(mol,rot)
@@ -13,23 +13,21 @@ __status__ = "production"
 import os
 import sys
 import numpy
-import copy
+import itertools
 import _pickle as pickle
 
 import ase
 from ase import Atom
 from ase import Atoms
-from ase.spacegroup import crystal
 from ase.spacegroup import Spacegroup
-from ase.data import chemical_symbols
-from ase.neighborlist import NeighborList
+from ase.neighborlist import neighbor_list
+from ase.geometry import get_distances
 from collections import Counter
 
-from scipy.cluster.hierarchy import fclusterdata as cluster
-
-import warnings
+from scipy.spatial import cKDTree
 
 from autografs.utils import symmetry
+from autografs.utils import budget
 from autografs.utils import __data__
 
 
@@ -37,9 +35,6 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-warnings.filterwarnings("error")
-
-
 class Topology(object):
     """Contener class for the topology information"""
 
@@ -57,6 +52,9 @@ class Topology(object):
         self.shapes = {}
         self.pointgroups = {}
         self.equivalent_sites = []
+        # symmetry operations in fractional coordinates,
+        # read from the spacegroup when first needed
+        self._operations = None
         # fill it in
         if analyze:
             self._analyze()
@@ -65,6 +63,12 @@ class Topology(object):
     def copy(self):
         """Return a copy of itself as a new instance
 
+        The results of the analysis are never modified in place
+        once computed: fragments, shapes, pointgroups and
+        equivalent sites are shared with the copy. Only the
+        atoms, whose cell is rescaled during generation,
+        are copied.
+
         Parameters
         ----------
         None
@@ -72,13 +76,16 @@ class Topology(object):
         Returns
         -------
         new: autografs.utils.topology.Topology
-            a deep copy of the current Topology
+            a copy of the current Topology
         """
         new = self.__class__(name=str(self.name),
                              atoms=self.atoms.copy(),
                              analyze=False)
-        new.fragments = copy.deepcopy(self.fragments)
-        new.shapes = copy.deepcopy(self.shapes)
+        new.fragments = dict(self.fragments)
+        new.shapes = dict(self.shapes)
+        new.pointgroups = dict(self.pointgroups)
+        new.equivalent_sites = list(self.equivalent_sites)
+        new._operations = self._operations
         return new
 
     def get_atoms(self):
@@ -96,6 +103,36 @@ class Topology(object):
         """
         return self.atoms.copy()
 
+    def get_cellpar(self,
+                    alpha=(1.0, 1.0, 1.0)):
+        """Return the cell parameters scaled by a factor alpha.
+
+        This is the starting point of the cell refinement of a
+        framework, where alpha is the sum of the scaling vectors
+        of all its aligned building units.
+
+        Parameters
+        ----------
+        alpha: (float, float, float), optional
+            scaling factor along each cell vector
+
+        Returns
+        -------
+        cellpar: numpy.array
+            a, b, c, alpha, beta, gamma for a 3D topology,
+            or only a, b, gamma for a 2D topology.
+        """
+        cell0 = self.atoms.get_cell()
+        norm0 = cell0/numpy.linalg.norm(cell0, axis=0)
+        pbc = sum(self.atoms.get_pbc())
+        sn0 = numpy.linalg.norm(norm0, axis=0)
+        sc0 = numpy.linalg.norm(cell0, axis=0)
+        cellpar = ase.geometry.cell_to_cellpar(norm0, radians=False)
+        cellpar[:3] *= numpy.asarray(alpha)*sn0/sc0
+        if pbc == 2:
+            cellpar = cellpar[[0, 1, 5]]
+        return cellpar
+
     def get_fragments(self):
         """Return a concatenated version of the fragments.
 
@@ -112,11 +149,169 @@ class Topology(object):
         frags = ase.Atoms(cell=self.atoms.get_cell(),
                           pbc=self.atoms.get_pbc())
         for idx, frag in self.fragments.items():
+            # the fragments are shared between copies
+            frag = frag.copy()
             tags = numpy.ones(len(frag)) * idx
             frag.set_tags(tags)
             frags += frag
         return frags
 
+    def get_supercell(self,
+                      m=(2, 2, 2)):
+        """Return a supercell of the topology, without new analysis.
+
+        The shapes and pointgroups of the primitive topology are
+        reused for every image of a slot, and the fragments are
+        rebuilt from the current positions of the tagged dummies
+        and their lattice shifts. Atom indices follow the
+        ordering of ase.Atoms.repeat.
+
+        Parameters
+        ----------
+        m: int or (int, int, int)
+            multiplicator along each cell vector
+
+        Returns
+        -------
+        supercell: autografs.utils.topology.Topology
+            the topology of the supercell
+        """
+        if isinstance(m, int):
+            m = (m, m, m)
+        m = numpy.asarray(m, dtype=int)
+        n = len(self.atoms)
+        cell = numpy.asarray(self.atoms.get_cell())
+        # image offsets, ordered as in ase.Atoms.repeat
+        offsets = numpy.array(list(itertools.product(*[range(i) for i in m])))
+        strides = numpy.array([m[1] * m[2], m[2], 1])
+        atoms = self.atoms.repeat(tuple(m))
+        tags = numpy.zeros(len(atoms), dtype=int)
+        Xis = numpy.where(atoms.get_atomic_numbers() == 0)[0]
+        tags[Xis] = Xis + 1
+        atoms.set_tags(tags)
+        supercell = self.__class__(name=str(self.name),
+                                   atoms=atoms,
+                                   analyze=False)
+        positions = self.atoms.get_positions()
+        for ai, fragment in self.fragments.items():
+            xis = fragment.get_tags() - 1
+            if fragment.has("shifts"):
+                shifts = fragment.get_array("shifts")
+            else:
+                # pseudo-inverse: 2D frameworks have a null third vector
+                shifts = (fragment.positions - positions[xis])
+                shifts = shifts.dot(numpy.linalg.pinv(cell))
+                shifts = numpy.rint(shifts).astype(int)
+            # image cell of the tagged dummies, for every image of the node
+            images = offsets[:, None, :] + shifts[None, :, :]
+            fragment_tags = (images % m).dot(strides) * n + xis + 1
+            fragment_positions = positions[xis] + images.dot(cell)
+            for k in range(len(offsets)):
+                index = k * n + ai
+                image = ase.Atoms("X" * len(xis),
+                                  fragment_positions[k],
+                                  tags=fragment_tags[k])
+                image.set_array("shifts", images[k] // m)
+                supercell.fragments[index] = image
+                supercell.shapes[index] = self.shapes[ai].copy()
+                supercell.pointgroups[index] = self.pointgroups[ai]
+        # the symmetry operations of the primitive cell, combined with
+        # the translations between images. operations that do not
+        # preserve the supercell lattice are discarded.
+        if self._operations is not None or "spacegroup" in self.atoms.info:
+            rotations, translations = self.get_symmetry_operations()
+            M = numpy.diag(m.astype(float))
+            Minv = numpy.diag(1.0 / m)
+            rotations = numpy.matmul(numpy.matmul(Minv, rotations), M)
+            valid = numpy.all(numpy.abs(rotations - numpy.rint(rotations))
+                              < 1e-8, axis=(1, 2))
+            rotations = numpy.rint(rotations[valid])
+            translations = (translations[valid, None, :] +
+                            offsets[None, :, :]).dot(Minv)
+            rotations = numpy.repeat(rotations, len(offsets), axis=0)
+            supercell._operations = (rotations,
+                                     translations.reshape(-1, 3))
+        # all images of a site are equivalent by translation
+        supercell.equivalent_sites = [sorted(k * n + ai
+                                             for k in range(len(offsets))
+                                             for ai in sites)
+                                      for sites in self.equivalent_sites]
+        return supercell
+
+    def get_symmetry_operations(self):
+        """Return the symmetry operations of the topology.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        rotations: numpy.array
+            Nopsx3x3 rotation matrices, in fractional coordinates
+        translations: numpy.array
+            Nopsx3 translations, in fractional coordinates
+        """
+        if self._operations is None:
+            sg = self.atoms.info["spacegroup"]
+            if not isinstance(sg, Spacegroup):
+                sg = Spacegroup(sg)
+            self._operations = sg.get_op()
+        return self._operations
+
+    def get_slot_permutations(self,
+                              symprec=1e-4):
+        """Return the permutations of the slots by the symmetry operations.
+
+        Parameters
+        ----------
+        symprec: float
+            the tolerance for site matching, in
+            fractional coordinates
+
+        Returns
+        -------
+        slots: [int, ...]
+            the sorted indices of the slots
+        permutations: numpy.array
+            Nopsxlen(slots) array of unique permutations. The
+            operation p sends the slot slots[i] onto slots[p[i]].
+        """
+        slots = sorted(self.fragments.keys())
+        scaled = self.atoms.get_scaled_positions(wrap=True)[slots]
+        scaled = self._wrap(scaled)
+        tree = cKDTree(scaled, boxsize=1.0)
+        rotations, translations = self.get_symmetry_operations()
+        images = numpy.einsum("oij,nj->oni", rotations, scaled)
+        images = self._wrap(images + translations[:, None, :])
+        # unmatched images get the index len(slots)
+        _, permutations = tree.query(images, distance_upper_bound=symprec)
+        permutations = permutations[(permutations < len(slots)).all(axis=1)]
+        permutations = numpy.unique(permutations, axis=0)
+        return slots, permutations
+
+    def get_memory_usage(self):
+        """Return the bytes held by the topology, by component.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        usage: {str: int, ...}
+            bytes held by the atoms, fragments, shapes,
+            pointgroups, equivalent sites and symmetry
+            operations, and their total
+        """
+        from autografs.utils.memory import get_breakdown
+        return get_breakdown([("atoms", self.atoms),
+                              ("fragments", self.fragments),
+                              ("shapes", self.shapes),
+                              ("pointgroups", self.pointgroups),
+                              ("equivalent_sites", self.equivalent_sites),
+                              ("operations", self._operations)])
+
     def get_unique_shapes(self):
         """Return all unique shapes in the topology.
 
@@ -218,19 +413,19 @@ class Topology(object):
         # initialize cutoffs to small non-zero skin partameter
         skin = 5e-3
         cutoffs = numpy.zeros(len(self.atoms)) + skin
-        # we iterate over non-dummies
-        for other_index in Ais:
-            # we get the distances to all dummies and cluster accordingly
-            dists = self.atoms.get_distances(other_index, Xis, mic=True)
-            coord = self.atoms[other_index].number
-            if coord < len(dists):
-                # keep only the closest ones up to coordination
-                these_dummies = numpy.argpartition(dists, coord)
-                these_dummies = these_dummies[:coord]
-                cutoff = dists[these_dummies].max()
-            else:
-                cutoff = dists.max()
-            cutoffs[other_index] = cutoff
+        if len(Ais) == 0 or len(Xis) == 0:
+            return cutoffs
+        # all node to dummy distances at once, minimum image convention
+        positions = self.atoms.get_positions()
+        _, dists = get_distances(positions[Ais],
+                                 positions[Xis],
+                                 cell=self.atoms.get_cell(),
+                                 pbc=self.atoms.get_pbc())
+        # keep only the closest ones up to coordination
+        coord = self.atoms.get_atomic_numbers()[Ais]
+        coord = numpy.minimum(coord, len(Xis)) - 1
+        dists.sort(axis=1)
+        cutoffs[Ais] = dists[numpy.arange(len(Ais)), coord]
         return cutoffs
 
     def _analyze(self):
@@ -245,27 +440,28 @@ class Topology(object):
         self.atoms.set_tags(tags)
         tags = self.atoms.get_tags()
         # analyze
-        # first build the neighborlist
+        # first, a single periodic neighbor search
         cutoffs = self._get_cutoffs(Xis=Xis, Ais=Ais)
-        neighborlist = NeighborList(cutoffs=cutoffs,
-                                    bothways=True,
-                                    self_interaction=False,
-                                    skin=0.0)
-        neighborlist.update(self.atoms)
-        # iterate over non-dummies to find dummy neighbors
-        for ai in Ais:
-            # get indices and offsets of dummies only!
-            ni, no = neighborlist.get_neighbors(ai)
-            ni, no = zip(*[(idx, off)
-                           for idx, off in list(zip(ni, no)) if idx in Xis])
-            ni = numpy.asarray(ni)
-            no = numpy.asarray(no)
-            # get absolute positions, no offsets
-            positions = self.atoms.positions[ni] + no.dot(self.atoms.cell)
+        ni, nj, no = neighbor_list("ijS", self.atoms, cutoffs)
+        # only keep the node to dummy pairs, grouped by node
+        mask = (numbers[ni] > 0) & (numbers[nj] == 0)
+        ni, nj, no = ni[mask], nj[mask], no[mask]
+        order = numpy.lexsort((no[:, 2], no[:, 1], no[:, 0], nj, ni))
+        ni, nj, no = ni[order], nj[order], no[order]
+        # get absolute positions, no offsets
+        positions = self.atoms.positions[nj] + no.dot(self.atoms.cell)
+        starts = numpy.searchsorted(ni, Ais, side="left")
+        ends = numpy.searchsorted(ni, Ais, side="right")
+        for ai, n0, n1 in zip(Ais, starts, ends):
+            budget.check("topology")
             # create the Atoms object
-            fragment = Atoms("X" * len(ni), positions, tags=tags[ni])
+            fragment = Atoms("X" * (n1 - n0),
+                             positions[n0:n1],
+                             tags=tags[nj[n0:n1]])
+            # keep the lattice shift to the tagged dummy
+            fragment.set_array("shifts", no[n0:n1])
             # calculate the point group properties
-            max_order = len(ni)
+            max_order = len(fragment)
             shape = symmetry.get_symmetry_elements(mol=fragment.copy(),
                                                    max_order=max_order)
             pg = symmetry.PointGroup(mol=fragment.copy(),
@@ -278,29 +474,66 @@ class Topology(object):
         sg = self.atoms.info["spacegroup"]
         if not isinstance(sg, Spacegroup):
             sg = Spacegroup(sg)
-        scaled_positions = self.atoms.get_scaled_positions()
-        seen_indices = []
-        symbols = numpy.array(self.atoms.get_chemical_symbols())
-        for ai in Ais:
-            if ai in seen_indices:
-                continue
-            sites, _ = sg.equivalent_sites(scaled_positions[ai])
-            these_indices = []
-            for site in sites:
-                norms = numpy.linalg.norm(scaled_positions - site, axis=1)
-                if norms.min() < 1e-6:
-                    these_indices.append(norms.argmin())
-                # take pbc into account
-                norms = numpy.abs(norms - 1.0)
-                if norms.min() < 1e-6:
-                    these_indices.append(norms.argmin())
-            these_indices = [idx for idx in these_indices if idx in Ais]
-            seen_indices += these_indices
-            self.equivalent_sites.append(these_indices)
+        self.equivalent_sites = self._get_equivalent_sites(spacegroup=sg,
+                                                           Ais=Ais)
         return None
 
+    def _get_equivalent_sites(self,
+                              spacegroup,
+                              Ais,
+                              symprec=1e-4):
+        """Return the groups of symmetry equivalent nodes.
+
+        The fractional coordinates of the nodes are wrapped in the
+        unit cell and indexed once in a periodic KD-tree. For each
+        orbit, all symmetry images of its first node are then
+        generated and matched to node indices in a single query.
+
+        Parameters
+        ----------
+        spacegroup: ase.spacegroup.Spacegroup
+            the spacegroup of the topology
+        Ais: [int,...]
+            the indices of the nodes
+        symprec: float
+            the tolerance for site matching, in
+            fractional coordinates
+
+        Returns
+        -------
+        equivalent_sites: [[int, ...], ...]
+            the sorted lists of indices of equivalent
+            nodes, in order of first appearance
+        """
+        Ais = numpy.asarray(Ais)
+        scaled = self.atoms.get_scaled_positions(wrap=True)[Ais]
+        scaled = self._wrap(scaled)
+        rotations, translations = spacegroup.get_op()
+        tree = cKDTree(scaled, boxsize=1.0)
+        seen = numpy.zeros(len(Ais), dtype=bool)
+        equivalent_sites = []
+        for k in range(len(Ais)):
+            if seen[k]:
+                continue
+            images = self._wrap(rotations.dot(scaled[k]) + translations)
+            # unmatched images get the index len(Ais)
+            _, orbit = tree.query(images, distance_upper_bound=symprec)
+            orbit = orbit[orbit < len(Ais)]
+            orbit = numpy.union1d(orbit[~seen[orbit]], [k])
+            seen[orbit] = True
+            equivalent_sites.append(Ais[orbit].tolist())
+        return equivalent_sites
+
+    @staticmethod
+    def _wrap(scaled):
+        """Return fractional coordinates wrapped to [0, 1)"""
+        scaled = numpy.mod(scaled, 1.0)
+        scaled[scaled >= 1.0] = 0.0
+        return scaled
+
     def view(self):
         """Viewer for the toology"""
+        import ase.visualize
         ase.visualize.view(self.atoms)
         return None
 
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright : see accompanying license files for details
+
+__author__ = "Damien Coupry"
+__credits__ = ["Prof. Matthew Addicoat"]
+__license__ = "MIT"
+__maintainer__ = "Damien Coupry"
+__version__ = '2.3.2'
+__status__ = "production"
+
+
+import time
+import functools
+import threading
+import tracemalloc
+
+import logging
+logger = logging.getLogger(__name__)
+
+# active traces, per thread
+_local = threading.local()
+# callables receiving every finished span
+_hooks = []
+# per stage memory peaks, python >= 3.9
+_reset_peak = getattr(tracemalloc, "reset_peak", None)
+
+
+class Span(object):
+    """Timing of one stage of the generation."""
+
+    def __init__(self,
+                 name,
+                 parent=None,
+                 **attributes):
+        """Constructor for a span.
+
+        Parameters
+        ----------
+        name: str
+            the name of the stage
+        parent: autografs.utils.tracing.Span, optional
+            the enclosing span, if any
+        attributes: scalars, optional
+            additional information on the stage
+
+        Returns
+        -------
+        None
+        """
+        self.name = name
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.attributes = attributes
+        self.start = None
+        self.duration = None
+        # memory at the start, and highest peak of the children
+        self._memory = None
+        self._children_peak = 0
+        return None
+
+    def __enter__(self):
+        """Context manager intrinsic: start the clock"""
+        stack = _get_stack()
+        stack.append(self)
+        if tracemalloc.is_tracing():
+            self._memory = tracemalloc.get_traced_memory()
+            if _reset_peak is not None:
+                _reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        """Context manager intrinsic: stop the clock and report"""
+        self.duration = time.perf_counter() - self.start
+        if self._memory is not None and tracemalloc.is_tracing():
+            self._record_memory()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        stack = _get_stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        for trace in _get_traces():
+            trace.spans.append(self)
+        for hook in list(_hooks):
+            try:
+                hook(self)
+            except Exception as e:
+                logger.debug("Tracing hook failed: {0!r}".format(e))
+        return False
+
+    def set(self,
+            **attributes):
+        """Add information to the span"""
+        self.attributes.update(attributes)
+        return None
+
+    def _record_memory(self):
+        """Store the memory allocated during the span, in bytes"""
+        start, outer_peak = self._memory
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, self._children_peak)
+        if _reset_peak is None and peak <= outer_peak:
+            # the peak of the span is not known: lower bound
+            peak = current
+        self.attributes["memory_delta"] = current - start
+        self.attributes["memory_peak"] = max(peak - start, 0)
+        if _reset_peak is not None and self.parent is not None:
+            # the peak of the parent was reset when this span started
+            self.parent._children_peak = max(self.parent._children_peak,
+                                             outer_peak,
+                                             peak)
+        return None
+
+    def as_dict(self):
+        """Return the span as a dictionary"""
+        return {"name": self.name,
+                "parent": None if self.parent is None else self.parent.name,
+                "depth": self.depth,
+                "start": self.start,
+                "duration": self.duration,
+                "attributes": dict(self.attributes)}
+
+
+class _NullSpan(object):
+    """Span doing nothing, used when tracing is disabled."""
+
+    def __enter__(self):
+        """Context manager intrinsic"""
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        """Context manager intrinsic"""
+        return False
+
+    def set(self,
+            **attributes):
+        """Add information to the span: ignored"""
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace(object):
+    """Report of the spans recorded during a run."""
+
+    def __init__(self):
+        """Constructor for an empty trace."""
+        self.spans = []
+        return None
+
+    def __enter__(self):
+        """Context manager intrinsic: record the spans of this thread"""
+        _get_traces().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        """Context manager intrinsic: stop recording"""
+        traces = _get_traces()
+        if self in traces:
+            traces.remove(self)
+        return False
+
+    def __iter__(self):
+        """Iterable intrinsic, over the finished spans"""
+        return iter(self.spans)
+
+    def __len__(self):
+        """Sizeable intrinsic"""
+        return len(self.spans)
+
+    def get_durations(self):
+        """Return the total duration and count of spans by name.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        durations: {str: (float, int), ...}
+            total time in seconds and number
+            of spans, for each stage name
+        """
+        durations = {}
+        for span in self.spans:
+            total, count = durations.get(span.name, (0.0, 0))
+            durations[span.name] = (total + span.duration, count + 1)
+        return durations
+
+    def as_dict(self):
+        """Return the trace as a list of dictionaries, by start time"""
+        spans = sorted(self.spans, key=lambda s: s.start)
+        return [span.as_dict() for span in spans]
+
+    def summary(self):
+        """Return a printable table of the time spent in each stage"""
+        lines = ["{0:<24} {1:>6} {2:>10}".format("stage", "calls", "time (s)")]
+        durations = self.get_durations()
+        for name, (total, count) in sorted(durations.items(),
+                                           key=lambda kv: -kv[1][0]):
+            lines.append("{0:<24} {1:>6} {2:>10.4f}".format(name,
+                                                            count,
+                                                            total))
+        return "\n".join(lines)
+
+
+def _get_stack():
+    """Return the stack of open spans of this thread"""
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _get_traces():
+    """Return the active traces of this thread"""
+    traces = getattr(_local, "traces", None)
+    if traces is None:
+        traces = _local.traces = []
+    return traces
+
+
+def is_enabled():
+    """Return True if spans are recorded or forwarded"""
+    return bool(_hooks or getattr(_local, "traces", None))
+
+
+def span(name,
+         **attributes):
+    """Return a context manager timing a stage of the generation.
+
+    When no trace is active and no hook is registered, a shared
+    object doing nothing is returned.
+
+    Parameters
+    ----------
+    name: str
+        the name of the stage
+    attributes: scalars, optional
+        additional information on the stage
+
+    Returns
+    -------
+    span: autografs.utils.tracing.Span
+        to be used in a with statement
+    """
+    if not (_hooks or getattr(_local, "traces", None)):
+        return _NULL_SPAN
+    stack = _get_stack()
+    parent = stack[-1] if stack else None
+    return Span(name, parent=parent, **attributes)
+
+
+def traced(name):
+    """Return a decorator timing every call of a function in a span.
+
+    Parameters
+    ----------
+    name: str
+        the name of the stage
+
+    Returns
+    -------
+    decorator: callable
+        the decorator to apply to the function
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (_hooks or getattr(_local, "traces", None)):
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_hook(hook):
+    """Register a callable receiving every finished span.
+
+    Parameters
+    ----------
+    hook: callable
+        called with the autografs.utils.tracing.Span
+        as only argument, from the thread that ran it
+
+    Returns
+    -------
+    None
+    """
+    if hook not in _hooks:
+        _hooks.append(hook)
+    return None
+
+
+def remove_hook(hook):
+    """Unregister a callable added with add_hook"""
+    if hook in _hooks:
+        _hooks.remove(hook)
+    return None
@@ -16,7 +16,7 @@ DESCRIPTION = 'Generator for topological frameworks and chemical structures.'
 URL = 'https://github.com/DCoupry/autografs'
 EMAIL = 'damien.coupry@uni-leipzig.de'
 AUTHOR = 'Damien Coupry'
-REQUIRES_PYTHON = '>=3.4.0'
+REQUIRES_PYTHON = '>=3.7.0'
 VERSION = '2.3.2'
 REQUIRED = [ "ase","scipy>=0.15.0","numpy<1.15.0"]
 DATA = ["data/sbu/DEFAULTS.xyz","data/topologies/HermannMauguin.dat","data/topologies/nets.cgd","data/uff/rappe.csv","data/uff/uff4mof.csv"]
@@ -89,9 +89,9 @@ setup(
     # If your package is a single module, use this instead of 'packages':
     # py_modules=['mypackage'],
 
-    # entry_points={
-    #     'console_scripts': ['mycli=mymodule:cli'],
-    # },
+    entry_points={
+        'console_scripts': ['autografs=autografs.cli:main'],
+    },
     install_requires=REQUIRED,
     include_package_data=True,
     license='MIT',